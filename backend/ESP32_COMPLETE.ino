@@ -10,6 +10,8 @@
 // const char* ssid     = "Creative house";
 // const char* password = "#123456#12";
 // String PYTHON_SERVER_URL = "http://192.168.0.230:5000/api/detect";  // ← Using /api/detect for database storage
+// String COMPACT_SERVER_URL = "http://192.168.0.230:5000/api/detect/compact";  // ← Raw JPEG in, 10-byte header + voice out
+// const bool USE_COMPACT_PROTOCOL = true;  // false = multipart + JSON via sendToPython()
 
 // // ── Smart Bin Configuration ─────────────────────────────────────────────
 // const int DEFAULT_BIN_ID = 1;  // Change this for each physical bin (1, 2, 3, etc.)
@@ -187,6 +189,58 @@
 //     return response;
 // }
 
+// // ── Compact protocol: POST the frame buffer as-is, read a fixed header ──
+// // Reply: version, status, flags, voice_len (u8 each), points (u16),
+// //        total points (u32), all big-endian, then voice_len bytes of text
+// struct CompactReply {
+//     uint8_t status;       // 0 ok, 1 no detection, 2 unknown user, 3 bad request, 4 busy, 5 error
+//     bool duplicate;
+//     uint16_t points;
+//     uint32_t totalPoints;
+//     String voice;
+// };
+
+// bool sendCompactToPython(uint8_t* jpeg_buf, size_t jpeg_len, const String& rfid_uid,
+//                          int bin_id, CompactReply& reply) {
+//     HTTPClient http;
+//     if (!http.begin(COMPACT_SERVER_URL)) {
+//         Serial.println("HTTP connection failed");
+//         return false;
+//     }
+//     http.addHeader("Content-Type", "image/jpeg");
+//     http.addHeader("X-RFID-UID", rfid_uid);
+//     http.addHeader("X-Bin-Id", String(bin_id));
+
+//     // No payload copy: the camera frame buffer is sent directly
+//     int httpCode = http.POST(jpeg_buf, jpeg_len);
+//     if (httpCode <= 0) {
+//         Serial.printf("HTTP POST failed, error: %s\n", http.errorToString(httpCode).c_str());
+//         http.end();
+//         return false;
+//     }
+
+//     WiFiClient* stream = http.getStreamPtr();
+//     uint8_t header[10];
+//     if (stream->readBytes(header, sizeof(header)) != sizeof(header) || header[0] != 1) {
+//         Serial.printf("Bad compact reply (HTTP %d)\n", httpCode);
+//         http.end();
+//         return false;
+//     }
+//     reply.status = header[1];
+//     reply.duplicate = header[2] & 0x01;
+//     reply.points = (header[4] << 8) | header[5];
+//     reply.totalPoints = ((uint32_t)header[6] << 24) | ((uint32_t)header[7] << 16) |
+//                         ((uint32_t)header[8] << 8) | header[9];
+
+//     char voice[256];
+//     size_t voiceLen = stream->readBytes((uint8_t*)voice, header[3]);
+//     voice[voiceLen] = '\0';
+//     reply.voice = String(voice);
+
+//     http.end();
+//     return true;
+// }
+
 // // ─────────────────────────────────────────────────────────────────────────
 // //                          RFID + PHOTO TRIGGER
 // // ─────────────────────────────────────────────────────────────────────────
@@ -220,11 +274,20 @@
 //     }
 
 //     Serial.println("Sending image + RFID + Bin ID to AI server...");
-//     String result = sendToPython(fb->buf, fb->len, rfid_uid, DEFAULT_BIN_ID);
+//     if (USE_COMPACT_PROTOCOL) {
+//         CompactReply reply;
+//         if (sendCompactToPython(fb->buf, fb->len, rfid_uid, DEFAULT_BIN_ID, reply)) {
+//             Serial.printf("Status %d, +%u points, total %u%s\n", reply.status, reply.points,
+//                           reply.totalPoints, reply.duplicate ? " (retry)" : "");
+//             Serial.println("Voice: " + reply.voice);
+//         }
+//     } else {
+//         String result = sendToPython(fb->buf, fb->len, rfid_uid, DEFAULT_BIN_ID);
 
-//     Serial.println("────── Result from Python ──────");
-//     Serial.println(result);
-//     Serial.println("────────────────────────────────");
+//         Serial.println("────── Result from Python ──────");
+//         Serial.println(result);
+//         Serial.println("────────────────────────────────");
+//     }
 
 //     esp_camera_fb_return(fb);
 // }
@@ -0,0 +1,17 @@
+-- Migration: Add bin telemetry columns
+-- Run this on existing databases before bins or gateways post to /api/telemetry.
+-- battery_status already exists; heartbeats also report the fill sensor
+-- reading and firmware uptime, and last_seen_at records the latest heartbeat
+
+USE smart_dustbin_pro;
+
+-- NULL until the bin sends its first heartbeat
+ALTER TABLE smart_bins
+ADD COLUMN sensor_fill_percent TINYINT UNSIGNED NULL AFTER battery_status,
+ADD COLUMN uptime_s INT UNSIGNED NULL AFTER sensor_fill_percent,
+ADD COLUMN last_seen_at DATETIME NULL AFTER uptime_s;
+
+-- Verify the change
+DESCRIBE smart_bins;
+
+SELECT 'Migration completed: bin telemetry columns added' AS status;
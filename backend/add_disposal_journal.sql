@@ -0,0 +1,24 @@
+-- Migration: Add write-behind disposal journal support
+-- Run this on existing databases before enabling DISPOSAL_WRITE_BEHIND.
+-- event_id ties each waste log to its journal entry; the checkpoint table
+-- records the last entry applied per journal so crash replay never
+-- awards points twice
+
+USE smart_dustbin_pro;
+
+-- NULL for rows written before the journal existed
+ALTER TABLE waste_logs
+ADD COLUMN event_id CHAR(32) NULL,
+ADD UNIQUE KEY uq_waste_logs_event (event_id);
+
+CREATE TABLE IF NOT EXISTS disposal_journal_checkpoints (
+    journal_name VARCHAR(100) PRIMARY KEY,
+    applied_seq BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Verify the change
+DESCRIBE waste_logs;
+DESCRIBE disposal_journal_checkpoints;
+
+SELECT 'Migration completed: disposal journal support added' AS status;
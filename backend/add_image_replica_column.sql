@@ -0,0 +1,13 @@
+-- Migration: Add image_replica_url column to waste_logs table
+-- image_url keeps the local copy (/api/images/<hash>); this column holds the
+-- FreeImage.host copy once background replication (IMAGE_REPLICATION) finishes
+
+USE smart_dustbin_pro;
+
+ALTER TABLE waste_logs 
+ADD COLUMN IF NOT EXISTS image_replica_url VARCHAR(500) NULL AFTER image_url;
+
+-- Verify the change
+DESCRIBE waste_logs;
+
+SELECT 'Migration completed: image_replica_url column added to waste_logs table' AS status;
@@ -0,0 +1,57 @@
+-- Migration: Add pre-aggregated statistics tables
+-- Run this on existing databases; the backend keeps the buckets up to date
+-- for every new disposal, and the INSERT ... SELECT below backfills history
+-- (equivalent to db_helper.backfill_stats with 50 g carbon per item)
+
+USE smart_dustbin_pro;
+
+CREATE TABLE IF NOT EXISTS waste_stats_hourly (
+    bucket_start DATETIME NOT NULL,
+    bin_id INT NOT NULL,
+    waste_type VARCHAR(30) NOT NULL,
+    department VARCHAR(50) NOT NULL DEFAULT '',
+    disposals INT NOT NULL DEFAULT 0,
+    items INT NOT NULL DEFAULT 0,
+    points INT NOT NULL DEFAULT 0,
+    carbon_g DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, bin_id, waste_type, department)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS waste_stats_daily (
+    bucket_start DATE NOT NULL,
+    bin_id INT NOT NULL,
+    waste_type VARCHAR(30) NOT NULL,
+    department VARCHAR(50) NOT NULL DEFAULT '',
+    disposals INT NOT NULL DEFAULT 0,
+    items INT NOT NULL DEFAULT 0,
+    points INT NOT NULL DEFAULT 0,
+    carbon_g DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, bin_id, waste_type, department)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Backfill from existing logs
+DELETE FROM waste_stats_hourly;
+INSERT INTO waste_stats_hourly (bucket_start, bin_id, waste_type, department,
+                                disposals, items, points, carbon_g)
+SELECT TIMESTAMP(DATE(wl.detected_at), MAKETIME(HOUR(wl.detected_at), 0, 0)) AS bucket,
+       wl.bin_id, wl.waste_type, COALESCE(u.department, '') AS dept,
+       COUNT(*), SUM(wl.waste_count), SUM(wl.points_earned), SUM(wl.waste_count) * 50
+FROM waste_logs wl
+JOIN users u ON u.user_id = wl.user_id
+GROUP BY bucket, wl.bin_id, wl.waste_type, dept;
+
+DELETE FROM waste_stats_daily;
+INSERT INTO waste_stats_daily (bucket_start, bin_id, waste_type, department,
+                               disposals, items, points, carbon_g)
+SELECT DATE(wl.detected_at) AS bucket,
+       wl.bin_id, wl.waste_type, COALESCE(u.department, '') AS dept,
+       COUNT(*), SUM(wl.waste_count), SUM(wl.points_earned), SUM(wl.waste_count) * 50
+FROM waste_logs wl
+JOIN users u ON u.user_id = wl.user_id
+GROUP BY bucket, wl.bin_id, wl.waste_type, dept;
+
+-- Verify the change
+SELECT 'Hourly buckets' AS Rollup, COUNT(*) AS Total FROM waste_stats_hourly;
+SELECT 'Daily buckets' AS Rollup, COUNT(*) AS Total FROM waste_stats_daily;
+
+SELECT 'Migration completed: statistics rollup tables added' AS status;
@@ -0,0 +1,37 @@
+-- Migration: Add keyset pagination indexes to waste_logs table
+-- Run this on existing databases so history and recent-logs pages are
+-- served by backward index range scans instead of filesorts. Both indexes
+-- carry every column the page queries read, so the plans are index-only
+-- ("Using index") and never touch the clustered rows.
+--
+-- Databases that ran the earlier version of this migration already have
+-- narrower indexes under these names; replace them in one statement
+-- (the user_id foreign key needs an index at all times):
+--   ALTER TABLE waste_logs
+--   DROP INDEX idx_waste_logs_user_time, DROP INDEX idx_waste_logs_time,
+--   ADD INDEX idx_waste_logs_user_time (...), ADD INDEX idx_waste_logs_time (...);
+
+USE smart_dustbin_pro;
+
+-- Per-user history: WHERE user_id = ? ORDER BY detected_at DESC, log_id DESC
+-- Admin recent logs: ORDER BY detected_at DESC, log_id DESC
+ALTER TABLE waste_logs
+ADD INDEX idx_waste_logs_user_time (user_id, detected_at, log_id,
+                                    waste_type, waste_count, points_earned, image_url),
+ADD INDEX idx_waste_logs_time (detected_at, log_id,
+                               user_id, waste_type, waste_count, points_earned, image_url);
+
+-- Verify the change
+SHOW INDEX FROM waste_logs;
+
+-- Both plans should show the new index, "Using index" and no "Using filesort"
+EXPLAIN SELECT log_id, user_id, waste_type, waste_count, points_earned, image_url, detected_at
+FROM waste_logs WHERE user_id = 2
+ORDER BY detected_at DESC, log_id DESC LIMIT 10;
+
+EXPLAIN SELECT wl.log_id, wl.user_id, wl.waste_type, wl.waste_count, wl.points_earned,
+               wl.image_url, wl.detected_at, u.full_name
+FROM waste_logs wl STRAIGHT_JOIN users u ON wl.user_id = u.user_id
+ORDER BY wl.detected_at DESC, wl.log_id DESC LIMIT 20;
+
+SELECT 'Migration completed: waste_logs pagination indexes added' AS status;
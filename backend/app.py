@@ -1,13 +1,16 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
-import cv2
-import numpy as np
-import requests
-from flask import Flask, request, jsonify
+import logging
+import time
+import uuid
+import atexit
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from functools import partial, wraps
+from flask import (
+    Flask, Response, request, jsonify, send_file, g, has_request_context, stream_with_context
+)
 from flask_cors import CORS
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
 
 # ── Important: Bangladesh timezone ───────────────────────────────
 from zoneinfo import ZoneInfo
@@ -17,66 +20,487 @@ BD_TZ = ZoneInfo("Asia/Dhaka")   # UTC+6, no DST
 # ── Database Helper ──────────────────────────────────────────────
 from db_helper import (
     DatabaseHelper, get_user_by_rfid, get_user_by_credentials,
-    get_user_stats, create_user, update_user_stats,
-    insert_waste_log, get_user_history, get_leaderboard,
-    get_all_bins, get_bin_by_id, update_bin_fill_level,
-    reset_bin_fill_level, update_bin_status
+    get_user_stats, create_user, get_user_history, get_leaderboard, ensure_leaderboard,
+    get_all_bins, get_bin_by_id, reset_bin_fill_level, record_disposal,
+    update_waste_log_replica, update_waste_log_replica_by_event, get_user_rank, verify_leaderboard,
+    apply_disposal_batch, write_through_disposal_totals, get_journal_checkpoint, disposal_journal_ready, JOURNAL_REJECT_ERRORS,
+    apply_bin_telemetry,
+    get_recent_logs, format_log_cursor, parse_log_cursor, explain_log_queries,
+    archive_waste_logs, backfill_stats, get_stats_trend, get_stats_breakdown, get_carbon_totals,
+    get_hourly_bin_items, export_waste_logs,
+    STATS_TABLES, STATS_DIMENSIONS
+)
+from image_uploader import ImageUploader
+from image_store import ImageStore, is_digest, image_digest
+from inference_engine import (
+    InferenceEngine, ProcessInferenceEngine, CompactDetector, InferenceOverloadedError
 )
+from ttl_cache import TTLCache
+from response_cache import ResponseCache
+from frame_gate import FrameGate
+from fill_forecast import FillForecaster
+from log_archive import LogArchive, month_start, months_back
+from log_export import EXPORT_FORMATS, with_error_marker
+from event_stream import EventBroker
+from disposal_journal import DisposalJournal
+from bin_telemetry import TelemetryBuffer, parse_heartbeat
+from compact_protocol import encode_reply, COMPACT_MIMETYPE
+from metrics import MetricsRegistry, StageTimer, configure_logging, fields
 
 # ================================================================
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 
+# --- LOGGING & METRICS ---
+LOG_LEVEL = logging.INFO   # DEBUG also logs every background image patch
+configure_logging(LOG_LEVEL)
+logger = logging.getLogger("app")
+
+metrics = MetricsRegistry()
+http_requests = metrics.counter(
+    "http_requests_total", "Requests by endpoint and HTTP status", ("endpoint", "status"))
+http_request_seconds = metrics.histogram(
+    "http_request_seconds", "Request handling time by endpoint", ("endpoint",))
+detect_stage_seconds = metrics.histogram(
+    "detect_stage_seconds", "Time spent in each stage of a detect request", ("stage",))
+detect_detections = metrics.histogram(
+    "detect_detections", "Objects detected per frame", buckets=(0, 1, 2, 3, 4, 6, 8, 12, 20))
+detect_db_round_trips = metrics.histogram(
+    "detect_db_round_trips", "Database round trips per detect request",
+    buckets=(0, 1, 2, 4, 6, 8, 12, 16))
+db_seconds = metrics.histogram(
+    "db_seconds", "Database query, transaction and streamed export time", ("kind",))
+upload_seconds = metrics.histogram(
+    "upload_seconds", "Image host upload attempt time", ("outcome",))
+frame_gate_frames = metrics.counter(
+    "frame_gate_frames_total", "Frames checked by the change gate by bin and outcome",
+    ("bin_id", "outcome"))
+
+DETECT_ENDPOINTS = {"detect_objects", "detect_objects_compact", "detect_objects_legacy"}
+
+
+def observe_db(kind, seconds, round_trips):
+    """DatabaseHelper observer: global timings plus this request's DB totals."""
+    db_seconds.observe(seconds, kind)
+    if has_request_context():
+        g.db_seconds = g.get("db_seconds", 0.0) + seconds
+        g.db_round_trips = g.get("db_round_trips", 0) + round_trips
+
+
+def observe_upload(outcome, seconds):
+    upload_seconds.observe(seconds, outcome)
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(current_dir, 'model', 'efficientdet_lite0.tflite')
+
+# --- INFERENCE SETTINGS ---
+# Every web worker process runs its own pool, so the host's cores are divided
+# between them: set BARAQA_WEB_WORKERS to uvicorn/gunicorn's --workers (both
+# also read WEB_CONCURRENCY), or size the pool directly with
+# BARAQA_INFERENCE_PROCESSES (0 = detect in worker threads)
+WEB_WORKERS = max(1, int(os.environ.get('BARAQA_WEB_WORKERS', os.environ.get('WEB_CONCURRENCY', '1'))))
+INFERENCE_PROCESSES = int(os.environ.get(
+    'BARAQA_INFERENCE_PROCESSES', max(1, ((os.cpu_count() or 2) - 1) // WEB_WORKERS)))
+INFERENCE_QUEUE_SIZE = 4 * max(1, INFERENCE_PROCESSES)   # shared-memory frame slots
+INFERENCE_WORKERS = max(1, (os.cpu_count() or 2) // 2 // WEB_WORKERS)   # thread mode only
+INFERENCE_MAX_BATCH = 8           # thread mode: frames one detector takes at a time when all are busy
+INFERENCE_BATCH_WINDOW_MS = 5.0   # thread mode: how long it waits to fill such a batch
+INFERENCE_WARMUP = False   # load the model at startup instead of on the first frame
+
+# One detector per worker; partial() keeps the factory picklable
+create_detector = partial(CompactDetector, MODEL_PATH, score_threshold=0.5)
+
+# Detectors load on the first frame (or a warm-up), so workers that only
+# serve dashboards never import MediaPipe or hold the model in memory, and
+# worker processes are only started then as well. The exception is the dev
+# server's reloading child (``python app.py``): there the fork server would
+# import this module again, so its workers are forked here, before any other
+# thread exists. The reloader parent never starts them.
+if INFERENCE_PROCESSES:
+    inference_engine = ProcessInferenceEngine(
+        create_detector,
+        processes=INFERENCE_PROCESSES,
+        max_queue=INFERENCE_QUEUE_SIZE,
+    )
+    if __name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        inference_engine.start()
+else:
+    inference_engine = InferenceEngine(
+        create_detector,
+        workers=INFERENCE_WORKERS,
+        max_batch_size=INFERENCE_MAX_BATCH,
+        batch_window_ms=INFERENCE_BATCH_WINDOW_MS,
+    )
+atexit.register(inference_engine.stop)
+if INFERENCE_WARMUP:
+    inference_engine.warm_up()
+
 # --- DATABASE CONFIGURATION ---
+# BARAQA_DB_* overrides let the benchmark suite point a server at a scratch database
 DB_CONFIG = {
-    "user": "root",
-    "password": "Avijit@12#12",
-    "host": "localhost",
-    "database": "smart_dustbin_pro",
+    "user": os.environ.get("BARAQA_DB_USER", "root"),
+    "password": os.environ.get("BARAQA_DB_PASSWORD", "Avijit@12#12"),
+    "host": os.environ.get("BARAQA_DB_HOST", "localhost"),
+    "database": os.environ.get("BARAQA_DB_NAME", "smart_dustbin_pro"),
 }
 
-db = DatabaseHelper(DB_CONFIG)
+# --- LOG ARCHIVE SETTINGS ---
+LOG_ARCHIVE_DIR = os.path.join(current_dir, 'archive')
+LOG_HOT_MONTHS = 3        # the current month and the 2 before it stay in waste_logs
+LOG_ARCHIVE_CACHE = 4     # archived months kept decoded in memory
+
+log_archive = LogArchive(LOG_ARCHIVE_DIR, LOG_ARCHIVE_CACHE)
+
+# --- EXPORT SETTINGS ---
+EXPORT_MAX_CONCURRENT = 2   # each running export holds one pooled connection
+EXPORT_BATCH_SIZE = 1000    # rows fetched from MySQL and written per chunk
+
+export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
+# --- CONNECTION POOL SETTINGS ---
+DB_POOL_MIN_SIZE = 2
+DB_POOL_MAX_SIZE = 10
+DB_POOL_TIMEOUT = 5.0      # seconds to wait for a free connection
+DB_POOL_RECYCLE = 3600.0   # seconds before a connection is replaced
+DB_CACHE_SIZE = 4096       # cached users-by-RFID and bins-by-id (each)
+DB_CACHE_TTL = 60.0        # seconds; bounds staleness across worker processes
+LEADERBOARD_RESYNC = 60.0  # seconds between full leaderboard reloads (bounds drift across hosts)
+# Touched by whichever web worker awards points; the others reload within a second
+LEADERBOARD_STAMP = os.path.join(current_dir, 'leaderboard.stamp')
+
+db = DatabaseHelper(
+    DB_CONFIG,
+    pool_min_size=DB_POOL_MIN_SIZE,
+    pool_max_size=DB_POOL_MAX_SIZE,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    cache_size=DB_CACHE_SIZE,
+    cache_ttl=DB_CACHE_TTL,
+    leaderboard_resync=LEADERBOARD_RESYNC,
+    leaderboard_stamp=LEADERBOARD_STAMP,
+    observer=observe_db,
+    archive=log_archive,
+)
+# Loaded now so the first leaderboard or rank request does not pay for it
+try:
+    ensure_leaderboard(db)
+except Exception as e:
+    logger.warning("Leaderboard not preloaded", extra=fields(error=e))
+
+# --- LIVE UPDATES ---
+events = EventBroker()
+
+# --- PAGINATION ---
+MAX_PAGE_SIZE = 100
 
 # --- GAMIFICATION SETTINGS ---
 POINTS_PER_ITEM = 10
 CARBON_PER_ITEM_G = 50  # 50 grams per item
 
+# --- FILL FORECAST SETTINGS ---
+FORECAST_WINDOW_HOURS = 14 * 24     # hourly history the fill rate is estimated from
+FORECAST_HALF_LIFE_HOURS = 72.0     # an hour this old counts half as much as the current one
+FORECAST_REFRESH_SECONDS = 60.0     # forecast cache lifetime
+COLLECTION_HORIZON_HOURS = 24.0     # bins full within this are due for collection
+
+fill_forecaster = FillForecaster(
+    partial(get_all_bins, db), partial(get_hourly_bin_items, db),
+    window_hours=FORECAST_WINDOW_HOURS,
+    half_life_hours=FORECAST_HALF_LIFE_HOURS,
+    refresh_interval=FORECAST_REFRESH_SECONDS,
+)
+
+# --- IMAGE STORE SETTINGS ---
+IMAGE_STORE_DIR = os.path.join(current_dir, 'images')
+IMAGE_THUMBNAIL_SIZE = 160            # pixels, longer side
+IMAGE_CACHE_MAX_AGE = 365 * 24 * 3600  # content-addressed, so a URL never changes
+IMAGE_REPLICATION = False             # also copy frames to freeimage.host in the background
+
+image_store = ImageStore(IMAGE_STORE_DIR, IMAGE_THUMBNAIL_SIZE)
+
 # --- FREEIMAGE CONFIGURATION ---
 FREEIMAGE_API_KEY = "6d207e02198a847aa98d0a2a901485a5"
-FREEIMAGE_URL = "https://freeimage.host/api/1/upload"
+FREEIMAGE_URL = os.environ.get("BARAQA_FREEIMAGE_URL", "https://freeimage.host/api/1/upload")
+UPLOAD_WORKERS = 2
+UPLOAD_QUEUE_SIZE = 100
+UPLOAD_MAX_ATTEMPTS = 4
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
-MODEL_PATH = os.path.join(current_dir, 'model', 'efficientdet_lite0.tflite')
+# --- DETECTION CACHE SETTINGS ---
+DETECTION_CACHE_SIZE = 1024
+DETECTION_CACHE_TTL = 600.0   # seconds
+DISPOSAL_DEDUP_TTL = 120.0    # ESP32 retries arrive well within this window
+DISPOSAL_DEDUP_WAIT = 30.0    # how long a retry waits for the original request's reply
 
-base_options = python.BaseOptions(model_asset_path=MODEL_PATH)
-options = vision.ObjectDetectorOptions(
-    base_options=base_options,
-    score_threshold=0.5
-)
-detector = vision.ObjectDetector.create_from_options(options)
+detection_cache = TTLCache(DETECTION_CACHE_SIZE, DETECTION_CACHE_TTL)
+disposal_cache = TTLCache(DETECTION_CACHE_SIZE, DISPOSAL_DEDUP_TTL)
+
+# --- FRAME GATE SETTINGS ---
+# BARAQA_FRAME_GATE=0 sends every frame to the detector (e.g. for load tests)
+FRAME_GATE_ENABLED = os.environ.get("BARAQA_FRAME_GATE", "1") != "0"
+FRAME_CHANGE_THRESHOLD = 0.015   # mean abs fingerprint difference, 0..1; below it nothing new was put in
+FRAME_GATE_HISTORY = 4           # recent frames per bin compared against
+
+frame_gate = FrameGate(FRAME_CHANGE_THRESHOLD, FRAME_GATE_HISTORY)
+
+# --- RESPONSE CACHE SETTINGS ---
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL = 30.0   # seconds; bounds staleness from writes in other worker processes
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
 
 
-def upload_to_freeimage(image_bytes):
-    """Uploads binary image data to freeimage.host and returns the URL."""
+def cached_response(*tags):
+    """
+    Serve a GET endpoint's successful responses from response_cache until
+    one of ``tags`` is invalidated. Responses carry an ETag and matching
+    If-None-Match requests get a 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.path, request.query_string)
+            entry = response_cache.get(key, tags)
+            if entry is None:
+                versions = response_cache.versions(tags)
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                entry = response_cache.put(key, tags, versions, response.get_data(), response.mimetype)
+
+            response = Response(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            # Browsers keep the body but revalidate on every poll
+            response.cache_control.no_cache = True
+            response.cache_control.private = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def on_image_uploaded(ref, replica_url):
+    """
+    Record where a waste log's frame was replicated once the upload
+    succeeds. image_url keeps pointing at the local copy, which pages and
+    thumbnails are served from whether or not the image host is up.
+    ``ref`` is a log_id, or a journal event_id for write-behind disposals.
+    """
+    if not replica_url:
+        logger.warning("Image replication failed", extra=fields(ref=ref))
+        return
+    if isinstance(ref, str):
+        # Not flushed yet: recorded once its batch is written
+        if disposal_journal.set_image_replica(ref, replica_url):
+            return
+        update_waste_log_replica_by_event(db, ref, replica_url)
+    else:
+        update_waste_log_replica(db, ref, replica_url)
+    logger.debug("Log image replicated", extra=fields(ref=ref, replica_url=replica_url))
+
+
+image_uploader = ImageUploader(
+    FREEIMAGE_API_KEY,
+    FREEIMAGE_URL,
+    on_complete=on_image_uploaded,
+    workers=UPLOAD_WORKERS,
+    max_queue=UPLOAD_QUEUE_SIZE,
+    max_attempts=UPLOAD_MAX_ATTEMPTS,
+    observer=observe_upload,
+)
+if IMAGE_REPLICATION:
+    image_uploader.start()
+    atexit.register(image_uploader.stop)
+
+# --- WRITE-BEHIND DISPOSALS ---
+DISPOSAL_WRITE_BEHIND = True    # journal disposals locally and batch them into MySQL
+                                # (needs add_disposal_journal.sql; otherwise falls back)
+JOURNAL_DIR = os.path.join(current_dir, 'journal')
+JOURNAL_FLUSH_INTERVAL = 0.25   # seconds an event may wait before its batch is written
+JOURNAL_MAX_BATCH = 200
+
+
+def on_disposals_flushed(disposals, result):
+    """Announce journaled disposals once their batch has committed."""
+    response_cache.invalidate("users", "bins", "logs")
+    for disposal in disposals:
+        log_id = result["log_ids"].get(disposal["event_id"])
+        if disposal.get("image_replica_url"):
+            # Replicated while the disposal was waiting in the journal
+            update_waste_log_replica_by_event(db, disposal["event_id"], disposal["image_replica_url"])
+        totals = dict(result["bins"].get(disposal["bin_id"], {}), log_id=log_id)
+        publish_disposal(disposal, totals)
+    for user_id in result["users"]:
+        publish_rank(user_id)
+
+
+disposal_journal = DisposalJournal(
+    JOURNAL_DIR,
+    apply_batch=partial(apply_disposal_batch, db),
+    load_checkpoint=partial(get_journal_checkpoint, db),
+    on_flushed=on_disposals_flushed,
+    on_applied=partial(write_through_disposal_totals, db),
+    flush_interval=JOURNAL_FLUSH_INTERVAL,
+    max_batch=JOURNAL_MAX_BATCH,
+    permanent_errors=JOURNAL_REJECT_ERRORS,
+)
+# Only on once the schema is in place and MySQL's checkpoint is loaded;
+# otherwise each disposal is written directly as before
+write_behind_active = False
+if DISPOSAL_WRITE_BEHIND:
     try:
-        payload = {
-            'key': FREEIMAGE_API_KEY,
-            'action': 'upload',
-            'format': 'json'
-        }
-        files = {'source': ('capture.jpg', image_bytes, 'image/jpeg')}
-        
-        response = requests.post(FREEIMAGE_URL, data=payload, files=files, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('status_code') == 200:
-                return data['image']['url']
-        print("Upload failed:", response.text)
+        if not disposal_journal_ready(db):
+            raise RuntimeError("disposal journal schema missing, run add_disposal_journal.sql")
+        disposal_journal.start()
+        write_behind_active = True
+        atexit.register(disposal_journal.stop)
     except Exception as e:
-        print(f"Upload exception: {e}")
-    return None
+        logger.error("Write-behind disposals disabled", extra=fields(error=e))
+
+# --- BIN TELEMETRY SETTINGS ---
+TELEMETRY_FLUSH_INTERVAL = 5.0   # seconds heartbeats are coalesced before one batched write
+TELEMETRY_MAX_BATCH = 500        # bins per UPDATE
+TELEMETRY_MAX_RECORDS = 5000     # heartbeats accepted per request
+
+bin_telemetry = TelemetryBuffer(
+    partial(apply_bin_telemetry, db),
+    on_flushed=lambda readings: response_cache.invalidate("bins"),
+    flush_interval=TELEMETRY_FLUSH_INTERVAL,
+    max_batch=TELEMETRY_MAX_BATCH,
+)
+bin_telemetry.start()
+atexit.register(bin_telemetry.stop)
+
+
+def inference_backlog():
+    """Frames waiting for or in detection (slots in use in process mode)."""
+    stats = inference_engine.stats()
+    return stats.get("in_flight", stats.get("queue_depth"))
+
+
+# Read at scrape time, so idle components cost nothing
+metrics.gauge("inference_backlog", "Frames waiting for or in detection", inference_backlog)
+metrics.gauge("upload_queue_depth", "Images waiting for upload",
+              lambda: image_uploader.stats()["queue_depth"])
+metrics.gauge("disposal_journal_pending", "Journaled disposals not yet in MySQL",
+              lambda: disposal_journal.stats()["pending"] if write_behind_active else None)
+metrics.gauge("telemetry_pending", "Bins with a heartbeat waiting to be written",
+              lambda: bin_telemetry.stats()["pending"])
+metrics.gauge("db_pool_in_use", "Database connections checked out", lambda: db.pool_stats()["in_use"])
+metrics.gauge("event_subscribers", "Connected live-update streams",
+              lambda: events.stats()["subscribers"])
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.db_seconds = 0.0
+    g.db_round_trips = 0
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Count and time every request; detect requests also get a summary line."""
+    endpoint = request.endpoint or "unmatched"
+    elapsed = time.perf_counter() - g.get("request_started", time.perf_counter())
+    http_requests.inc(1, endpoint, str(response.status_code))
+    http_request_seconds.observe(elapsed, endpoint)
+
+    timer = g.get("stage_timer")
+    if endpoint in DETECT_ENDPOINTS and timer is not None:
+        timer.record("db", g.db_seconds)
+        timer.record("total", elapsed)
+        detect_db_round_trips.observe(g.db_round_trips)
+        if logger.isEnabledFor(logging.INFO):
+            summary = g.get("detect_summary", {})
+            logger.info("detect", extra=fields(
+                endpoint=endpoint, status=response.status_code,
+                **summary, db_round_trips=g.db_round_trips,
+                **{f"{stage}_ms": ms for stage, ms in timer.stages_ms.items()}))
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format 0.0.4)."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def request_stage_timer():
+    """The current request's StageTimer, created on first use."""
+    if not has_request_context():
+        return StageTimer(detect_stage_seconds)
+    if "stage_timer" not in g:
+        g.stage_timer = StageTimer(detect_stage_seconds)
+    return g.stage_timer
+
+
+def detect_waste(file_bytes, digest=None):
+    """
+    Run object detection on uploaded JPEG bytes.
+    Byte-identical frames are answered from the detection cache.
+    Decode and inference are timed as stages of the current request.
+
+    Returns:
+        List of detection dicts, or None if the image cannot be decoded
+    """
+    digest = digest or image_digest(file_bytes)
+    cached = detection_cache.get(digest)
+    if cached is not None:
+        return cached
+
+    # OpenCV is only imported by processes that detect
+    from image_preprocess import decode_for_inference, scale_box
+
+    timer = request_stage_timer()
+    with timer.stage("decode"):
+        decoded = decode_for_inference(file_bytes)
+    if decoded is None:
+        return None
+
+    image_rgb, scale = decoded
+    with timer.stage("inference"):
+        detections = inference_engine.detect(image_rgb)
+
+    detections_list = []
+    for label, score, x, y, width, height in detections:
+        detections_list.append({
+            "label": label,
+            "confidence": round(score, 3),
+            "box": scale_box([x, y, width, height], scale)
+        })
+
+    detection_cache.put(digest, detections_list)
+    return detections_list
+
+
+def publish_disposal(disposal, totals):
+    """Push a committed disposal and the bin change it caused."""
+    events.publish("disposal", {
+        "log_id": totals['log_id'],
+        "user_id": disposal['user_id'],
+        "user_name": disposal['user_name'],
+        "bin_id": disposal['bin_id'],
+        "waste_type": disposal['waste_type'],
+        "waste_count": disposal['waste_count'],
+        "points_earned": disposal['points_earned'],
+        "image_url": disposal['image_url'],
+        "timestamp": disposal['timestamp'],
+    })
+    if 'current_fill_level' in totals:
+        events.publish("bin", {
+            "bin_id": disposal['bin_id'],
+            "current_fill_level": totals['current_fill_level'],
+            "max_capacity": totals['max_capacity'],
+            "status": totals['bin_status'],
+        })
+
+
+def publish_rank(user_id):
+    """Push a user's new leaderboard position."""
+    rank = db.leaderboard.rank(user_id)
+    if rank:
+        events.publish("leaderboard", rank)
 
 
 @app.route('/api/detect', methods=['POST'])
@@ -85,108 +509,167 @@ def detect_objects():
     Hardware endpoint: Process waste disposal with object detection.
     Input: image (file), rfid_uid (string), bin_id (int)
     """
-    print("=" * 60)
-    print("📸 /api/detect request received")
-    print(f"Files in request: {list(request.files.keys())}")
-    print(f"Form data: {dict(request.form)}")
-    print("=" * 60)
-    
     if 'image' not in request.files:
-        print("❌ ERROR: No image in request.files")
+        logger.warning("Detect request without image",
+                       extra=fields(files=",".join(request.files.keys())))
         return jsonify({"error": "No image provided"}), 400
 
     file = request.files['image']
     rfid_uid = request.form.get('rfid_uid', '').strip()
     bin_id = request.form.get('bin_id', '').strip()
 
-    print(f"✓ Image file: {file.filename if file.filename else 'no filename'}")
-    print(f"✓ RFID UID: {rfid_uid}")
-    print(f"✓ Bin ID: {bin_id}")
-
     if not file or not rfid_uid or not bin_id:
-        print(f"❌ ERROR: Missing parameters - file:{bool(file)}, rfid:{bool(rfid_uid)}, bin:{bool(bin_id)}")
+        logger.warning("Detect request missing parameters", extra=fields(
+            file=bool(file), rfid=bool(rfid_uid), bin=bool(bin_id)))
         return jsonify({"error": "Missing required parameters"}), 400
 
     try:
         bin_id = int(bin_id)
-        print(f"✓ Bin ID converted to int: {bin_id}")
-    except ValueError as e:
-        print(f"❌ ERROR: Invalid bin_id - {e}")
+    except ValueError:
+        logger.warning("Detect request with invalid bin_id", extra=fields(bin_id=bin_id))
         return jsonify({"error": "Invalid bin_id"}), 400
 
+    file_bytes = file.read()
+
+    response_data, status_code = process_disposal(file_bytes, rfid_uid, bin_id)
+    return jsonify(response_data), status_code
+
+
+# Disposals being processed right now, so a retry that arrives before the
+# original has answered waits for its reply instead of being recorded too
+disposal_claims = {}    # dedup key -> Future of the reply (None if it failed)
+disposal_claims_lock = threading.Lock()
+
+
+def claim_disposal(dedup_key):
+    """
+    Reserve a disposal's dedup key before detection.
+
+    Returns:
+        (reply, None) for a repeat of a recorded disposal; (None, claim)
+        when this request must process it and then call release_disposal;
+        (None, None) if the original is still running after DISPOSAL_DEDUP_WAIT
+    """
+    deadline = time.monotonic() + DISPOSAL_DEDUP_WAIT
+    while True:
+        with disposal_claims_lock:
+            previous_response = disposal_cache.get(dedup_key)
+            if previous_response is not None:
+                return previous_response, None
+            original = disposal_claims.get(dedup_key)
+            if original is None:
+                claim = disposal_claims[dedup_key] = Future()
+                return None, claim
+        try:
+            previous_response = original.result(max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            return None, None
+        if previous_response is not None:
+            return previous_response, None
+        # The original failed without recording anything: try again
+
+
+def release_disposal(dedup_key, claim, response_data):
+    """Hand the claimed disposal's reply (None if it failed) to waiting retries."""
+    with disposal_claims_lock:
+        if response_data is not None:
+            disposal_cache.put(dedup_key, response_data)
+        del disposal_claims[dedup_key]
+    claim.set_result(response_data)
+
+
+def process_disposal(file_bytes, rfid_uid, bin_id):
+    """
+    Validate, detect, record and answer one disposal. Shared by the JSON
+    and compact hardware endpoints; each step is timed as a request stage.
+
+    Returns:
+        (response dict, HTTP status code)
+    """
+    timer = request_stage_timer()
+    g.detect_summary = {"rfid": rfid_uid, "bin_id": bin_id, "image_bytes": len(file_bytes)}
+    dedup_key = claim = response_data = None
     try:
         # ── Step 1: Validate User ──────────────────────────────────
-        print(f"🔍 Looking up user with RFID: {rfid_uid}")
-        user = get_user_by_rfid(db, rfid_uid)
+        with timer.stage("lookup"):
+            user = get_user_by_rfid(db, rfid_uid)
+            bin_info = get_bin_by_id(db, bin_id) if user else None
         if not user:
-            print(f"❌ ERROR: User not found with RFID: {rfid_uid}")
-            return jsonify({
+            logger.warning("Unknown RFID", extra=fields(rfid=rfid_uid))
+            return {
                 "status": "error",
                 "message": "Unknown User. Please register your RFID.",
                 "voice_command": "Access denied. Unknown user."
-            }), 403
+            }, 403
 
-        print(f"✓ User found: {user['full_name']} (ID: {user['user_id']})")
+        g.detect_summary["user_id"] = user['user_id']
 
         # ── Step 2: Validate Bin ───────────────────────────────────
-        print(f"🔍 Looking up bin with ID: {bin_id}")
-        bin_info = get_bin_by_id(db, bin_id)
         if not bin_info:
-            print(f"❌ ERROR: Bin not found with ID: {bin_id}")
-            return jsonify({"error": "Invalid bin_id"}), 400
-
-        print(f"✓ Bin found: {bin_info['bin_name']}")
+            logger.warning("Unknown bin", extra=fields(bin_id=bin_id))
+            return {"error": "Invalid bin_id"}, 400
 
         # ── Step 3: Image Processing ───────────────────────────────
-        print("📷 Reading image bytes...")
-        file_bytes = file.read()
-        print(f"✓ Image size: {len(file_bytes)} bytes")
-        
-        nparr = np.frombuffer(file_bytes, np.uint8)
-        image_bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if image_bgr is None:
-            print("❌ ERROR: Failed to decode image")
-            return jsonify({"error": "Invalid image format"}), 400
-
-        print(f"✓ Image decoded: {image_bgr.shape}")
-        
-        image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
+        # An ESP32 retry after a timeout resends the same frame; answer it
+        # with the original reply instead of awarding points twice, also
+        # while the original is still being processed
+        digest = image_digest(file_bytes)
+        dedup_key = f"{digest}:{user['user_id']}:{bin_id}"
+        previous_response, claim = claim_disposal(dedup_key)
+        if previous_response is not None:
+            g.detect_summary["duplicate"] = True
+            return dict(previous_response, duplicate=True), 200
+        if claim is None:
+            g.detect_summary["duplicate"] = True
+            return {
+                "status": "error",
+                "message": "Still processing this disposal, please try again.",
+                "voice_command": "System busy. Please try again."
+            }, 503
+
+        # A frame that looks like one this bin sent recently shows nothing
+        # new in the chute; answer without decoding for the detector
+        fingerprint = None
+        if FRAME_GATE_ENABLED:
+            with timer.stage("gate"):
+                unchanged, fingerprint, change = frame_gate.check(bin_id, file_bytes)
+            frame_gate_frames.inc(1, str(bin_id), "skipped" if unchanged else "passed")
+            if change is not None:
+                g.detect_summary["change"] = round(change, 4)
+            if unchanged:
+                g.detect_summary["gated"] = True
+                return {
+                    "status": "no_detection",
+                    "message": "No new item detected",
+                    "voice_command": "No new item detected. Please try again.",
+                    "gated": True
+                }, 200
 
         # Run detection
-        print("🤖 Running object detection...")
-        detection_result = detector.detect(mp_image)
-        detection_result = detector.detect(mp_image)
-
-        # Prepare detections list
-        detections_list = []
-        for detection in detection_result.detections:
-            category = detection.categories[0]
-            bbox = detection.bounding_box
-            detections_list.append({
-                "label": category.category_name,
-                "confidence": round(float(category.score), 3),
-                "box": [bbox.origin_x, bbox.origin_y, bbox.width, bbox.height]
-            })
+        detections_list = detect_waste(file_bytes, digest)
 
+        if detections_list is None:
+            logger.warning("Failed to decode image", extra=fields(image_bytes=len(file_bytes)))
+            return {"error": "Invalid image format"}, 400
+
+        frame_gate.remember(bin_id, fingerprint)
         detected_count = len(detections_list)
+        detect_detections.observe(detected_count)
+        g.detect_summary["detections"] = detected_count
 
         if detected_count == 0:
-            return jsonify({
+            return {
                 "status": "no_detection",
                 "message": "No waste items detected",
                 "voice_command": "No items detected. Please try again."
-            }), 200
+            }, 200
 
-        # ── Step 4: Upload Image ───────────────────────────────────
+        # ── Step 4: Store Image ────────────────────────────────────
+        # Kept locally before the log is written, so the evidence never
+        # depends on the image host being reachable
         now_bd = datetime.now(BD_TZ)
-        print(f"[{now_bd.strftime('%Y-%m-%d %H:%M:%S %Z')}] "
-              f"Objects detected! Uploading... ({detected_count} found)")
-        
-        hosted_url = upload_to_freeimage(file_bytes)
-        if not hosted_url:
-            hosted_url = "upload_failed"
+        with timer.stage("store_image"):
+            frame_url = image_store.put(digest, file_bytes)
 
         # ── Step 5: Gamification Calculations ──────────────────────
         points_earned = detected_count * POINTS_PER_ITEM
@@ -198,34 +681,61 @@ def detect_objects():
             labels = [d['label'] for d in detections_list]
             waste_type = max(set(labels), key=labels.count)
 
-        # ── Step 6: Database Transaction ───────────────────────────
-        try:
-            # Insert waste log
-            insert_waste_log(db, user['user_id'], bin_id, waste_type, 
-                           detected_count, points_earned, hosted_url)
-            
-            # Update user stats
-            update_user_stats(db, user['user_id'], points_earned, 
-                            detected_count, carbon_saved)
-            
-            # Update bin fill level (increment by detected items)
-            update_bin_fill_level(db, bin_id, detected_count)
-            
-            # Check if bin is full (assume 100% threshold)
-            updated_bin = get_bin_by_id(db, bin_id)
-            if updated_bin and updated_bin['current_fill_level'] >= updated_bin['max_capacity']:
-                update_bin_status(db, bin_id, 'full')
-
-        except Exception as db_error:
-            print(f"Database error: {db_error}")
-            return jsonify({
-                "status": "error",
-                "message": "Database error occurred"
-            }), 500
+        disposal = {
+            "event_id": uuid.uuid4().hex,
+            "user_id": user['user_id'],
+            "user_name": user['full_name'],
+            "department": user.get('department'),
+            "bin_id": bin_id,
+            "waste_type": waste_type,
+            "waste_count": detected_count,
+            "points_earned": points_earned,
+            "carbon_saved": carbon_saved,
+            "image_url": frame_url,
+            "detected_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "timestamp": now_bd.isoformat(),
+        }
+
+        if write_behind_active:
+            # ── Step 6: Journal Write ──────────────────────────────
+            # Durable once fsynced; the flusher batches it into MySQL and
+            # announces it. Totals are projected from the user's cached
+            # row plus everything still waiting in the journal, both read
+            # under the lock a committing batch moves from one to the other.
+            with timer.stage("record"):
+                disposal_journal.append(disposal)
+            pending = disposal_journal.pending_totals(
+                user['user_id'], bin_id, committed=lambda: db.user_cache.get(rfid_uid) or user)
+            committed = pending['committed']
+            updated_user = {
+                "current_points": committed['current_points'] + pending['points'],
+                "total_recycled_items": committed['total_recycled_items'] + pending['items'],
+                "carbon_saved_g": committed['carbon_saved_g'] + pending['carbon'],
+            }
+            upload_ref = disposal['event_id']
+        else:
+            # ── Step 6: Database Transaction ───────────────────────
+            # Log insert, user/bin increments, full-status flip and the
+            # read-back of new totals all commit together on one connection
+            try:
+                with timer.stage("record"):
+                    updated_user = record_disposal(db, user['user_id'], bin_id, waste_type,
+                                                   detected_count, points_earned,
+                                                   carbon_saved, frame_url)
+            except Exception as db_error:
+                logger.error("Database error", extra=fields(error=db_error))
+                return {
+                    "status": "error",
+                    "message": "Database error occurred"
+                }, 500
+            response_cache.invalidate("users", "bins", "logs")
+            upload_ref = updated_user['log_id']
+
+        # ── Step 7: Replicate Image (optional) ────────────────────
+        # A background worker uploads the frame and records image_replica_url
+        if IMAGE_REPLICATION and not image_uploader.submit(file_bytes, upload_ref):
+            logger.warning("Upload queue full, image not replicated", extra=fields(ref=upload_ref))
 
-        # ── Step 7: Get Updated User Stats ─────────────────────────
-        updated_user = get_user_stats(db, user['user_id'])
-        
         # ── Step 8: Prepare Response ───────────────────────────────
         voice_message = (
             f"Thank you {user['full_name'].split()[0]}, "
@@ -246,21 +756,89 @@ def detect_objects():
                 "total_recycled": updated_user['total_recycled_items'],
                 "total_carbon_saved_g": updated_user['carbon_saved_g']
             },
-            "image_url": hosted_url,
+            "image_url": frame_url,
             "voice_command": voice_message,
             "timestamp": now_bd.isoformat(),
             "timestamp_human": now_bd.strftime("%Y-%m-%d %H:%M:%S %Z")
         }
 
-        return jsonify(response_data)
+        if not write_behind_active:
+            publish_disposal(disposal, updated_user)
+            publish_rank(user['user_id'])
+        return response_data, 200
+
+    except InferenceOverloadedError:
+        logger.warning("Inference queue full")
+        return {
+            "status": "error",
+            "message": "Server busy, please try again.",
+            "voice_command": "System busy. Please try again."
+        }, 503
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({
+        logger.exception("Disposal processing failed")
+        return {
             "status": "error",
             "message": str(e)
-        }), 500
+        }, 500
+
+    finally:
+        if claim is not None:
+            release_disposal(dedup_key, claim, response_data)
+
+
+@app.route('/api/detect/compact', methods=['POST'])
+def detect_objects_compact():
+    """
+    Hardware endpoint for constrained bins: same processing as /api/detect.
+    Input: raw JPEG body, X-RFID-UID and X-Bin-Id headers
+    Output: fixed-format binary reply (see compact_protocol)
+    """
+    rfid_uid = request.headers.get('X-RFID-UID', '').strip()
+    bin_id = request.headers.get('X-Bin-Id', '').strip()
+    file_bytes = request.get_data(cache=False)
+
+    if not file_bytes or not rfid_uid or not bin_id.isdigit():
+        response_data, status_code = {"status": "error"}, 400
+    else:
+        response_data, status_code = process_disposal(file_bytes, rfid_uid, int(bin_id))
+
+    return Response(encode_reply(response_data, status_code), status=status_code,
+                    mimetype=COMPACT_MIMETYPE)
+
+
+@app.route('/api/telemetry', methods=['POST'])
+def ingest_telemetry():
+    """
+    Hardware endpoint: Accept heartbeats from bins or a gateway.
+    Input: JSON heartbeat or {"records": [heartbeat, ...]}, each with
+    bin_id and any of battery, fill_percent, uptime_s
+    """
+    data = request.get_json(silent=True)
+    records = data.get('records', [data]) if isinstance(data, dict) else None
+    if not isinstance(records, list) or not records:
+        return jsonify({"error": "No telemetry records provided"}), 400
+    if len(records) > TELEMETRY_MAX_RECORDS:
+        return jsonify({"error": f"At most {TELEMETRY_MAX_RECORDS} records per request"}), 413
+
+    readings, rejected = [], []
+    for index, record in enumerate(records):
+        try:
+            readings.append(parse_heartbeat(record))
+        except ValueError as e:
+            rejected.append({"index": index, "error": str(e)})
+    if rejected:
+        logger.warning("Rejected telemetry records", extra=fields(
+            rejected=len(rejected), first_error=rejected[0]["error"]))
+
+    # Written by the next flush, not by this request
+    accepted, dropped = bin_telemetry.submit(readings)
+    return jsonify({
+        "status": "success",
+        "accepted": accepted,
+        "dropped": dropped,
+        "rejected": rejected
+    }), 202
 
 
 # ═════════════════════════════════════════════════════════════════
@@ -299,7 +877,7 @@ def login():
         })
     
     except Exception as e:
-        print(f"Login error: {e}")
+        logger.error("Login error", extra=fields(error=e))
         return jsonify({"error": "Login failed"}), 500
 
 
@@ -331,6 +909,7 @@ def register():
         
         # Create user
         user_id = create_user(db, full_name, username, password, rfid_uid)
+        response_cache.invalidate("users")
         
         return jsonify({
             "status": "success",
@@ -339,11 +918,12 @@ def register():
         }), 201
     
     except Exception as e:
-        print(f"Registration error: {e}")
+        logger.error("Registration error", extra=fields(error=e))
         return jsonify({"error": "Registration failed"}), 500
 
 
 @app.route('/api/user/<int:user_id>/stats', methods=['GET'])
+@cached_response("users")
 def user_stats(user_id):
     """Get user statistics."""
     try:
@@ -366,33 +946,60 @@ def user_stats(user_id):
         })
     
     except Exception as e:
-        print(f"Stats error: {e}")
+        logger.error("Stats error", extra=fields(error=e))
         return jsonify({"error": "Failed to fetch stats"}), 500
 
 
+def read_page_args(default_limit):
+    """
+    Parse ?limit= and the optional ?before=<timestamp,log_id> keyset cursor.
+    
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    limit = request.args.get('limit', default_limit, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    before = request.args.get('before')
+    return limit, (parse_log_cursor(before) if before else None)
+
+
+def next_page_cursor(rows, limit):
+    """Cursor for the following page, or None when this page is the last."""
+    if len(rows) < limit:
+        return None
+    return format_log_cursor(rows[-1])
+
+
 @app.route('/api/user/<int:user_id>/history', methods=['GET'])
+@cached_response("logs")
 def user_history(user_id):
-    """Get user's recent waste disposal history."""
+    """Get user's recent waste disposal history (keyset paginated)."""
     try:
-        limit = request.args.get('limit', 10, type=int)
-        history = get_user_history(db, user_id, limit)
+        limit, before = read_page_args(10)
+    except ValueError:
+        return jsonify({"error": "Invalid before cursor"}), 400
+    
+    try:
+        history = get_user_history(db, user_id, limit, before)
         
         return jsonify({
             "status": "success",
-            "history": history
+            "history": history,
+            "next_before": next_page_cursor(history, limit)
         })
     
     except Exception as e:
-        print(f"History error: {e}")
+        logger.error("History error", extra=fields(error=e))
         return jsonify({"error": "Failed to fetch history"}), 500
 
 
 @app.route('/api/leaderboard', methods=['GET'])
+@cached_response("users")
 def leaderboard():
     """Get top users ranked by points."""
     try:
         limit = request.args.get('limit', 10, type=int)
-        leaders = get_leaderboard(db, limit)
+        leaders = get_leaderboard(db, max(1, min(limit, MAX_PAGE_SIZE)))
         
         return jsonify({
             "status": "success",
@@ -400,11 +1007,48 @@ def leaderboard():
         })
     
     except Exception as e:
-        print(f"Leaderboard error: {e}")
+        logger.error("Leaderboard error", extra=fields(error=e))
         return jsonify({"error": "Failed to fetch leaderboard"}), 500
 
 
+@app.route('/api/user/<int:user_id>/rank', methods=['GET'])
+@cached_response("users")
+def user_rank(user_id):
+    """Get a user's leaderboard position."""
+    try:
+        rank = get_user_rank(db, user_id)
+        
+        if not rank:
+            return jsonify({"error": "User not ranked"}), 404
+        
+        return jsonify({
+            "status": "success",
+            "rank": rank
+        })
+    
+    except Exception as e:
+        logger.error("Rank error", extra=fields(error=e))
+        return jsonify({"error": "Failed to fetch rank"}), 500
+
+
+@app.route('/api/events', methods=['GET'])
+def live_events():
+    """
+    Server-Sent Events stream of live changes for dashboards.
+    Events: disposal, bin, leaderboard
+    """
+    return Response(
+        events.stream(),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # disable nginx response buffering
+        }
+    )
+
+
 @app.route('/api/admin/bins', methods=['GET'])
+@cached_response("bins")
 def admin_bins():
     """Get all smart bins status (Admin)."""
     try:
@@ -416,37 +1060,225 @@ def admin_bins():
         })
     
     except Exception as e:
-        print(f"Bins fetch error: {e}")
+        logger.error("Bins fetch error", extra=fields(error=e))
         return jsonify({"error": "Failed to fetch bins"}), 500
 
 
 @app.route('/api/admin/recent-logs', methods=['GET'])
+@cached_response("logs")
 def admin_recent_logs():
-    """Get recent waste logs from all users (Admin)."""
+    """Get recent waste logs from all users (Admin, keyset paginated)."""
     try:
-        limit = request.args.get('limit', 20, type=int)
-        
-        query = """
-            SELECT wl.log_id, wl.user_id, wl.waste_type, wl.waste_count, 
-                   wl.points_earned, wl.image_url, wl.detected_at as timestamp,
-                   u.full_name as user_name
-            FROM waste_logs wl
-            JOIN users u ON wl.user_id = u.user_id
-            ORDER BY wl.detected_at DESC
-            LIMIT %s
-        """
-        logs = db.execute_query(query, (limit,), fetch_all=True)
+        limit, before = read_page_args(20)
+    except ValueError:
+        return jsonify({"error": "Invalid before cursor"}), 400
+    
+    try:
+        logs = get_recent_logs(db, limit, before)
         
         return jsonify({
             "status": "success",
-            "logs": logs
+            "logs": logs,
+            "next_before": next_page_cursor(logs, limit)
         })
     
     except Exception as e:
-        print(f"Recent logs error: {e}")
+        logger.error("Recent logs error", extra=fields(error=e))
         return jsonify({"error": "Failed to fetch recent logs"}), 500
 
 
+@app.route('/api/admin/query-plans', methods=['GET'])
+def admin_query_plans():
+    """EXPLAIN the waste_logs history queries and flag non-index-only plans (Admin)."""
+    try:
+        user_id = request.args.get('user_id', 1, type=int)
+        plans = explain_log_queries(db, user_id)
+        
+        return jsonify({
+            "status": "success",
+            "all_ok": all(plan["ok"] for plan in plans.values()),
+            "plans": plans
+        })
+    
+    except Exception as e:
+        logger.error("Query plan error", extra=fields(error=e))
+        return jsonify({"error": "Failed to explain queries"}), 500
+
+
+# ── Analytics (served from pre-aggregated stats buckets) ─────────
+
+@app.route('/api/admin/analytics/trend', methods=['GET'])
+def admin_analytics_trend():
+    """Disposal/item/point/carbon totals per hour or day (Admin)."""
+    granularity = request.args.get('granularity', 'daily')
+    if granularity not in STATS_TABLES:
+        return jsonify({"error": "granularity must be hourly or daily"}), 400
+    
+    days = request.args.get('days', 2 if granularity == 'hourly' else 30, type=int)
+    
+    try:
+        series = get_stats_trend(
+            db, granularity, datetime.now() - timedelta(days=days),
+            bin_id=request.args.get('bin_id', type=int),
+            waste_type=request.args.get('waste_type'),
+            department=request.args.get('department'),
+        )
+        
+        return jsonify({
+            "status": "success",
+            "granularity": granularity,
+            "days": days,
+            "series": series
+        })
+    
+    except Exception as e:
+        logger.error("Analytics trend error", extra=fields(error=e))
+        return jsonify({"error": "Failed to fetch trend"}), 500
+
+
+@app.route('/api/admin/analytics/breakdown', methods=['GET'])
+def admin_analytics_breakdown():
+    """Totals grouped by bin, waste_type or department (Admin)."""
+    dimension = request.args.get('by', 'bin')
+    if dimension not in STATS_DIMENSIONS:
+        return jsonify({"error": "by must be bin, waste_type or department"}), 400
+    
+    days = request.args.get('days', 30, type=int)
+    
+    try:
+        rows = get_stats_breakdown(db, dimension, datetime.now() - timedelta(days=days))
+        
+        return jsonify({
+            "status": "success",
+            "by": dimension,
+            "days": days,
+            "breakdown": rows
+        })
+    
+    except Exception as e:
+        logger.error("Analytics breakdown error", extra=fields(error=e))
+        return jsonify({"error": "Failed to fetch breakdown"}), 500
+
+
+@app.route('/api/admin/analytics/carbon', methods=['GET'])
+def admin_analytics_carbon():
+    """Overall carbon savings, optionally over the last N days (Admin)."""
+    days = request.args.get('days', type=int)
+    
+    try:
+        since = datetime.now() - timedelta(days=days) if days else None
+        totals = get_carbon_totals(db, since)
+        
+        return jsonify({
+            "status": "success",
+            "days": days,
+            "totals": totals
+        })
+    
+    except Exception as e:
+        logger.error("Analytics carbon error", extra=fields(error=e))
+        return jsonify({"error": "Failed to fetch carbon totals"}), 500
+
+
+@app.route('/api/admin/collection-plan', methods=['GET'])
+def admin_collection_plan():
+    """Bins ranked by forecast time to full, with fill rates (Admin)."""
+    horizon = request.args.get('horizon', COLLECTION_HORIZON_HOURS, type=float)
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    
+    try:
+        plan = fill_forecaster.plan(horizon, limit)
+        
+        return jsonify(dict(plan, status="success", forecast=fill_forecaster.stats()))
+    
+    except Exception as e:
+        logger.error("Collection plan error", extra=fields(error=e))
+        return jsonify({"error": "Failed to build collection plan"}), 500
+
+
+@app.route('/api/admin/analytics/backfill', methods=['POST'])
+def admin_analytics_backfill():
+    """Rebuild the stats buckets from waste_logs (Admin)."""
+    try:
+        # Archived months are no longer in waste_logs: keep their buckets
+        buckets = backfill_stats(db, CARBON_PER_ITEM_G, since=log_archive.hot_since())
+        
+        return jsonify({
+            "status": "success",
+            "buckets": buckets
+        })
+    
+    except Exception as e:
+        logger.error("Analytics backfill error", extra=fields(error=e))
+        return jsonify({"error": "Failed to backfill stats"}), 500
+
+
+@app.route('/api/admin/export/logs', methods=['GET'])
+def admin_export_logs():
+    """Stream waste logs as NDJSON or CSV, optionally filtered (Admin)."""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    
+    try:
+        since = datetime.fromisoformat(request.args.get('since', '1970-01-01'))
+        until = datetime.fromisoformat(request.args.get('until', '9999-01-01'))
+    except ValueError:
+        return jsonify({"error": "since/until must be ISO dates"}), 400
+    bin_id = request.args.get('bin_id', type=int)
+    department = request.args.get('department')
+    
+    if not export_slots.acquire(blocking=False):
+        return jsonify({"error": "Too many exports running, try again later"}), 503
+    
+    encode, mimetype, extension = EXPORT_FORMATS[export_format]
+    batches = export_waste_logs(db, since, until, bin_id, department, EXPORT_BATCH_SIZE)
+    chunks = with_error_marker(encode(batches), export_format)
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="waste_logs.{extension}"'
+    response.headers['Cache-Control'] = 'no-store'
+    # Released when the response is closed, even if the client leaves early
+    response.call_on_close(export_slots.release)
+    return response
+
+
+@app.route('/api/admin/archive', methods=['GET'])
+def admin_archive():
+    """List archived months of waste logs and their size (Admin)."""
+    return jsonify({
+        "status": "success",
+        "hot_months": LOG_HOT_MONTHS,
+        "archive": log_archive.stats()
+    })
+
+
+@app.route('/api/admin/archive/run', methods=['POST'])
+def admin_archive_run():
+    """Move closed months of waste logs out of MySQL into the archive (Admin)."""
+    try:
+        cutoff = months_back(month_start(datetime.now()), LOG_HOT_MONTHS - 1)
+        # Never archive a month a journaled disposal has yet to be written to
+        oldest_pending = disposal_journal.oldest_pending_at() if write_behind_active else None
+        if oldest_pending is not None:
+            cutoff = min(cutoff, month_start(datetime.fromtimestamp(oldest_pending)))
+        archived = archive_waste_logs(db, cutoff)
+        if archived:
+            response_cache.invalidate("logs")
+        
+        return jsonify({
+            "status": "success",
+            "archived_before": cutoff.isoformat(),
+            "archived": archived,
+            "archive": log_archive.stats()
+        })
+    
+    except Exception as e:
+        logger.error("Log archive error", extra=fields(error=e))
+        return jsonify({"error": "Failed to archive logs"}), 500
+
+
 @app.route('/api/admin/reset-bin', methods=['POST'])
 def admin_reset_bin():
     """Reset bin fill level after cleaning (Admin)."""
@@ -470,6 +1302,14 @@ def admin_reset_bin():
         
         # Reset bin
         reset_bin_fill_level(db, bin_id)
+        response_cache.invalidate("bins")
+        fill_forecaster.invalidate()
+        events.publish("bin", {
+            "bin_id": bin_id,
+            "current_fill_level": 0,
+            "max_capacity": bin_info['max_capacity'],
+            "status": "active",
+        })
         
         return jsonify({
             "status": "success",
@@ -477,10 +1317,122 @@ def admin_reset_bin():
         })
     
     except Exception as e:
-        print(f"Reset bin error: {e}")
+        logger.error("Reset bin error", extra=fields(error=e))
         return jsonify({"error": "Failed to reset bin"}), 500
 
 
+@app.route('/api/admin/db-pool', methods=['GET'])
+def admin_db_pool():
+    """Get database connection pool and record cache metrics (Admin)."""
+    return jsonify({
+        "status": "success",
+        "pool": db.pool_stats(),
+        "caches": dict(db.cache_stats(), responses=response_cache.stats())
+    })
+
+
+@app.route('/api/admin/leaderboard/verify', methods=['GET'])
+def admin_verify_leaderboard():
+    """Check the in-process leaderboard against the database (Admin)."""
+    try:
+        repair = request.args.get('repair', 'false').lower() in ('1', 'true', 'yes')
+        report = verify_leaderboard(db, repair=repair)
+        if repair:
+            response_cache.invalidate("users")
+        
+        return jsonify({
+            "status": "success",
+            "leaderboard": report,
+            "index": db.leaderboard.stats()
+        })
+    
+    except Exception as e:
+        logger.error("Leaderboard verify error", extra=fields(error=e))
+        return jsonify({"error": "Failed to verify leaderboard"}), 500
+
+
+@app.route('/api/admin/inference', methods=['GET'])
+def admin_inference():
+    """Get inference queue depth and timing metrics (Admin)."""
+    return jsonify({
+        "status": "success",
+        "inference": inference_engine.stats(),
+        "detection_cache": detection_cache.stats(),
+        "disposal_dedup": disposal_cache.stats(),
+        "frame_gate": dict(frame_gate.stats(), enabled=FRAME_GATE_ENABLED)
+    })
+
+
+@app.route('/api/admin/inference/warm-up', methods=['POST'])
+def admin_inference_warm_up():
+    """Load the detection model now and run a blank frame (Admin)."""
+    try:
+        started = time.perf_counter()
+        inference_engine.warm_up()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        return jsonify({
+            "status": "success",
+            "warm_up_ms": round(elapsed_ms, 1),
+            "inference": inference_engine.stats()
+        })
+    
+    except Exception as e:
+        logger.error("Inference warm-up error", extra=fields(error=e))
+        return jsonify({"error": "Failed to warm up inference"}), 500
+
+
+@app.route('/api/images/<digest>', methods=['GET'])
+def stored_image(digest):
+    """
+    Serve a stored frame, or its thumbnail with ?size=thumb.
+    Immutable and cacheable; supports conditional and Range requests.
+    """
+    if not is_digest(digest):
+        return jsonify({"error": "Image not found"}), 404
+    thumbnail = request.args.get('size') == 'thumb'
+    path = image_store.thumbnail_path(digest) if thumbnail else image_store.full_path(digest)
+    if path is None:
+        return jsonify({"error": "Image not found"}), 404
+
+    response = send_file(path, mimetype="image/jpeg", conditional=True,
+                         etag=f"{digest}-thumb" if thumbnail else digest,
+                         max_age=IMAGE_CACHE_MAX_AGE)
+    response.headers["Cache-Control"] = f"public, max-age={IMAGE_CACHE_MAX_AGE}, immutable"
+    return response
+
+
+@app.route('/api/admin/uploads', methods=['GET'])
+def admin_uploads():
+    """Get image store and replication queue metrics (Admin)."""
+    return jsonify({
+        "status": "success",
+        "replication": IMAGE_REPLICATION,
+        "uploads": image_uploader.stats(),
+        "store": image_store.stats()
+    })
+
+
+@app.route('/api/admin/disposal-journal', methods=['GET'])
+def admin_disposal_journal():
+    """Get write-behind journal depth and flush metrics (Admin)."""
+    return jsonify({
+        "status": "success",
+        "enabled": DISPOSAL_WRITE_BEHIND,
+        "active": write_behind_active,
+        "journal": disposal_journal.stats() if write_behind_active else None
+    })
+
+
+@app.route('/api/admin/telemetry', methods=['GET'])
+def admin_telemetry():
+    """Get heartbeat ingest and batched write metrics (Admin)."""
+    return jsonify({
+        "status": "success",
+        "telemetry": bin_telemetry.stats()
+    })
+
+
 # ═════════════════════════════════════════════════════════════════
 # LEGACY ENDPOINT (Backward Compatibility)
 # ═════════════════════════════════════════════════════════════════
@@ -498,8 +1450,6 @@ def detect_objects_legacy():
     file = request.files['image']
     rfid_uid = request.form.get('rfid_uid', '').strip()
 
-    print(f"rfid_uid: {rfid_uid}")
-
     if not file:
         return jsonify({"error": "Empty image file"}), 400
 
@@ -507,36 +1457,15 @@ def detect_objects_legacy():
         file_bytes = file.read()
 
         # ── Image processing ───────────────────────────────────────
-        nparr = np.frombuffer(file_bytes, np.uint8)
-        image_bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        detections_list = detect_waste(file_bytes)
 
-        if image_bgr is None:
+        if detections_list is None:
             return jsonify({"error": "Invalid image format"}), 400
 
-        image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
-
-        # Run detection
-        detection_result = detector.detect(mp_image)
-
-        # Prepare detections list
-        detections_list = []
-        for detection in detection_result.detections:
-            category = detection.categories[0]
-            bbox = detection.bounding_box
-            detections_list.append({
-                "label": category.category_name,
-                "confidence": round(float(category.score), 3),
-                "box": [bbox.origin_x, bbox.origin_y, bbox.width, bbox.height]
-            })
-
-        # ── Upload only if objects were detected ──────────────────
-        hosted_url = None
+        # ── Store only if objects were detected ───────────────────
+        frame_url = None
         if len(detections_list) > 0:
-            print(f"[{datetime.now(BD_TZ).strftime('%Y-%m-%d %H:%M:%S %Z')}] "
-                  f"Object detected! Uploading... ({len(detections_list)} found)")
-            hosted_url = upload_to_freeimage(file_bytes)
-            print(f"Image hosted at: {hosted_url}")
+            frame_url = image_store.put(image_digest(file_bytes), file_bytes)
 
         # ── Bangladesh time for response ───────────────────────────
         now_bd = datetime.now(BD_TZ)
@@ -547,16 +1476,21 @@ def detect_objects_legacy():
             "detections": detections_list,
             "count": len(detections_list),
             "rfid_uid": rfid_uid,
-            "image_url": hosted_url,
+            "image_url": frame_url,
             "timestamp": now_bd.isoformat(),
             "timestamp_human": now_bd.strftime("%Y-%m-%d %H:%M:%S %Z")
         }
 
         return jsonify(response_data)
 
+    except InferenceOverloadedError:
+        return jsonify({
+            "status": "error",
+            "message": "Server busy, please try again."
+        }), 503
+
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Legacy detection failed")
         return jsonify({
             "status": "error",
             "message": str(e)
@@ -564,11 +1498,10 @@ def detect_objects_legacy():
 
 
 if __name__ == '__main__':
-    print("=" * 60)
-    print("BARAQA_BIN Smart Waste Management API Server")
-    print("=" * 60)
-    print(f"Database: {DB_CONFIG['database']}@{DB_CONFIG['host']}")
-    print(f"Timezone: {BD_TZ}")
-    print(f"Model: {MODEL_PATH}")
-    print("=" * 60)
+    logger.info("BARAQA_BIN Smart Waste Management API Server", extra=fields(
+        database=f"{DB_CONFIG['database']}@{DB_CONFIG['host']}",
+        db_pool=f"{DB_POOL_MIN_SIZE}-{DB_POOL_MAX_SIZE}",
+        timezone=BD_TZ,
+        model=MODEL_PATH,
+    ))
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+ASGI Serving Mode for BARAQA_BIN Smart Waste Management System
+
+Serves the same Flask app from an asyncio server:
+- /api/events is streamed natively on the event loop, so each open
+  dashboard costs a queue instead of a blocked thread
+- detection endpoints run in their own thread pool, so dashboard reads
+  never queue behind frames waiting on the inference engine
+- every other endpoint (all DB reads/writes) runs in a second thread pool
+
+Run with:
+    BARAQA_WEB_WORKERS=2 uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 2
+
+(BARAQA_WEB_WORKERS divides the inference cores between the worker processes)
+"""
+import asyncio
+from a2wsgi import WSGIMiddleware
+
+from app import app, events
+
+
+# --- THREAD POOLS ---
+DETECT_THREADS = 16      # requests waiting on inference / the disposal transaction
+DASHBOARD_THREADS = 32   # DB-backed reads and admin writes
+
+DETECT_PATHS = ('/api/detect', '/detect')
+
+SSE_HEADERS = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),
+    (b"access-control-allow-origin", b"*"),
+]
+
+
+class Application:
+    """Path-based dispatcher in front of the Flask WSGI app."""
+
+    def __init__(self, wsgi_app):
+        self.detect = WSGIMiddleware(wsgi_app, workers=DETECT_THREADS)
+        self.dashboard = WSGIMiddleware(wsgi_app, workers=DASHBOARD_THREADS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.dashboard(scope, receive, send)
+
+        path = scope.get("path", "")
+        if scope["type"] == "http" and path == "/api/events" and scope["method"] == "GET":
+            return await self.stream_events(receive, send)
+        if path.startswith(DETECT_PATHS):
+            return await self.detect(scope, receive, send)
+        return await self.dashboard(scope, receive, send)
+
+    async def stream_events(self, receive, send):
+        """Server-Sent Events without holding a worker thread per client."""
+        await send({"type": "http.response.start", "status": 200, "headers": SSE_HEADERS})
+
+        async def wait_for_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        disconnected = asyncio.ensure_future(wait_for_disconnect())
+        stream = events.astream()
+        try:
+            async for chunk in stream:
+                # Checked at least once per keepalive interval
+                if disconnected.done():
+                    break
+                await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+        finally:
+            disconnected.cancel()
+            await stream.aclose()
+
+
+application = Application(app)
@@ -0,0 +1,80 @@
+"""
+Decode Benchmark for BARAQA_BIN Smart Waste Management System
+Compares the original full-resolution decode + BGR->RGB copy against
+image_preprocess.decode_for_inference on ESP32-CAM sized frames
+
+Usage:
+    python benchmarks/bench_decode.py                 # synthetic VGA/SVGA/XGA/UXGA frames
+    python benchmarks/bench_decode.py a.jpg b.jpg     # real captures
+"""
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_preprocess import decode_for_inference  # noqa: E402
+
+
+# Frame sizes the OV2640 on the ESP32-CAM can produce
+FRAME_SIZES = {
+    "VGA": (640, 480),
+    "SVGA": (800, 600),
+    "XGA": (1024, 768),
+    "UXGA": (1600, 1200),
+}
+
+
+def synthetic_jpeg(width: int, height: int, quality: int = 80) -> bytes:
+    """Noise plus shapes, so the encoder does real work like on a camera frame."""
+    rng = np.random.default_rng(42)
+    frame = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+    cv2.rectangle(frame, (width // 4, height // 4), (width // 2, height // 2), (30, 160, 220), -1)
+    cv2.circle(frame, (3 * width // 4, height // 2), height // 6, (200, 200, 40), -1)
+    ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes()
+
+
+def baseline_decode(file_bytes: bytes) -> np.ndarray:
+    nparr = np.frombuffer(file_bytes, np.uint8)
+    image_bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    return cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+
+
+def fast_decode(file_bytes: bytes) -> np.ndarray:
+    return decode_for_inference(file_bytes)[0]
+
+
+def time_decoder(decoder, file_bytes: bytes, iterations: int) -> tuple:
+    decoder(file_bytes)  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        image = decoder(file_bytes)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / iterations
+    return elapsed_ms, image
+
+
+def main():
+    iterations = 200
+    if len(sys.argv) > 1:
+        samples = {os.path.basename(path): open(path, 'rb').read() for path in sys.argv[1:]}
+    else:
+        samples = {name: synthetic_jpeg(w, h) for name, (w, h) in FRAME_SIZES.items()}
+
+    print(f"{'frame':<14}{'baseline ms':>12}{'fast ms':>10}{'speedup':>9}"
+          f"{'baseline KB':>13}{'fast KB':>9}{'decoded':>12}")
+    for name, file_bytes in samples.items():
+        base_ms, base_img = time_decoder(baseline_decode, file_bytes, iterations)
+        fast_ms, fast_img = time_decoder(fast_decode, file_bytes, iterations)
+        # Baseline holds the BGR decode and its RGB copy at the same time
+        base_kb = 2 * base_img.nbytes / 1024
+        fast_kb = fast_img.nbytes / 1024
+        print(f"{name:<14}{base_ms:>12.2f}{fast_ms:>10.2f}{base_ms / fast_ms:>8.1f}x"
+              f"{base_kb:>13.0f}{fast_kb:>9.0f}"
+              f"{f'{fast_img.shape[1]}x{fast_img.shape[0]}':>12}")
+
+
+if __name__ == '__main__':
+    main()
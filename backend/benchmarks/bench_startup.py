@@ -0,0 +1,64 @@
+"""
+Startup Benchmark for BARAQA_BIN Smart Waste Management System
+Measures import time and peak RSS of a fresh interpreter importing app.py,
+with and without loading the detection model
+
+Usage:
+    python benchmarks/bench_startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE = """
+import json, resource, time
+started = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "child_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+}}))
+"""
+
+SCENARIOS = {
+    # What every worker paid before: heavy imports plus a detector at import time
+    "eager (model at import)": (
+        "import cv2, numpy, mediapipe, requests\n"
+        "import app\n"
+        "from inference_engine import CompactDetector\n"
+        "CompactDetector(app.MODEL_PATH)"
+    ),
+    "lazy (dashboard worker)": "import app",
+    "lazy + warm_up": (
+        "import app\n"
+        "app.inference_engine.warm_up()\n"
+        "app.inference_engine.stop()"
+    ),
+}
+
+
+def measure(code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE.format(code=code)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    # app.py prints pool warnings; the measurement is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'scenario':<26}{'startup s':>11}{'web RSS MB':>12}{'worker RSS MB':>15}")
+    for name, code in SCENARIOS.items():
+        sample = measure(code)
+        child_mb = sample["child_rss_kb"] / 1024
+        print(f"{name:<26}{sample['seconds']:>11.2f}{sample['rss_kb'] / 1024:>12.0f}"
+              f"{(f'{child_mb:.0f}' if child_mb else '-'):>15}")
+
+
+if __name__ == '__main__':
+    main()
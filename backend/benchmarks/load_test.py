@@ -0,0 +1,206 @@
+"""
+Load Test for BARAQA_BIN Smart Waste Management System
+Drives a mix of simulated bins (POST /api/detect) and dashboard clients
+(GET leaderboard/bins/history/stats) against a running server and reports
+throughput and p50/p95/p99 latency per endpoint.
+
+For a seeded database and a stubbed image host, use run_suite.py instead.
+Start the server with BARAQA_FRAME_GATE=0: the bins resend the same few
+images, which the frame gate would answer without running the detector.
+Compare the sync and ASGI servers on the same machine:
+    BARAQA_FRAME_GATE=0 python app.py                 # terminal 1
+    python benchmarks/load_test.py --image sample.jpg
+
+    BARAQA_FRAME_GATE=0 BARAQA_WEB_WORKERS=2 uvicorn asgi:application --port 5000 --workers 2
+    python benchmarks/load_test.py --image sample.jpg
+"""
+import argparse
+import http.client
+import random
+import statistics
+import threading
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlparse
+
+
+DASHBOARD_PATHS = [
+    "/api/leaderboard?limit=10",
+    "/api/admin/bins",
+    "/api/admin/recent-logs?limit=20",
+    "/api/user/{user_id}/stats",
+    "/api/user/{user_id}/history?limit=10",
+]
+
+
+def multipart_body(image_bytes: bytes, fields: dict) -> tuple:
+    """Encode a multipart/form-data body the way the ESP32 firmware does."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f"--{boundary}\r\nContent-Disposition: form-data; "
+                     f"name=\"{name}\"\r\n\r\n{value}\r\n".encode())
+    parts.append(f"--{boundary}\r\nContent-Disposition: form-data; name=\"image\"; "
+                 f"filename=\"capture.jpg\"\r\nContent-Type: image/jpeg\r\n\r\n".encode())
+    parts.append(image_bytes)
+    parts.append(f"\r\n--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class Recorder:
+    """Thread-safe latency and status collector."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies[endpoint].append(seconds * 1000)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, duration: float) -> dict:
+        """Per-endpoint request count, throughput, percentiles and errors."""
+        result = {}
+        for endpoint in sorted(self.latencies):
+            samples = sorted(self.latencies[endpoint])
+            result[endpoint] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / duration, 1),
+                "p50_ms": round(percentile(samples, 50), 1),
+                "p95_ms": round(percentile(samples, 95), 1),
+                "p99_ms": round(percentile(samples, 99), 1),
+                "errors": self.errors[endpoint],
+            }
+        return result
+
+    def report(self, duration: float) -> None:
+        print(f"{'endpoint':<34}{'reqs':>7}{'req/s':>9}{'p50 ms':>9}"
+              f"{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        total = 0
+        for endpoint, row in self.summary(duration).items():
+            total += row["requests"]
+            print(f"{endpoint:<34}{row['requests']:>7}{row['rps']:>9.1f}{row['p50_ms']:>9.1f}"
+                  f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['errors']:>8}")
+        print(f"{'total':<34}{total:>7}{total / duration:>9.1f}")
+
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[int(pct) - 1]
+
+
+def client_loop(kind: str, base, args, images, recorder: Recorder, stop: threading.Event,
+                seed=None):
+    connection = None
+    rng = random.Random(seed)
+    while not stop.is_set():
+        if connection is None:
+            connection_cls = (http.client.HTTPSConnection if base.scheme == "https"
+                              else http.client.HTTPConnection)
+            connection = connection_cls(base.hostname, base.port, timeout=30)
+
+        if kind == "bin":
+            endpoint = "POST /api/detect"
+            frame = rng.choice(images)
+            if not args.repeat_frames:
+                # Bytes after the JPEG end marker are ignored by decoders but
+                # make every frame unique, so the detection cache cannot help.
+                # The pixels are unchanged: only a server without the frame
+                # gate runs every frame through the detector.
+                frame = frame + uuid.uuid4().bytes
+            rfid_uid, bin_id = rng.choice(args.rfids), rng.randint(1, args.bins)
+            if args.compact:
+                endpoint = "POST /api/detect/compact"
+                method, path, body = "POST", "/api/detect/compact", frame
+                headers = {"Content-Type": "image/jpeg", "X-RFID-UID": rfid_uid, "X-Bin-Id": str(bin_id)}
+            else:
+                body, content_type = multipart_body(frame, {"rfid_uid": rfid_uid, "bin_id": bin_id})
+                method, path, headers = "POST", "/api/detect", {"Content-Type": content_type}
+        else:
+            template = rng.choice(DASHBOARD_PATHS)
+            path = template.format(user_id=rng.randint(1, args.users))
+            endpoint = "GET " + template.split("?")[0]
+            method, body, headers = "GET", None, {}
+
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 500
+        except (OSError, http.client.HTTPException):
+            ok = False
+            connection.close()
+            connection = None
+        recorder.record(endpoint, time.perf_counter() - start, ok)
+
+        if kind == "bin" and args.bin_think > 0:
+            stop.wait(rng.uniform(0, 2 * args.bin_think))
+        elif kind == "dashboard" and args.dashboard_think > 0:
+            stop.wait(rng.uniform(0, 2 * args.dashboard_think))
+
+
+def run(args) -> Recorder:
+    base = urlparse(args.url)
+    images = []
+    for path in args.image or []:
+        with open(path, "rb") as handle:
+            images.append(handle.read())
+    bins = args.bin_clients if images else 0
+    if not images:
+        print("No --image given: running dashboard clients only")
+
+    recorder = Recorder()
+    stop = threading.Event()
+    # With --seed every client replays the same sequence of bins, users and paths
+    seeds = iter(range(args.seed, args.seed + bins + args.dashboard_clients)
+                 if args.seed is not None else [None] * (bins + args.dashboard_clients))
+    threads = [threading.Thread(target=client_loop, daemon=True,
+                                args=("bin", base, args, images, recorder, stop, next(seeds)))
+               for _ in range(bins)]
+    threads += [threading.Thread(target=client_loop, daemon=True,
+                                 args=("dashboard", base, args, images, recorder, stop, next(seeds)))
+                for _ in range(args.dashboard_clients)]
+
+    print(f"{bins} bins, {args.dashboard_clients} dashboards, {args.duration}s against {args.url}")
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(35)
+    return recorder
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--image", nargs="+", help="JPEG(s) sent by simulated bins")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--bin-clients", type=int, default=20)
+    parser.add_argument("--dashboard-clients", type=int, default=200)
+    parser.add_argument("--bin-think", type=float, default=1.0,
+                        help="mean seconds between a bin's disposals")
+    parser.add_argument("--dashboard-think", type=float, default=0.5,
+                        help="mean seconds between a dashboard's requests")
+    parser.add_argument("--repeat-frames", action="store_true",
+                        help="send the image unchanged (exercises the detection cache)")
+    parser.add_argument("--compact", action="store_true",
+                        help="bins use the binary /api/detect/compact protocol")
+    parser.add_argument("--bins", type=int, default=8, help="bin ids 1..N exist")
+    parser.add_argument("--users", type=int, default=16, help="user ids 1..N exist")
+    parser.add_argument("--seed", type=int, help="seed the clients' random choices")
+    parser.add_argument("--rfids", nargs="+", default=[f"AA:BB:CC:{i:02d}" for i in range(1, 16)])
+    return parser
+
+
+if __name__ == '__main__':
+    cli_args = build_parser().parse_args()
+    run(cli_args).report(cli_args.duration)
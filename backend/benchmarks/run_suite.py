@@ -0,0 +1,255 @@
+"""
+Benchmark Suite for BARAQA_BIN Smart Waste Management System
+Seeds a scratch database, starts a stub image host and a server against
+them, then runs the load-test scenarios and reports throughput and
+p50/p95/p99 per endpoint, plus where /api/detect spent its time.
+
+Run it before and after a change and compare the two JSON files:
+    python benchmarks/run_suite.py --images benchmarks/samples/*.jpg --out before.json
+    python benchmarks/run_suite.py --images benchmarks/samples/*.jpg --out after.json
+    python benchmarks/run_suite.py --compare before.json after.json
+
+Needs a local MySQL server; the scratch database (default baraqa_bench) is
+dropped and recreated on every run so each run starts from the same data.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import load_test  # noqa: E402
+from seed_database import seed  # noqa: E402
+from stub_freeimage import start_stub  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES_GLOB = os.path.join(BACKEND_DIR, "benchmarks", "samples", "*.jpg")
+
+# name -> (bin clients, dashboard clients)
+SCENARIOS = {
+    "dashboards": (0, 200),
+    "bins": (20, 0),
+    "mixed": (20, 200),
+}
+
+STAGE_SAMPLE = re.compile(r'^baraqa_detect_stage_seconds_(sum|count)\{stage="(\w+)"\} (\S+)$')
+GATE_SAMPLE = re.compile(r'^baraqa_frame_gate_frames_total\{bin_id="[^"]*",outcome="(\w+)"\} (\S+)$')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind: str, port: int, env: dict, workers: int) -> subprocess.Popen:
+    if kind == "asgi":
+        command = [sys.executable, "-m", "uvicorn", "asgi:application", "--port", str(port),
+                   "--workers", str(workers), "--log-level", "warning"]
+        env = dict(env, BARAQA_WEB_WORKERS=str(workers))
+    else:
+        command = [sys.executable, "-c",
+                   f"from app import app; app.run(port={port}, threaded=True)"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=dict(os.environ, **env))
+
+
+def wait_until_ready(url: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(url + "/metrics", timeout=2):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} not ready after {timeout:.0f}s")
+
+
+def scrape(url: str) -> str:
+    """The server's /metrics text; empty if unavailable."""
+    try:
+        with urllib.request.urlopen(url + "/metrics", timeout=5) as response:
+            return response.read().decode()
+    except OSError:
+        return ""
+
+
+def stage_totals(text: str) -> dict:
+    """(sum seconds, count) per detect stage from a /metrics scrape."""
+    totals = {}
+    for line in text.splitlines():
+        match = STAGE_SAMPLE.match(line)
+        if match:
+            kind, stage, value = match.groups()
+            totals.setdefault(stage, [0.0, 0])[0 if kind == "sum" else 1] = float(value)
+    return totals
+
+
+def gate_totals(text: str) -> dict:
+    """Frames per frame-gate outcome (passed / skipped), summed over bins."""
+    totals = {}
+    for line in text.splitlines():
+        match = GATE_SAMPLE.match(line)
+        if match:
+            outcome, value = match.groups()
+            totals[outcome] = totals.get(outcome, 0) + int(float(value))
+    return totals
+
+
+def gate_summary(before: dict, after: dict) -> dict:
+    """Frames checked and skipped by the frame gate between two scrapes."""
+    skipped = after.get("skipped", 0) - before.get("skipped", 0)
+    frames = skipped + after.get("passed", 0) - before.get("passed", 0)
+    return {"frames": frames, "skipped": skipped,
+            "skip_rate": round(skipped / frames, 4) if frames else None}
+
+
+def stage_means(before: dict, after: dict) -> dict:
+    """Mean ms per detect stage between two /metrics scrapes."""
+    means = {}
+    for stage, (total, count) in after.items():
+        previous_total, previous_count = before.get(stage, (0.0, 0))
+        if count > previous_count:
+            means[stage] = round((total - previous_total) / (count - previous_count) * 1000, 2)
+    return means
+
+
+def load_images(patterns: list) -> list:
+    paths = sorted(path for pattern in patterns for path in glob.glob(pattern))
+    if paths:
+        return paths
+    # Synthetic frames rarely contain anything detectable, so most
+    # disposals end as no_detection and skip the write path
+    print("No sample JPEGs found: using synthetic frames from bench_decode")
+    from bench_decode import synthetic_jpeg, FRAME_SIZES
+    paths = []
+    for name, (width, height) in FRAME_SIZES.items():
+        path = os.path.join(tempfile.gettempdir(), f"baraqa_synthetic_{name}.jpg")
+        with open(path, "wb") as handle:
+            handle.write(synthetic_jpeg(width, height))
+        paths.append(path)
+    return paths
+
+
+def run_suite(args) -> dict:
+    db_env = {"host": args.db_host, "user": args.db_user, "password": args.db_password}
+    if not args.no_seed:
+        counts = seed(db_env, args.database, args.history)
+        print(f"Seeded {args.database}: {counts}")
+
+    stub = start_stub(latency=args.upload_latency)
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = start_server(args.server, port, {
+        "BARAQA_DB_HOST": args.db_host,
+        "BARAQA_DB_USER": args.db_user,
+        "BARAQA_DB_PASSWORD": args.db_password,
+        "BARAQA_DB_NAME": args.database,
+        "BARAQA_FREEIMAGE_URL": stub.upload_url,
+        # The bins' frames repeat a few samples; gated, most never reach the detector
+        "BARAQA_FRAME_GATE": "1" if args.frame_gate else "0",
+    }, args.workers)
+
+    results = {"server": args.server, "frame_gate": args.frame_gate, "scenarios": {}}
+    try:
+        wait_until_ready(url, server)
+        images = load_images(args.images)
+        for name in args.scenarios:
+            bin_clients, dashboard_clients = SCENARIOS[name]
+            load_args = load_test.build_parser().parse_args([
+                "--url", url, "--duration", str(args.duration),
+                "--bin-clients", str(bin_clients), "--dashboard-clients", str(dashboard_clients),
+                "--seed", str(args.seed), "--image", *images,
+            ])
+            print(f"\n── {name} " + "─" * (60 - len(name)))
+            before = scrape(url)
+            recorder = load_test.run(load_args)
+            recorder.report(args.duration)
+            after = scrape(url)
+            means = stage_means(stage_totals(before), stage_totals(after))
+            if means:
+                print("detect stages (mean ms): " +
+                      ", ".join(f"{stage} {ms}" for stage, ms in sorted(means.items())))
+            gate = gate_summary(gate_totals(before), gate_totals(after))
+            if not args.frame_gate:
+                print("frame gate: off")
+            elif gate["frames"]:
+                print(f"frame gate: {gate['skipped']} of {gate['frames']} frames skipped "
+                      f"({gate['skip_rate']:.1%})")
+            results["scenarios"][name] = {
+                "endpoints": recorder.summary(args.duration),
+                "detect_stage_ms": means,
+                "frame_gate": gate,
+            }
+        results["uploads"] = stub.uploads
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        stub.shutdown()
+    return results
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Print p50/p95/p99 and throughput change per scenario and endpoint."""
+    with open(before_path) as handle:
+        before = json.load(handle)["scenarios"]
+    with open(after_path) as handle:
+        after = json.load(handle)["scenarios"]
+    print(f"{'scenario / endpoint':<46}{'req/s':>16}{'p50 ms':>16}{'p95 ms':>16}{'p99 ms':>16}")
+    for scenario in after:
+        for endpoint, row in after[scenario]["endpoints"].items():
+            old = before.get(scenario, {}).get("endpoints", {}).get(endpoint)
+            if not old:
+                continue
+            cells = "".join(f"{old[key]:>8.1f}→{row[key]:<7.1f}"
+                            for key in ("rps", "p50_ms", "p95_ms", "p99_ms"))
+            print(f"{scenario + ' ' + endpoint:<46}{cells}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--images", nargs="+", default=[SAMPLES_GLOB],
+                        help="sample JPEGs (globs) sent by simulated bins")
+    parser.add_argument("--server", choices=["sync", "asgi"], default="sync")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers (asgi)")
+    parser.add_argument("--frame-gate", action="store_true",
+                        help="keep the frame gate on (it skips most of the repeated sample frames)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--upload-latency", type=float, default=0.3,
+                        help="stub image host mean seconds per upload")
+    parser.add_argument("--database", default="baraqa_bench")
+    parser.add_argument("--history", type=int, default=200, help="seeded past disposals per user")
+    parser.add_argument("--no-seed", action="store_true", help="reuse the database as it is")
+    parser.add_argument("--db-host", default=os.environ.get("BARAQA_DB_HOST", "localhost"))
+    parser.add_argument("--db-user", default=os.environ.get("BARAQA_DB_USER", "root"))
+    parser.add_argument("--db-password", default=os.environ.get("BARAQA_DB_PASSWORD", ""))
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two --out files instead of running")
+    return parser
+
+
+if __name__ == '__main__':
+    cli_args = build_parser().parse_args()
+    if cli_args.compare:
+        compare(*cli_args.compare)
+    else:
+        suite_results = run_suite(cli_args)
+        if cli_args.out:
+            with open(cli_args.out, "w") as out:
+                json.dump(suite_results, out, indent=2)
+            print(f"\nResults written to {cli_args.out}")
@@ -0,0 +1,127 @@
+"""
+Benchmark Database Seeder for BARAQA_BIN Smart Waste Management System
+Recreates a scratch database from complete_database_setup.sql, then adds
+synthetic history so the history and analytics queries read realistic
+amounts of data. The RFIDs, users and bins match load_test.py defaults.
+
+Usage:
+    python benchmarks/seed_database.py --database baraqa_bench --history 500
+"""
+import argparse
+import os
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from db_helper import DatabaseHelper, backfill_stats  # noqa: E402
+
+SETUP_SQL = os.path.join(BACKEND_DIR, "complete_database_setup.sql")
+SETUP_DATABASE = "smart_dustbin_pro"
+
+WASTE_TYPES = ["bottle", "cup", "can", "paper", "plastic bag", "banana"]
+POINTS_PER_ITEM = 10
+CARBON_PER_ITEM_G = 50
+
+
+def setup_statements(database: str) -> list:
+    """Statements of the setup script, retargeted at ``database``."""
+    with open(SETUP_SQL, encoding="utf-8") as handle:
+        script = handle.read()
+    script = re.sub(rf"\b{SETUP_DATABASE}\b", database, script)
+    lines = [line for line in script.splitlines() if not line.lstrip().startswith("--")]
+    statements = [statement.strip() for statement in "\n".join(lines).split(";")]
+    # The trailing SELECTs are for people running the script by hand
+    return [s for s in statements if s and not s.upper().startswith("SELECT")]
+
+
+def seed_history(cursor, events_per_user: int, days: int, rng: random.Random) -> int:
+    """Insert random past disposals and fold them into users and stats buckets."""
+    cursor.execute("SELECT user_id FROM users")
+    user_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT bin_id FROM smart_bins")
+    bin_ids = [row[0] for row in cursor.fetchall()]
+    now = datetime.now().replace(microsecond=0)
+
+    rows = []
+    for user_id in user_ids:
+        for _ in range(events_per_user):
+            count = rng.randint(1, 4)
+            detected_at = now - timedelta(seconds=rng.randint(60, days * 86400))
+            rows.append((user_id, rng.choice(bin_ids), rng.choice(WASTE_TYPES), count,
+                         count * POINTS_PER_ITEM, "upload_failed", detected_at))
+    for start in range(0, len(rows), 1000):
+        cursor.executemany(
+            "INSERT INTO waste_logs (user_id, bin_id, waste_type, waste_count, points_earned, "
+            "image_url, detected_at) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            rows[start:start + 1000],
+        )
+
+    cursor.execute(
+        "UPDATE users u JOIN (SELECT user_id, SUM(points_earned) AS points, "
+        "SUM(waste_count) AS items FROM waste_logs GROUP BY user_id) t USING (user_id) "
+        "SET u.current_points = t.points, u.total_recycled_items = t.items, "
+        "u.carbon_saved_g = t.items * %s",
+        (CARBON_PER_ITEM_G,),
+    )
+    return len(rows)
+
+
+def seed(config: dict, database: str, history: int = 0, days: int = 30, seed_value: int = 42) -> dict:
+    """
+    Drop and recreate ``database`` with the setup data plus ``history``
+    disposals per user.
+
+    Returns:
+        Row counts for the seeded tables
+    """
+    if database == SETUP_DATABASE:
+        raise ValueError(f"Refusing to drop {SETUP_DATABASE}; seed a scratch database")
+
+    connection = mysql.connector.connect(**config)
+    try:
+        cursor = connection.cursor()
+        for statement in setup_statements(database):
+            cursor.execute(statement)
+        connection.commit()
+
+        added = seed_history(cursor, history, days, random.Random(seed_value)) if history else 0
+        connection.commit()
+
+        if added:
+            # Same rebuild as POST /api/admin/analytics/backfill
+            db = DatabaseHelper(dict(config, database=database), pool_min_size=0, pool_max_size=1)
+            backfill_stats(db, CARBON_PER_ITEM_G)
+            db.pool.close_all()
+
+        counts = {}
+        for table in ("users", "smart_bins", "waste_logs"):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0]
+        cursor.close()
+        return counts
+    finally:
+        connection.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default=os.environ.get("BARAQA_DB_HOST", "localhost"))
+    parser.add_argument("--user", default=os.environ.get("BARAQA_DB_USER", "root"))
+    parser.add_argument("--password", default=os.environ.get("BARAQA_DB_PASSWORD", ""))
+    parser.add_argument("--database", default="baraqa_bench")
+    parser.add_argument("--history", type=int, default=200, help="past disposals per user")
+    parser.add_argument("--days", type=int, default=30, help="spread history over this many days")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+if __name__ == '__main__':
+    cli_args = build_parser().parse_args()
+    db_config = {"host": cli_args.host, "user": cli_args.user, "password": cli_args.password}
+    print(seed(db_config, cli_args.database, cli_args.history, cli_args.days, cli_args.seed))
@@ -0,0 +1,92 @@
+"""
+Stub Image Host for BARAQA_BIN Smart Waste Management System
+Answers freeimage.host upload requests locally with a configurable delay
+and failure rate, so benchmarks never depend on (or load) the real host
+
+Usage:
+    python benchmarks/stub_freeimage.py --port 5050 --latency 0.3
+    BARAQA_FREEIMAGE_URL=http://localhost:5050/api/1/upload python app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubImageHostHandler(BaseHTTPRequestHandler):
+    """Replies like POST /api/1/upload on freeimage.host."""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        server = self.server
+        if server.latency:
+            time.sleep(random.uniform(0.5, 1.5) * server.latency)
+        with server.lock:
+            server.uploads += 1
+            server.bytes_received += length
+
+        if random.random() < server.fail_rate:
+            self._reply(503, {"status_code": 503, "error": {"message": "stub failure"}})
+        else:
+            image_id = uuid.uuid4().hex[:8]
+            self._reply(200, {"status_code": 200,
+                              "image": {"url": f"http://{self.headers.get('Host')}/i/{image_id}.jpg"}})
+
+    def _reply(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port: int = 0, latency: float = 0.0, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    """
+    Serve the stub on a background thread.
+
+    Returns:
+        The server; ``server.upload_url`` is the URL to configure, and
+        ``server.shutdown()`` stops it
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubImageHostHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.fail_rate = fail_rate
+    server.uploads = 0
+    server.bytes_received = 0
+    server.lock = threading.Lock()
+    server.upload_url = f"http://127.0.0.1:{server.server_address[1]}/api/1/upload"
+    threading.Thread(target=server.serve_forever, name="stub-freeimage", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--latency", type=float, default=0.3,
+                        help="mean seconds per upload (the real host takes 0.2-2s)")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="fraction of uploads answered with 503")
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.latency, args.fail_rate)
+    print(f"Stub image host at {server.upload_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"{server.uploads} uploads, {server.bytes_received / 1024:.0f} KB")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
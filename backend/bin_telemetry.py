@@ -0,0 +1,206 @@
+"""
+Bin Telemetry Module for BARAQA_BIN Smart Waste Management System
+Coalesces bin heartbeats (battery, fill sensor, uptime) in memory and
+writes the latest reading per bin to MySQL in batches on a timer
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Optional, Dict, Any, List, Tuple
+from metrics import fields
+
+logger = logging.getLogger(__name__)
+
+# Heartbeat field -> (smart_bins column, lowest, highest)
+TELEMETRY_FIELDS = {
+    "battery": ("battery_status", 0, 100),
+    "fill_percent": ("sensor_fill_percent", 0, 100),
+    "uptime_s": ("uptime_s", 0, 2 ** 32 - 1),
+}
+
+
+def parse_heartbeat(record: Any) -> Dict[str, Any]:
+    """
+    Validate one heartbeat: ``bin_id`` plus any of the TELEMETRY_FIELDS
+    as integers within range.
+
+    Raises:
+        ValueError: If the record is malformed
+    """
+    if not isinstance(record, dict):
+        raise ValueError("record must be an object")
+    bin_id = record.get("bin_id")
+    if not isinstance(bin_id, int) or isinstance(bin_id, bool) or bin_id <= 0:
+        raise ValueError("bin_id must be a positive integer")
+
+    reading = {"bin_id": bin_id}
+    for name, (column, lowest, highest) in TELEMETRY_FIELDS.items():
+        value = record.get(name)
+        if value is None:
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if not isinstance(value, int) or isinstance(value, bool) or not lowest <= value <= highest:
+            raise ValueError(f"{name} must be an integer from {lowest} to {highest}")
+        reading[column] = value
+    if len(reading) == 1:
+        raise ValueError("record has no telemetry fields")
+    return reading
+
+
+class TelemetryBuffer:
+    """
+    Latest pending reading per bin, flushed by a background thread.
+
+    A bin that reports several times between flushes costs one row in the
+    next batch: later fields overwrite earlier ones, and a field a later
+    heartbeat leaves out keeps its earlier value. Each flush hands at most
+    ``max_batch`` readings to ``apply_batch``, which should write them in a
+    single statement.
+
+    Readings are kept in memory only. A heartbeat is a status snapshot that
+    the next one supersedes, so readings lost in a crash are not replayed.
+    """
+
+    def __init__(self, apply_batch: Callable[[List[Dict]], Any],
+                 on_flushed: Optional[Callable[[List[Dict]], None]] = None,
+                 flush_interval: float = 5.0, max_batch: int = 500,
+                 max_pending: int = 50000, backoff_max: float = 60.0):
+        """
+        Args:
+            apply_batch: ``apply_batch(readings)`` writes the readings
+            on_flushed: Called with the readings after each committed batch
+            flush_interval: Seconds between flushes
+            max_batch: Readings per write
+            max_pending: Bins that may wait for a flush; heartbeats from
+                         further bins are dropped until the next flush
+            backoff_max: Cap on the delay between failed flushes
+        """
+        self.apply_batch = apply_batch
+        self.on_flushed = on_flushed
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.backoff_max = backoff_max
+
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            "received": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "flushed": 0,
+            "batches": 0,
+            "flush_failures": 0,
+            "flush_ms_total": 0.0,
+        }
+
+    # ── Lifecycle ───────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flusher, name="bin-telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher and try one last flush of what is pending."""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        try:
+            self._flush()
+        except Exception as e:
+            logger.warning("Final telemetry flush failed", extra=fields(
+                pending=len(self._pending), error=e))
+
+    # ── Public API ──────────────────────────────────────────────
+
+    def submit(self, readings: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Queue parsed heartbeats (see parse_heartbeat) for the next flush.
+
+        Returns:
+            (accepted, dropped)
+        """
+        seen_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        accepted = dropped = 0
+        with self._lock:
+            for reading in readings:
+                bin_id = reading["bin_id"]
+                pending = self._pending.get(bin_id)
+                if pending is not None:
+                    pending.update(reading)
+                    pending["last_seen_at"] = seen_at
+                    self._stats["coalesced"] += 1
+                elif len(self._pending) < self.max_pending:
+                    self._pending[bin_id] = dict(reading, last_seen_at=seen_at)
+                else:
+                    dropped += 1
+                    continue
+                accepted += 1
+            self._stats["received"] += accepted
+            self._stats["dropped"] += dropped
+        return accepted, dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["pending"] = len(self._pending)
+        batches = snapshot["batches"]
+        snapshot["avg_batch_size"] = round(snapshot["flushed"] / batches, 1) if batches else 0.0
+        snapshot["avg_flush_ms"] = round(snapshot.pop("flush_ms_total") / batches, 2) if batches else 0.0
+        return snapshot
+
+    # ── Flusher ─────────────────────────────────────────────────
+
+    def _flusher(self) -> None:
+        failures = 0
+        delay = self.flush_interval
+        while not self._stop.wait(delay):
+            try:
+                self._flush()
+                failures = 0
+                delay = self.flush_interval
+            except Exception as e:
+                failures += 1
+                with self._lock:
+                    self._stats["flush_failures"] += 1
+                delay = min(self.backoff_max, self.flush_interval * (2 ** failures))
+                logger.warning("Telemetry flush failed", extra=fields(
+                    failures=failures, retry_in_s=round(delay, 1), error=e))
+
+    def _flush(self) -> None:
+        with self._lock:
+            readings = list(self._pending.values())
+            self._pending.clear()
+
+        for start in range(0, len(readings), self.max_batch):
+            batch = readings[start:start + self.max_batch]
+            started = time.monotonic()
+            try:
+                self.apply_batch(batch)
+            except Exception:
+                self._requeue(readings[start:])
+                raise
+            elapsed_ms = (time.monotonic() - started) * 1000
+            with self._lock:
+                self._stats["flushed"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["flush_ms_total"] += elapsed_ms
+            if self.on_flushed:
+                self.on_flushed(batch)
+
+    def _requeue(self, readings: List[Dict[str, Any]]) -> None:
+        """Put unwritten readings back under any that arrived since."""
+        with self._lock:
+            for reading in readings:
+                newer = self._pending.get(reading["bin_id"])
+                self._pending[reading["bin_id"]] = dict(reading, **newer) if newer else reading
@@ -0,0 +1,81 @@
+"""
+Compact Detect Protocol Module for BARAQA_BIN Smart Waste Management System
+Fixed-format binary replies for /api/detect/compact, so constrained bins
+read a few bytes instead of buffering and parsing a JSON document
+
+Request:  POST raw JPEG body (Content-Type: image/jpeg)
+          X-RFID-UID: <card uid>   X-Bin-Id: <bin id>
+
+Reply (big-endian, 10-byte header followed by the voice text):
+    offset 0  u8   version (1)
+    offset 1  u8   status (STATUS_*)
+    offset 2  u8   flags (FLAG_*)
+    offset 3  u8   voice length in bytes (0-255)
+    offset 4  u16  points earned by this disposal
+    offset 6  u32  user's total points
+    offset 10      voice command, UTF-8
+"""
+import struct
+from typing import Dict, Any
+
+PROTOCOL_VERSION = 1
+COMPACT_MIMETYPE = "application/octet-stream"
+
+STATUS_OK = 0
+STATUS_NO_DETECTION = 1
+STATUS_UNKNOWN_USER = 2
+STATUS_BAD_REQUEST = 3
+STATUS_BUSY = 4           # retry later
+STATUS_ERROR = 5
+
+FLAG_DUPLICATE = 0x01     # a retry of a frame that was already counted
+
+_HEADER = struct.Struct(">BBBBHI")
+MAX_VOICE_BYTES = 255
+
+
+def _status_for(response: Dict[str, Any], http_status: int) -> int:
+    if response.get("status") == "success":
+        return STATUS_OK
+    if response.get("status") == "no_detection":
+        return STATUS_NO_DETECTION
+    return {403: STATUS_UNKNOWN_USER, 400: STATUS_BAD_REQUEST,
+            503: STATUS_BUSY}.get(http_status, STATUS_ERROR)
+
+
+def encode_reply(response: Dict[str, Any], http_status: int) -> bytes:
+    """Pack a /api/detect response dict into the compact reply format."""
+    voice = response.get("voice_command", "").encode("utf-8")
+    if len(voice) > MAX_VOICE_BYTES:
+        # Cut on a character boundary
+        voice = voice[:MAX_VOICE_BYTES].decode("utf-8", "ignore").encode("utf-8")
+
+    flags = FLAG_DUPLICATE if response.get("duplicate") else 0
+    points = min(response.get("points_earned", 0), 0xFFFF)
+    total = min(max(response.get("user", {}).get("total_points", 0), 0), 0xFFFFFFFF)
+    return _HEADER.pack(PROTOCOL_VERSION, _status_for(response, http_status), flags,
+                        len(voice), points, total) + voice
+
+
+def decode_reply(data: bytes) -> Dict[str, Any]:
+    """
+    Unpack a compact reply (the firmware's view of it).
+
+    Raises:
+        ValueError: if the data is truncated or from another protocol version
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Compact reply shorter than its header")
+    version, status, flags, voice_length, points, total = _HEADER.unpack_from(data)
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported compact protocol version {version}")
+    voice = data[_HEADER.size:_HEADER.size + voice_length]
+    if len(voice) != voice_length:
+        raise ValueError("Compact reply voice text is truncated")
+    return {
+        "status": status,
+        "duplicate": bool(flags & FLAG_DUPLICATE),
+        "points_earned": points,
+        "total_points": total,
+        "voice_command": voice.decode("utf-8"),
+    }
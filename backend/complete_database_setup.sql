@@ -34,6 +34,9 @@ CREATE TABLE smart_bins (
     max_capacity INT DEFAULT 500,
     current_fill_level INT DEFAULT 0,
     battery_status INT DEFAULT 100,
+    sensor_fill_percent TINYINT UNSIGNED NULL,
+    uptime_s INT UNSIGNED NULL,
+    last_seen_at DATETIME NULL,
     last_emptied_at DATETIME,
     status ENUM('active', 'full', 'maintenance') DEFAULT 'active',
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
@@ -50,7 +53,15 @@ CREATE TABLE waste_logs (
     waste_count INT DEFAULT 1,
     points_earned INT DEFAULT 0,
     image_url VARCHAR(500),
+    image_replica_url VARCHAR(500) NULL,
     detected_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    event_id CHAR(32) NULL,
+    UNIQUE KEY uq_waste_logs_event (event_id),
+    -- Covering indexes: history and recent-logs pages are index-only scans
+    INDEX idx_waste_logs_user_time (user_id, detected_at, log_id,
+                                    waste_type, waste_count, points_earned, image_url),
+    INDEX idx_waste_logs_time (detected_at, log_id,
+                               user_id, waste_type, waste_count, points_earned, image_url),
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
     FOREIGN KEY (bin_id) REFERENCES smart_bins(bin_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -66,6 +77,42 @@ CREATE TABLE rewards (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- ───────────────────────────────────────────────────────────────────────────
+-- TABLE 5-6: Statistics Rollups (hourly / daily buckets, kept by the backend)
+-- ───────────────────────────────────────────────────────────────────────────
+CREATE TABLE waste_stats_hourly (
+    bucket_start DATETIME NOT NULL,
+    bin_id INT NOT NULL,
+    waste_type VARCHAR(30) NOT NULL,
+    department VARCHAR(50) NOT NULL DEFAULT '',
+    disposals INT NOT NULL DEFAULT 0,
+    items INT NOT NULL DEFAULT 0,
+    points INT NOT NULL DEFAULT 0,
+    carbon_g DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, bin_id, waste_type, department)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE waste_stats_daily (
+    bucket_start DATE NOT NULL,
+    bin_id INT NOT NULL,
+    waste_type VARCHAR(30) NOT NULL,
+    department VARCHAR(50) NOT NULL DEFAULT '',
+    disposals INT NOT NULL DEFAULT 0,
+    items INT NOT NULL DEFAULT 0,
+    points INT NOT NULL DEFAULT 0,
+    carbon_g DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, bin_id, waste_type, department)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- ───────────────────────────────────────────────────────────────────────────
+-- TABLE 7: Disposal Journal Checkpoints (last journal entry applied per backend journal)
+-- ───────────────────────────────────────────────────────────────────────────
+CREATE TABLE disposal_journal_checkpoints (
+    journal_name VARCHAR(100) PRIMARY KEY,
+    applied_seq BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- ═══════════════════════════════════════════════════════════════════════════
 -- INSERT DUMMY DATA - BANGLADESH CONTEXT
 -- ═══════════════════════════════════════════════════════════════════════════
@@ -146,6 +193,28 @@ INSERT INTO waste_logs (user_id, bin_id, waste_type, waste_count, points_earned,
 (6, 2, 'Can', 3, 30, 'https://iili.io/sample19.jpg', '2026-01-12 17:20:00'),
 (13, 1, 'Bottle', 5, 50, 'https://iili.io/sample20.jpg', '2026-01-12 11:40:00');
 
+-- ───────────────────────────────────────────────────────────────────────────
+-- 3b. BUILD STATISTICS ROLLUPS FROM THE LOGS ABOVE (50 g carbon per item)
+-- ───────────────────────────────────────────────────────────────────────────
+
+INSERT INTO waste_stats_hourly (bucket_start, bin_id, waste_type, department,
+                                disposals, items, points, carbon_g)
+SELECT TIMESTAMP(DATE(wl.detected_at), MAKETIME(HOUR(wl.detected_at), 0, 0)) AS bucket,
+       wl.bin_id, wl.waste_type, COALESCE(u.department, '') AS dept,
+       COUNT(*), SUM(wl.waste_count), SUM(wl.points_earned), SUM(wl.waste_count) * 50
+FROM waste_logs wl
+JOIN users u ON u.user_id = wl.user_id
+GROUP BY bucket, wl.bin_id, wl.waste_type, dept;
+
+INSERT INTO waste_stats_daily (bucket_start, bin_id, waste_type, department,
+                               disposals, items, points, carbon_g)
+SELECT DATE(wl.detected_at) AS bucket,
+       wl.bin_id, wl.waste_type, COALESCE(u.department, '') AS dept,
+       COUNT(*), SUM(wl.waste_count), SUM(wl.points_earned), SUM(wl.waste_count) * 50
+FROM waste_logs wl
+JOIN users u ON u.user_id = wl.user_id
+GROUP BY bucket, wl.bin_id, wl.waste_type, dept;
+
 -- ───────────────────────────────────────────────────────────────────────────
 -- 4. INSERT REWARDS (Bangladesh Context)
 -- ───────────────────────────────────────────────────────────────────────────
@@ -2,40 +2,276 @@
 Database Helper Module for BARAQA_BIN Smart Waste Management System
 Uses raw SQL queries with mysql-connector-python
 """
+import logging
+import threading
+import time
+from datetime import datetime
+from collections import deque
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, IntegrityError, DataError
 from contextlib import contextmanager
-from typing import Optional, List, Dict, Any
+from typing import Callable, Iterator, Optional, List, Dict, Any
+from leaderboard import LeaderboardIndex
+from log_archive import LogArchive, month_start, next_month
+from metrics import fields
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhaustedError(Error):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections shared by all DatabaseHelper calls.
+
+    Connections are created lazily up to ``max_size`` and ``min_size`` of them
+    are kept open while idle. On checkout a connection that has been idle for
+    longer than ``ping_interval`` is pinged, and one older than ``recycle``
+    seconds is closed and replaced, so MySQL's ``wait_timeout`` never hands a
+    dead socket to a request. Idle connections above ``min_size`` are closed
+    after ``idle_timeout`` seconds.
+    """
+
+    def __init__(self, config: Dict[str, str], min_size: int = 1, max_size: int = 10,
+                 timeout: float = 5.0, recycle: float = 3600.0, ping_interval: float = 30.0,
+                 idle_timeout: float = 300.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size, max_size >= 1")
+
+        self.config = config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+
+        # Idle entries are (connection, idle_since); LIFO reuse
+        # keeps the hottest sockets busy and lets surplus ones age out.
+        self._idle = deque()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._created_at = {}
+
+        self._stats = {
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "connections_failed_health_check": 0,
+            "checkouts": 0,
+            "checkout_waits": 0,
+            "checkout_wait_ms_total": 0.0,
+            "exhausted": 0,
+        }
+
+        for _ in range(min_size):
+            try:
+                connection = self._connect()
+            except Error as e:
+                logger.warning("Database pool warm-up error", extra=fields(error=e))
+                break
+            self._size += 1
+            self._idle.append((connection, time.monotonic()))
+
+    def _connect(self):
+        connection = mysql.connector.connect(**self.config)
+        connection.autocommit = True
+        with self._lock:
+            self._created_at[id(connection)] = time.monotonic()
+            self._stats["connections_created"] += 1
+        return connection
+
+    def _discard(self, connection) -> None:
+        with self._lock:
+            self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _is_healthy(self, connection, idle_since: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            created_at = self._created_at.get(id(connection), now)
+        if now - created_at > self.recycle:
+            with self._lock:
+                self._stats["connections_recycled"] += 1
+            return False
+        if now - idle_since > self.ping_interval:
+            try:
+                connection.ping(reconnect=False)
+            except Error:
+                with self._lock:
+                    self._stats["connections_failed_health_check"] += 1
+                return False
+        return True
+
+    def acquire(self):
+        """Check out a healthy connection, waiting up to ``timeout`` seconds."""
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        wait_start = time.monotonic()
+
+        while True:
+            with self._available:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["exhausted"] += 1
+                        raise PoolExhaustedError(
+                            msg=f"Connection pool exhausted ({self.max_size} in use)"
+                        )
+                    waited = True
+                    self._available.wait(remaining)
+
+                if waited:
+                    self._stats["checkout_waits"] += 1
+                    self._stats["checkout_wait_ms_total"] += (time.monotonic() - wait_start) * 1000
+                    waited = False
+
+                if self._idle:
+                    connection, idle_since = self._idle.pop()
+                else:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+                    connection, idle_since = None, None
+
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except Error:
+                    with self._available:
+                        self._size -= 1
+                        self._available.notify()
+                    raise
+            elif not self._is_healthy(connection, idle_since):
+                self._discard(connection)
+                with self._available:
+                    self._size -= 1
+                    self._available.notify()
+                continue
+
+            with self._lock:
+                self._stats["checkouts"] += 1
+            return connection
+
+    def release(self, connection, broken: bool = False) -> None:
+        """Return a connection to the pool, or drop it if it is no longer usable."""
+        if not broken and connection.in_transaction:
+            try:
+                connection.rollback()
+            except Error:
+                broken = True
+
+        surplus = []
+        with self._available:
+            now = time.monotonic()
+            if broken:
+                self._size -= 1
+            else:
+                self._idle.append((connection, now))
+            # The left end holds the longest-idle connections
+            while len(self._idle) > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+                surplus.append(self._idle.popleft()[0])
+                self._size -= 1
+            self._available.notify()
+
+        if broken:
+            self._discard(connection)
+        for stale in surplus:
+            self._discard(stale)
+
+    def close_all(self) -> None:
+        """Close every idle connection (checked-out ones are closed on release)."""
+        with self._available:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool occupancy and exhaustion counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+        return snapshot
 
 
 class DatabaseHelper:
     """Handles all database operations using raw SQL queries."""
     
-    def __init__(self, config: Dict[str, str]):
+    def __init__(self, config: Dict[str, str], pool_min_size: int = 1, pool_max_size: int = 10,
+                 pool_timeout: float = 5.0, pool_recycle: float = 3600.0,
+                 cache_size: int = 1024, cache_ttl: float = 60.0,
+                 leaderboard_resync: float = 300.0,
+                 leaderboard_stamp: Optional[str] = None,
+                 observer: Optional[Callable[[str, float, int], None]] = None,
+                 archive: Optional[LogArchive] = None):
         """
-        Initialize database configuration.
+        Initialize database configuration, connection pool and record caches.
         
         Args:
             config: Dictionary with keys: user, password, host, database
+            pool_min_size: Connections kept open while idle
+            pool_max_size: Upper bound on concurrently open connections
+            pool_timeout: Seconds to wait for a free connection before failing
+            pool_recycle: Seconds after which a connection is closed and replaced
+            cache_size: Maximum cached users and bins (each)
+            cache_ttl: Seconds a cached user or bin row stays valid
+            leaderboard_resync: Seconds between full leaderboard reloads
+            leaderboard_stamp: File the web workers of a host share to reload
+                               the leaderboard after each other's changes
+            observer: Called as ``observer(kind, seconds, round_trips)`` after
+                      every query ('query') and transaction ('transaction')
+            archive: Where closed months of waste_logs are moved; history
+                     and recent-logs reads continue into it
         """
         self.config = config
+        self.pool = ConnectionPool(config, min_size=pool_min_size, max_size=pool_max_size,
+                                   timeout=pool_timeout, recycle=pool_recycle)
+        # Rows are copied in and out so callers cannot mutate cached rows
+        self.user_cache = TTLCache(cache_size, cache_ttl, copy=dict)   # rfid_uid -> users row
+        self.bin_cache = TTLCache(cache_size, cache_ttl, copy=dict)    # bin_id -> smart_bins row
+        self.leaderboard = LeaderboardIndex(leaderboard_resync, leaderboard_stamp)
+        self.observer = observer
+        self.archive = archive
     
     @contextmanager
     def get_connection(self):
         """
-        Context manager for database connections.
-        Ensures connections are properly closed.
+        Context manager for pooled database connections.
+        Ensures connections are returned to the pool.
         """
         connection = None
+        broken = False
         try:
-            connection = mysql.connector.connect(**self.config)
+            connection = self.pool.acquire()
             yield connection
         except Error as e:
-            print(f"Database connection error: {e}")
+            logger.error("Database connection error", extra=fields(error=e))
+            # Server-side errors leave the socket usable; anything else may not
+            broken = connection is not None and not getattr(e, 'sqlstate', None)
             raise
         finally:
-            if connection and connection.is_connected():
-                connection.close()
+            if connection is not None:
+                self.pool.release(connection, broken=broken)
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool metrics."""
+        return self.pool.stats()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return user and bin record cache metrics."""
+        return {"users": self.user_cache.stats(), "bins": self.bin_cache.stats()}
     
     def execute_query(self, query: str, params: tuple = None, fetch_one: bool = False, 
                      fetch_all: bool = False, commit: bool = False) -> Optional[Any]:
@@ -52,30 +288,119 @@ class DatabaseHelper:
         Returns:
             Query results or None based on flags
         """
+        started = time.perf_counter()
         try:
             with self.get_connection() as connection:
-                cursor = connection.cursor(dictionary=True)
-                cursor.execute(query, params or ())
-                
-                if commit:
-                    connection.commit()
-                    return cursor.lastrowid
-                
-                if fetch_one:
-                    return cursor.fetchone()
-                
-                if fetch_all:
-                    return cursor.fetchall()
-                
-                return None
+                # Buffered so no unread rows are left on a connection going back to the pool
+                cursor = connection.cursor(dictionary=True, buffered=True)
+                try:
+                    cursor.execute(query, params or ())
+                    
+                    if commit:
+                        connection.commit()
+                        return cursor.lastrowid
+                    
+                    if fetch_one:
+                        return cursor.fetchone()
+                    
+                    if fetch_all:
+                        return cursor.fetchall()
+                    
+                    return None
+                finally:
+                    cursor.close()
                 
         except Error as e:
-            print(f"Query execution error: {e}")
+            logger.error("Query execution error", extra=fields(error=e))
             raise
         finally:
-            if 'cursor' in locals():
+            if self.observer:
+                self.observer("query", time.perf_counter() - started, 2 if commit else 1)
+    
+    def run_transaction(self, operations: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Execute multiple queries in a single transaction on one connection
+        and return each operation's result.
+        
+        Args:
+            operations: List of dicts with 'query', 'params' and optional
+                        'fetch' ('one' or 'all') keys
+            
+        Returns:
+            One entry per operation: fetched row(s) when 'fetch' is set,
+            otherwise the cursor's lastrowid
+            
+        Raises:
+            Error: after rolling back if any operation fails
+        """
+        started = time.perf_counter()
+        try:
+            return self._run_transaction(operations)
+        finally:
+            if self.observer:
+                # START TRANSACTION, each statement, then COMMIT or ROLLBACK
+                self.observer("transaction", time.perf_counter() - started, len(operations) + 2)
+    
+    def _run_transaction(self, operations: List[Dict[str, Any]]) -> List[Any]:
+        with self.get_connection() as connection:
+            connection.start_transaction()
+            cursor = connection.cursor(dictionary=True, buffered=True)
+            try:
+                results = []
+                for operation in operations:
+                    cursor.execute(operation.get('query'), operation.get('params', ()))
+                    fetch = operation.get('fetch')
+                    if fetch == 'one':
+                        results.append(cursor.fetchone())
+                    elif fetch == 'all':
+                        results.append(cursor.fetchall())
+                    else:
+                        results.append(cursor.lastrowid)
+                
+                connection.commit()
+                return results
+            except Error:
+                connection.rollback()
+                raise
+            finally:
                 cursor.close()
     
+    def stream_query(self, query: str, params: tuple = None, batch_size: int = 1000,
+                     net_write_timeout: int = 600) -> Iterator[List[Dict]]:
+        """
+        Run a SELECT on an unbuffered cursor and yield its rows in batches
+        as the server sends them, so memory stays flat however many rows
+        match.
+        
+        The pooled connection is held until the generator is exhausted. One
+        abandoned early still has unread rows on the wire and is discarded.
+        
+        Args:
+            net_write_timeout: Seconds MySQL waits for the consumer to take
+                               more rows (the session default of 60s would
+                               abort an export behind a slow client)
+        """
+        started = time.perf_counter()
+        connection = self.pool.acquire()
+        finished = False
+        try:
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            cursor.execute("SET SESSION net_write_timeout = %s", (net_write_timeout,))
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            # Back to the server default before the connection is reused
+            cursor.execute("SET SESSION net_write_timeout = @@GLOBAL.net_write_timeout")
+            cursor.close()
+            finished = True
+        finally:
+            self.pool.release(connection, broken=not finished)
+            if self.observer:
+                self.observer("stream", time.perf_counter() - started, 1)
+    
     def execute_transaction(self, operations: List[Dict[str, Any]]) -> bool:
         """
         Execute multiple queries in a single transaction.
@@ -87,33 +412,26 @@ class DatabaseHelper:
             True if all operations succeed, False otherwise
         """
         try:
-            with self.get_connection() as connection:
-                cursor = connection.cursor(dictionary=True)
-                
-                for operation in operations:
-                    query = operation.get('query')
-                    params = operation.get('params', ())
-                    cursor.execute(query, params)
-                
-                connection.commit()
-                return True
-                
+            self.run_transaction(operations)
+            return True
         except Error as e:
-            print(f"Transaction error: {e}")
-            if connection:
-                connection.rollback()
+            logger.error("Transaction error", extra=fields(error=e))
             return False
-        finally:
-            if 'cursor' in locals():
-                cursor.close()
 
 
 # ── User Operations ─────────────────────────────────────────────
 
 def get_user_by_rfid(db: DatabaseHelper, rfid_uid: str) -> Optional[Dict]:
-    """Fetch user by RFID UID."""
+    """Fetch user by RFID UID (served from the record cache when warm)."""
+    user = db.user_cache.get(rfid_uid)
+    if user is not None:
+        return user
+    
     query = "SELECT * FROM users WHERE rfid_uid = %s"
-    return db.execute_query(query, (rfid_uid,), fetch_one=True)
+    user = db.execute_query(query, (rfid_uid,), fetch_one=True)
+    if user:
+        db.user_cache.put(rfid_uid, user, tag=user['user_id'])
+    return user
 
 
 def get_user_by_credentials(db: DatabaseHelper, username: str, password: str) -> Optional[Dict]:
@@ -141,62 +459,796 @@ def create_user(db: DatabaseHelper, full_name: str, username: str, password: str
                           current_points, total_recycled_items, carbon_saved_g)
         VALUES (%s, %s, %s, %s, %s, 0, 0, 0)
     """
-    return db.execute_query(query, (full_name, username, password, rfid_uid, role), commit=True)
+    user_id = db.execute_query(query, (full_name, username, password, rfid_uid, role), commit=True)
+    db.user_cache.invalidate(rfid_uid)
+    if role == 'user':
+        db.leaderboard.upsert({
+            "user_id": user_id, "full_name": full_name, "username": username,
+            "current_points": 0, "total_recycled_items": 0, "carbon_saved_g": 0.0,
+            "role": role,
+        })
+    return user_id
 
 
-def update_user_stats(db: DatabaseHelper, user_id: int, points: int, items: int, carbon: float) -> bool:
-    """Update user points, items, and carbon savings."""
-    query = """
-        UPDATE users 
-        SET current_points = current_points + %s,
-            total_recycled_items = total_recycled_items + %s,
-            carbon_saved_g = carbon_saved_g + %s
-        WHERE user_id = %s
+# ── Waste Log Operations ────────────────────────────────────────
+
+# Rollup buckets are derived from the log row itself, so live increments
+# and backfill always agree on which hour/day a disposal belongs to
+_HOUR_BUCKET = "TIMESTAMP(DATE(wl.detected_at), MAKETIME(HOUR(wl.detected_at), 0, 0))"
+_DAY_BUCKET = "DATE(wl.detected_at)"
+
+
+def _rollup_operations(carbon_saved: float) -> List[Dict[str, Any]]:
+    """
+    Statements that add the waste log just inserted on this connection
+    (LAST_INSERT_ID) to its hourly and daily stats buckets.
     """
-    db.execute_query(query, (points, items, carbon, user_id), commit=True)
+    operations = []
+    for table, bucket in (("waste_stats_hourly", _HOUR_BUCKET), ("waste_stats_daily", _DAY_BUCKET)):
+        operations.append({
+            "query": f"""
+                INSERT INTO {table} (bucket_start, bin_id, waste_type, department,
+                                     disposals, items, points, carbon_g)
+                SELECT {bucket}, wl.bin_id, wl.waste_type, COALESCE(u.department, ''),
+                       1, wl.waste_count, wl.points_earned, %s
+                FROM waste_logs wl
+                JOIN users u ON u.user_id = wl.user_id
+                WHERE wl.log_id = LAST_INSERT_ID()
+                ON DUPLICATE KEY UPDATE
+                    disposals = disposals + 1,
+                    items = items + wl.waste_count,
+                    points = points + wl.points_earned,
+                    carbon_g = carbon_g + %s
+            """,
+            "params": (carbon_saved, carbon_saved),
+        })
+    return operations
+
+
+def record_disposal(db: DatabaseHelper, user_id: int, bin_id: int, waste_type: str,
+                    waste_count: int, points_earned: int, carbon_saved: float,
+                    image_url: str = None) -> Dict:
+    """
+    Record one disposal atomically: insert the log, add it to the stats
+    buckets, credit the user, fill the bin (flipping it to 'full' at
+    capacity) and read back the new totals.
+    
+    Returns:
+        Dict with log_id, the user's updated current_points,
+        total_recycled_items and carbon_saved_g, and the bin's
+        current_fill_level, max_capacity and status
+    """
+    operations = [
+        {
+            "query": """
+                INSERT INTO waste_logs (user_id, bin_id, waste_type, waste_count, 
+                                       points_earned, image_url, detected_at)
+                VALUES (%s, %s, %s, %s, %s, %s, NOW())
+            """,
+            "params": (user_id, bin_id, waste_type, waste_count, points_earned, image_url),
+        },
+        *_rollup_operations(carbon_saved),
+        {
+            "query": """
+                UPDATE users 
+                SET current_points = current_points + %s,
+                    total_recycled_items = total_recycled_items + %s,
+                    carbon_saved_g = carbon_saved_g + %s
+                WHERE user_id = %s
+            """,
+            "params": (points_earned, waste_count, carbon_saved, user_id),
+        },
+        {
+            # MySQL applies single-table SET clauses left to right, so the
+            # status check already sees the incremented fill level
+            "query": """
+                UPDATE smart_bins 
+                SET current_fill_level = current_fill_level + %s,
+                    status = IF(current_fill_level >= max_capacity, 'full', status)
+                WHERE bin_id = %s
+            """,
+            "params": (waste_count, bin_id),
+        },
+        {
+            "query": """
+                SELECT u.current_points, u.total_recycled_items, u.carbon_saved_g,
+                       b.current_fill_level, b.max_capacity, b.status AS bin_status
+                FROM users u, smart_bins b
+                WHERE u.user_id = %s AND b.bin_id = %s
+            """,
+            "params": (user_id, bin_id),
+            "fetch": "one",
+        },
+    ]
+    results = db.run_transaction(operations)
+    log_id, totals = results[0], results[-1]
+    result = {"log_id": log_id}
+    result.update(totals or {})
+    
+    # Write the committed totals through to the record caches
+    if totals:
+        user_totals = {
+            "current_points": totals["current_points"],
+            "total_recycled_items": totals["total_recycled_items"],
+            "carbon_saved_g": totals["carbon_saved_g"],
+        }
+        db.user_cache.update_tag(user_id, user_totals)
+        db.leaderboard.apply_totals(user_id, **user_totals)
+        db.bin_cache.update(bin_id, {
+            "current_fill_level": totals["current_fill_level"],
+            "status": totals["bin_status"],
+        })
+    return result
+
+
+def update_waste_log_replica(db: DatabaseHelper, log_id: int, replica_url: str) -> bool:
+    """Record where a waste log's frame was replicated once its background upload finishes."""
+    query = "UPDATE waste_logs SET image_replica_url = %s WHERE log_id = %s"
+    db.execute_query(query, (replica_url, log_id), commit=True)
     return True
 
 
-# ── Waste Log Operations ────────────────────────────────────────
+def update_waste_log_replica_by_event(db: DatabaseHelper, event_id: str, replica_url: str) -> bool:
+    """Record the replica URL of a journaled disposal's log row."""
+    query = "UPDATE waste_logs SET image_replica_url = %s WHERE event_id = %s"
+    db.execute_query(query, (replica_url, event_id), commit=True)
+    return True
 
-def insert_waste_log(db: DatabaseHelper, user_id: int, bin_id: int, waste_type: str, 
-                     waste_count: int, points_earned: int, image_url: str = None) -> int:
-    """Insert a new waste disposal log with optional image URL."""
-    query = """
-        INSERT INTO waste_logs (user_id, bin_id, waste_type, waste_count, 
-                               points_earned, image_url, detected_at)
-        VALUES (%s, %s, %s, %s, %s, %s, NOW())
+
+# Keyset cursors are "<detected_at>,<log_id>" of the last row on a page
+LOG_CURSOR_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def format_log_cursor(row: Dict) -> str:
+    """Build the cursor that continues after a history row."""
+    return f"{row['timestamp'].strftime(LOG_CURSOR_FORMAT)},{row['log_id']}"
+
+
+def parse_log_cursor(cursor: str) -> tuple:
+    """
+    Parse a "<detected_at>,<log_id>" cursor.
+    
+    Raises:
+        ValueError: if the cursor is malformed
     """
-    return db.execute_query(query, (user_id, bin_id, waste_type, waste_count, 
-                                   points_earned, image_url), commit=True)
+    timestamp, _, log_id = cursor.rpartition(',')
+    return datetime.strptime(timestamp.strip(), LOG_CURSOR_FORMAT), int(log_id)
 
 
-def get_user_history(db: DatabaseHelper, user_id: int, limit: int = 10) -> List[Dict]:
-    """Get user's recent waste disposal history."""
-    query = """
+def _user_history_query(user_id: int, limit: int, before: tuple = None) -> tuple:
+    """The hot-table history query and its params (also what explain_log_queries checks)."""
+    # Served by idx_waste_logs_user_time alone as a backward range scan: the
+    # index holds every selected column, so no row is read and nothing is sorted
+    params = [user_id]
+    keyset = ""
+    if before:
+        keyset = "AND (detected_at < %s OR (detected_at = %s AND log_id < %s))"
+        params += [before[0], before[0], before[1]]
+    query = f"""
         SELECT log_id, user_id, waste_type, waste_count, points_earned, 
                image_url, detected_at as timestamp
         FROM waste_logs
-        WHERE user_id = %s
-        ORDER BY timestamp DESC
+        WHERE user_id = %s {keyset}
+        ORDER BY detected_at DESC, log_id DESC
+        LIMIT %s
+    """
+    params.append(limit)
+    return query, tuple(params)
+
+
+def get_user_history(db: DatabaseHelper, user_id: int, limit: int = 10,
+                     before: tuple = None) -> List[Dict]:
+    """
+    Get user's recent waste disposal history, newest first.
+    
+    Args:
+        before: Optional (detected_at, log_id) keyset cursor; only rows
+                strictly older than it are returned
+    """
+    rows = db.execute_query(*_user_history_query(user_id, limit, before), fetch_all=True)
+    # Archived months are older than the table's rows (archiving stops short
+    # of any month the write-behind journal still has to flush into)
+    if db.archive and len(rows) < limit:
+        rows += db.archive.user_history(user_id, limit - len(rows), before)
+    return rows
+
+
+def _recent_logs_query(limit: int, before: tuple = None) -> tuple:
+    """The hot-table recent-logs query and its params (also what explain_log_queries checks)."""
+    # STRAIGHT_JOIN keeps waste_logs as the driving table so idx_waste_logs_time
+    # (which covers every waste_logs column selected) feeds the ORDER BY ... LIMIT
+    # directly; users are joined by primary key
+    params = []
+    keyset = ""
+    if before:
+        keyset = "WHERE (wl.detected_at < %s OR (wl.detected_at = %s AND wl.log_id < %s))"
+        params += [before[0], before[0], before[1]]
+    query = f"""
+        SELECT wl.log_id, wl.user_id, wl.waste_type, wl.waste_count, 
+               wl.points_earned, wl.image_url, wl.detected_at as timestamp,
+               u.full_name as user_name
+        FROM waste_logs wl
+        STRAIGHT_JOIN users u ON wl.user_id = u.user_id
+        {keyset}
+        ORDER BY wl.detected_at DESC, wl.log_id DESC
         LIMIT %s
     """
-    return db.execute_query(query, (user_id, limit), fetch_all=True)
+    params.append(limit)
+    return query, tuple(params)
+
+
+def get_recent_logs(db: DatabaseHelper, limit: int = 20, before: tuple = None) -> List[Dict]:
+    """
+    Get recent waste logs from all users with the user's name, newest first.
+    
+    Args:
+        before: Optional (detected_at, log_id) keyset cursor
+    """
+    rows = db.execute_query(*_recent_logs_query(limit, before), fetch_all=True)
+    while db.archive and len(rows) < limit:
+        archived = db.archive.recent_logs(limit - len(rows), before)
+        if not archived:
+            break
+        rows += _with_user_names(db, archived)
+        before = (archived[-1]["timestamp"], archived[-1]["log_id"])
+    return rows
+
+
+def _with_user_names(db: DatabaseHelper, rows: List[Dict]) -> List[Dict]:
+    """Add user_name to archived rows, dropping users that no longer exist (as the JOIN would)."""
+    user_ids = sorted({row["user_id"] for row in rows})
+    query = f"SELECT user_id, full_name FROM users WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})"
+    names = {user["user_id"]: user["full_name"]
+             for user in db.execute_query(query, tuple(user_ids), fetch_all=True)}
+    return [dict(row, user_name=names[row["user_id"]]) for row in rows if row["user_id"] in names]
+
+
+# ── Bulk Export ─────────────────────────────────────────────────
+
+def export_waste_logs(db: DatabaseHelper, since: datetime, until: datetime,
+                      bin_id: int = None, department: str = None,
+                      batch_size: int = 1000) -> Iterator[List[Dict]]:
+    """
+    Waste logs with since <= detected_at < until, oldest first, in batches
+    of dicts with the user's name and department. Archived months come
+    first, then the table, streamed through an unbuffered cursor.
+    """
+    if db.archive and db.archive.months() and since < db.archive.hot_since():
+        users = {user["user_id"]: user for user in db.execute_query(
+            "SELECT user_id, full_name, department FROM users", fetch_all=True)}
+        user_ids = None
+        if department is not None:
+            user_ids = [user_id for user_id, user in users.items() if user["department"] == department]
+        for rows in db.archive.export(since, until, bin_id, user_ids, batch_size):
+            yield [{
+                "log_id": row["log_id"],
+                "detected_at": row["timestamp"],
+                "user_id": row["user_id"],
+                "user_name": users[row["user_id"]]["full_name"],
+                "department": users[row["user_id"]]["department"],
+                "bin_id": row["bin_id"],
+                "waste_type": row["waste_type"],
+                "waste_count": row["waste_count"],
+                "points_earned": row["points_earned"],
+                "image_url": row["image_url"],
+            } for row in rows if row["user_id"] in users]
+
+    # Walks idx_waste_logs_time in order, so rows stream without a filesort
+    clauses = ["wl.detected_at >= %s", "wl.detected_at < %s"]
+    params = [since, until]
+    if bin_id is not None:
+        clauses.append("wl.bin_id = %s")
+        params.append(bin_id)
+    if department is not None:
+        clauses.append("u.department = %s")
+        params.append(department)
+    query = f"""
+        SELECT wl.log_id, wl.detected_at, wl.user_id, u.full_name AS user_name,
+               u.department, wl.bin_id, wl.waste_type, wl.waste_count,
+               wl.points_earned, wl.image_url
+        FROM waste_logs wl
+        STRAIGHT_JOIN users u ON u.user_id = wl.user_id
+        WHERE {" AND ".join(clauses)}
+        ORDER BY wl.detected_at, wl.log_id
+    """
+    yield from db.stream_query(query, tuple(params), batch_size)
+
+
+# ── Log Archive ─────────────────────────────────────────────────
+
+def archive_waste_logs(db: DatabaseHelper, before: datetime, chunk: int = 1000) -> Dict[str, int]:
+    """
+    Move every whole month of waste_logs older than ``before`` (a month
+    start) into db.archive, oldest month first.
+    
+    Callers must not pass a ``before`` later than the month of any
+    disposal still waiting in a write-behind journal. Rows that land in an
+    archived month anyway (a journal replayed after a long outage) are
+    picked up by the next run, which starts from the oldest row left in
+    the table and merges them into the month's file.
+    
+    Each month is streamed from MySQL ``chunk`` rows at a time. Its file
+    is fsynced before its rows are deleted, by primary key in chunks of
+    ``chunk`` so no long lock is held. If the run stops in between, the
+    next run archives the remaining rows into the same file. Stats buckets
+    are left alone, so reports keep covering archived months.
+    
+    Returns:
+        Rows archived per month ("YYYY-MM")
+    """
+    oldest = db.execute_query("SELECT MIN(detected_at) AS oldest FROM waste_logs",
+                              fetch_one=True)["oldest"]
+    archived = {}
+    month = month_start(oldest) if oldest else before
+    while month < before:
+        end = next_month(month)
+        # Range scan on idx_waste_logs_time
+        batches = db.stream_query("""
+            SELECT log_id, user_id, bin_id, waste_type, waste_count, points_earned,
+                   image_url, image_replica_url, detected_at, event_id
+            FROM waste_logs
+            WHERE detected_at >= %s AND detected_at < %s
+        """, (month, end), chunk)
+        log_ids = db.archive.write_month(month, batches).tolist()
+        for start in range(0, len(log_ids), chunk):
+            part = log_ids[start:start + chunk]
+            db.execute_query(f"DELETE FROM waste_logs WHERE log_id IN ({', '.join(['%s'] * len(part))})",
+                             tuple(part), commit=True)
+        if log_ids:
+            archived[f"{month:%Y-%m}"] = len(log_ids)
+        month = end
+    return archived
+
+
+def explain_log_queries(db: DatabaseHelper, user_id: int = 1) -> Dict[str, Any]:
+    """
+    EXPLAIN the history and recent-logs queries (first and follow-up pages)
+    and flag plans that fall back to a filesort or a full table scan, or
+    read waste_logs rows instead of only the covering index.
+    """
+    cursor = (datetime.now(), 2 ** 31 - 1)
+    # The exact statements get_user_history / get_recent_logs run
+    plans = {
+        "user_history": _user_history_query(user_id, 10),
+        "user_history_page": _user_history_query(user_id, 10, cursor),
+        "recent_logs": _recent_logs_query(20),
+        "recent_logs_page": _recent_logs_query(20, cursor),
+    }
+    
+    report = {}
+    for name, (query, params) in plans.items():
+        rows = db.execute_query("EXPLAIN " + query, params, fetch_all=True)
+        log_row = next((r for r in rows if r.get('table') in ('waste_logs', 'wl')), rows[0])
+        # A join reports "Using temporary; Using filesort" on its first row
+        extras = "; ".join(r.get('Extra') or '' for r in rows)
+        extra = log_row.get('Extra') or ''
+        # "Using index condition" (pushdown) still reads rows; only "Using index" is index-only
+        covering = "Using index" in (part.strip() for part in extra.split(";"))
+        report[name] = {
+            "key": log_row.get('key'),
+            "access_type": log_row.get('type'),
+            "rows_examined": log_row.get('rows'),
+            "extra": extra,
+            "index_only": covering,
+            "ok": log_row.get('type') != 'ALL' and 'filesort' not in extras and covering,
+        }
+    return report
+
+
+# ── Write-Behind Disposal Batches ───────────────────────────────
+
+# Errors that retrying cannot fix: the disposal journal applies such a
+# batch event by event and sets the failing events aside
+JOURNAL_REJECT_ERRORS = (IntegrityError, DataError)
+
+
+def disposal_journal_ready(db: DatabaseHelper) -> bool:
+    """True once add_disposal_journal.sql has run (checkpoint table and waste_logs.event_id)."""
+    query = """
+        SELECT
+            (SELECT COUNT(*) FROM information_schema.tables
+             WHERE table_schema = DATABASE() AND table_name = 'disposal_journal_checkpoints') AS checkpoints,
+            (SELECT COUNT(*) FROM information_schema.columns
+             WHERE table_schema = DATABASE() AND table_name = 'waste_logs'
+               AND column_name = 'event_id') AS event_ids
+    """
+    row = db.execute_query(query, fetch_one=True)
+    return bool(row["checkpoints"] and row["event_ids"])
+
+
+def get_journal_checkpoint(db: DatabaseHelper, journal_name: str) -> int:
+    """Last journal sequence number applied to the database (0 if none)."""
+    query = "SELECT applied_seq FROM disposal_journal_checkpoints WHERE journal_name = %s"
+    row = db.execute_query(query, (journal_name,), fetch_one=True)
+    return row["applied_seq"] if row else 0
+
+
+def _values_table(columns: tuple, rows: List[tuple]) -> tuple:
+    """A derived table of literal rows, for joining per-key increments into an UPDATE."""
+    first = ", ".join(f"%s AS {column}" for column in columns)
+    rest = ", ".join(["%s"] * len(columns))
+    selects = [f"SELECT {first}"] + [f"SELECT {rest}"] * (len(rows) - 1)
+    return " UNION ALL ".join(selects), tuple(value for row in rows for value in row)
+
+
+def apply_disposal_batch(db: DatabaseHelper, journal_name: str, events: List[Dict],
+                         last_seq: int) -> Dict[str, Dict]:
+    """
+    Write a batch of journaled disposals and advance the journal checkpoint
+    in one transaction.
+    
+    The batch costs a fixed number of statements whatever its size: one
+    multi-row INSERT into waste_logs, one upsert per stats table with the
+    batch pre-aggregated by bucket, one UPDATE of users and of smart_bins
+    with increments summed per user and per bin, and the read-backs.
+    
+    Each event needs event_id, user_id, bin_id, waste_type, waste_count,
+    points_earned, carbon_saved, department, image_url and detected_at
+    ("YYYY-MM-DD HH:MM:SS").
+    
+    Events whose event_id is already in waste_logs or in its archived month
+    (a batch replayed after a crash) are skipped; the UNIQUE key on
+    event_id fails the batch if one slips in between the check and the
+    insert.
+    
+    Caches are not touched; see write_through_disposal_totals.
+    
+    Returns:
+        Dict with log_ids (event_id -> log_id), users (user_id -> totals)
+        and bins (bin_id -> fill level, capacity and status)
+    """
+    applied = {}
+    if events:
+        query = "SELECT event_id, log_id FROM waste_logs WHERE event_id IN ({})".format(
+            ", ".join(["%s"] * len(events)))
+        rows = db.execute_query(query, tuple(e["event_id"] for e in events), fetch_all=True)
+        applied = {row["event_id"]: row["log_id"] for row in rows}
+        hot_since = db.archive.hot_since() if db.archive else None
+        if hot_since:
+            # A replayed event may have been applied and archived since
+            by_month = {}
+            for e in events:
+                if e["event_id"] not in applied and e["detected_at"] < f"{hot_since:%Y-%m-%d}":
+                    month = datetime.strptime(e["detected_at"][:7], "%Y-%m")
+                    by_month.setdefault(month, []).append(e["event_id"])
+            for month, event_ids in by_month.items():
+                applied.update(db.archive.find_events(month, event_ids))
+        events = [e for e in events if e["event_id"] not in applied]
+
+    operations = []
+    if events:
+        operations.append({
+            "query": """
+                INSERT INTO waste_logs (event_id, user_id, bin_id, waste_type, waste_count,
+                                       points_earned, image_url, detected_at)
+                VALUES """ + ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(events)),
+            "params": tuple(value for e in events for value in (
+                e["event_id"], e["user_id"], e["bin_id"], e["waste_type"], e["waste_count"],
+                e["points_earned"], e["image_url"], e["detected_at"])),
+        })
+
+        # Same buckets as _HOUR_BUCKET / _DAY_BUCKET, computed from detected_at
+        for table, bucket_of in (("waste_stats_hourly", lambda at: at[:13] + ":00:00"),
+                                 ("waste_stats_daily", lambda at: at[:10])):
+            buckets = {}
+            for e in events:
+                key = (bucket_of(e["detected_at"]), e["bin_id"], e["waste_type"], e["department"] or "")
+                totals = buckets.setdefault(key, [0, 0, 0, 0.0])
+                totals[0] += 1
+                totals[1] += e["waste_count"]
+                totals[2] += e["points_earned"]
+                totals[3] += e["carbon_saved"]
+            operations.append({
+                "query": f"""
+                    INSERT INTO {table} (bucket_start, bin_id, waste_type, department,
+                                         disposals, items, points, carbon_g)
+                    VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(buckets))}
+                    ON DUPLICATE KEY UPDATE
+                        disposals = disposals + VALUES(disposals),
+                        items = items + VALUES(items),
+                        points = points + VALUES(points),
+                        carbon_g = carbon_g + VALUES(carbon_g)
+                """,
+                "params": tuple(value for key, totals in buckets.items() for value in key + tuple(totals)),
+            })
+
+        users, bins = {}, {}
+        for e in events:
+            totals = users.setdefault(e["user_id"], [0, 0, 0.0])
+            totals[0] += e["points_earned"]
+            totals[1] += e["waste_count"]
+            totals[2] += e["carbon_saved"]
+            bins[e["bin_id"]] = bins.get(e["bin_id"], 0) + e["waste_count"]
+
+        user_table, user_params = _values_table(
+            ("user_id", "points", "items", "carbon"),
+            [(user_id,) + tuple(totals) for user_id, totals in users.items()])
+        bin_table, bin_params = _values_table(
+            ("bin_id", "items"), list(bins.items()))
+        bin_ids = tuple(bins)
+        in_bins = ", ".join(["%s"] * len(bin_ids))
+        in_users = ", ".join(["%s"] * len(users))
+        in_events = ", ".join(["%s"] * len(events))
+        operations += [
+            {
+                "query": f"""
+                    UPDATE users u
+                    JOIN ({user_table}) d ON d.user_id = u.user_id
+                    SET u.current_points = u.current_points + d.points,
+                        u.total_recycled_items = u.total_recycled_items + d.items,
+                        u.carbon_saved_g = u.carbon_saved_g + d.carbon
+                """,
+                "params": user_params,
+            },
+            {
+                "query": f"""
+                    UPDATE smart_bins b
+                    JOIN ({bin_table}) d ON d.bin_id = b.bin_id
+                    SET b.current_fill_level = b.current_fill_level + d.items
+                """,
+                "params": bin_params,
+            },
+            {
+                # Separate statement: multi-table SET order is not guaranteed
+                "query": f"""
+                    UPDATE smart_bins SET status = 'full'
+                    WHERE bin_id IN ({in_bins}) AND current_fill_level >= max_capacity
+                """,
+                "params": bin_ids,
+            },
+            {
+                "query": f"SELECT event_id, log_id FROM waste_logs WHERE event_id IN ({in_events})",
+                "params": tuple(e["event_id"] for e in events),
+                "fetch": "all",
+            },
+            {
+                "query": f"""
+                    SELECT user_id, current_points, total_recycled_items, carbon_saved_g
+                    FROM users WHERE user_id IN ({in_users})
+                """,
+                "params": tuple(users),
+                "fetch": "all",
+            },
+            {
+                "query": f"""
+                    SELECT bin_id, current_fill_level, max_capacity, status AS bin_status
+                    FROM smart_bins WHERE bin_id IN ({in_bins})
+                """,
+                "params": bin_ids,
+                "fetch": "all",
+            },
+        ]
+
+    operations.append({
+        "query": """
+            INSERT INTO disposal_journal_checkpoints (journal_name, applied_seq)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE applied_seq = GREATEST(applied_seq, VALUES(applied_seq))
+        """,
+        "params": (journal_name, last_seq),
+    })
+    results = db.run_transaction(operations)
+    if not events:
+        return {"log_ids": applied, "users": {}, "bins": {}}
+
+    log_rows, user_rows, bin_rows = results[-4], results[-3], results[-2]
+    result = {
+        "log_ids": dict(applied, **{row["event_id"]: row["log_id"] for row in log_rows}),
+        "users": {row["user_id"]: row for row in user_rows},
+        "bins": {row["bin_id"]: row for row in bin_rows},
+    }
+
+    return result
+
+
+def write_through_disposal_totals(db: DatabaseHelper, result: Dict[str, Dict]) -> None:
+    """
+    Write the totals an applied disposal batch read back through to the
+    record caches and the leaderboard.
+    
+    Run as the journal drops the batch from its pending events (its
+    on_applied hook), so a reply adding pending increments to the cached
+    row never sees the batch in both.
+    """
+    for user_id, row in result["users"].items():
+        user_totals = {
+            "current_points": row["current_points"],
+            "total_recycled_items": row["total_recycled_items"],
+            "carbon_saved_g": row["carbon_saved_g"],
+        }
+        db.user_cache.update_tag(user_id, user_totals)
+        db.leaderboard.apply_totals(user_id, **user_totals)
+    for bin_id, row in result["bins"].items():
+        db.bin_cache.update(bin_id, {
+            "current_fill_level": row["current_fill_level"],
+            "status": row["bin_status"],
+        })
+
+
+# ── Bin Telemetry ───────────────────────────────────────────────
+
+_TELEMETRY_COLUMNS = ("battery_status", "sensor_fill_percent", "uptime_s")
+
+
+def apply_bin_telemetry(db: DatabaseHelper, readings: List[Dict]) -> None:
+    """
+    Write the latest heartbeat of many bins in one UPDATE.
+    
+    Each reading has bin_id, last_seen_at and any of battery_status,
+    sensor_fill_percent and uptime_s; a missing value keeps the stored one.
+    Unknown bin ids match no row and are ignored.
+    """
+    if not readings:
+        return
+    columns = ("bin_id",) + _TELEMETRY_COLUMNS + ("last_seen_at",)
+    table, params = _values_table(
+        columns, [tuple(reading.get(column) for column in columns) for reading in readings])
+    assignments = ", ".join(f"b.{column} = COALESCE(d.{column}, b.{column})"
+                            for column in _TELEMETRY_COLUMNS)
+    query = f"""
+        UPDATE smart_bins b
+        JOIN ({table}) d ON d.bin_id = b.bin_id
+        SET {assignments}, b.last_seen_at = d.last_seen_at
+    """
+    db.execute_query(query, params, commit=True)
+
+    for reading in readings:
+        db.bin_cache.update(reading["bin_id"], {
+            column: reading[column] for column in columns[1:] if reading.get(column) is not None
+        })
+
+
+# ── Statistics Rollups ──────────────────────────────────────────
+
+STATS_TABLES = {"hourly": "waste_stats_hourly", "daily": "waste_stats_daily"}
+STATS_DIMENSIONS = {"bin": "bin_id", "waste_type": "waste_type", "department": "department"}
+
+
+def backfill_stats(db: DatabaseHelper, carbon_per_item: float,
+                   since: datetime = None) -> Dict[str, int]:
+    """
+    Rebuild the hourly and daily stats buckets from waste_logs.
+    
+    Carbon is not stored per log, so it is recomputed as
+    waste_count * carbon_per_item. The rebuild runs in one transaction;
+    concurrent disposals wait on its locks rather than being double counted.
+    
+    Args:
+        since: Only rebuild buckets from this time on, keeping older ones
+               (e.g. those of months moved to the log archive)
+    
+    Returns:
+        Number of bucket rows per granularity
+    """
+    since = since or datetime(1970, 1, 1)
+    operations = []
+    for table, bucket in (("waste_stats_hourly", _HOUR_BUCKET), ("waste_stats_daily", _DAY_BUCKET)):
+        operations.append({"query": f"DELETE FROM {table} WHERE bucket_start >= %s", "params": (since,)})
+        operations.append({
+            "query": f"""
+                INSERT INTO {table} (bucket_start, bin_id, waste_type, department,
+                                     disposals, items, points, carbon_g)
+                SELECT {bucket} AS bucket, wl.bin_id, wl.waste_type,
+                       COALESCE(u.department, '') AS dept,
+                       COUNT(*), SUM(wl.waste_count), SUM(wl.points_earned),
+                       SUM(wl.waste_count) * %s
+                FROM waste_logs wl
+                JOIN users u ON u.user_id = wl.user_id
+                WHERE wl.detected_at >= %s
+                GROUP BY bucket, wl.bin_id, wl.waste_type, dept
+            """,
+            "params": (carbon_per_item, since),
+        })
+        operations.append({"query": f"SELECT COUNT(*) AS buckets FROM {table}", "fetch": "one"})
+    results = db.run_transaction(operations)
+    return {"hourly": results[2]["buckets"], "daily": results[5]["buckets"]}
+
+
+def _stats_filters(since: datetime, bin_id: int = None, waste_type: str = None,
+                   department: str = None) -> tuple:
+    clauses = ["bucket_start >= %s"]
+    params = [since]
+    for column, value in (("bin_id", bin_id), ("waste_type", waste_type), ("department", department)):
+        if value is not None:
+            clauses.append(f"{column} = %s")
+            params.append(value)
+    return " AND ".join(clauses), params
+
+
+def get_stats_trend(db: DatabaseHelper, granularity: str, since: datetime,
+                    bin_id: int = None, waste_type: str = None,
+                    department: str = None) -> List[Dict]:
+    """Per-bucket totals over time, optionally filtered to one bin/type/department."""
+    where, params = _stats_filters(since, bin_id, waste_type, department)
+    query = f"""
+        SELECT bucket_start, SUM(disposals) AS disposals, SUM(items) AS items,
+               SUM(points) AS points, SUM(carbon_g) AS carbon_g
+        FROM {STATS_TABLES[granularity]}
+        WHERE {where}
+        GROUP BY bucket_start
+        ORDER BY bucket_start
+    """
+    return db.execute_query(query, tuple(params), fetch_all=True)
+
+
+def get_stats_breakdown(db: DatabaseHelper, dimension: str, since: datetime) -> List[Dict]:
+    """Totals since a date grouped by bin, waste_type or department."""
+    column = STATS_DIMENSIONS[dimension]
+    query = f"""
+        SELECT {column} AS `key`, SUM(disposals) AS disposals, SUM(items) AS items,
+               SUM(points) AS points, SUM(carbon_g) AS carbon_g
+        FROM waste_stats_daily
+        WHERE bucket_start >= %s
+        GROUP BY {column}
+        ORDER BY items DESC
+    """
+    return db.execute_query(query, (since,), fetch_all=True)
+
+
+def get_carbon_totals(db: DatabaseHelper, since: datetime = None) -> Dict:
+    """Overall disposal, item, point and carbon totals from the daily buckets."""
+    query = """
+        SELECT COALESCE(SUM(disposals), 0) AS disposals, COALESCE(SUM(items), 0) AS items,
+               COALESCE(SUM(points), 0) AS points, COALESCE(SUM(carbon_g), 0) AS carbon_g
+        FROM waste_stats_daily
+        WHERE bucket_start >= %s
+    """
+    return db.execute_query(query, (since or datetime(1970, 1, 1),), fetch_one=True)
+
+
+def get_hourly_bin_items(db: DatabaseHelper, since: datetime) -> List[Dict]:
+    """Items disposed per bin per hour from the hourly buckets, for fill forecasting."""
+    query = """
+        SELECT bucket_start, bin_id, SUM(items) AS items
+        FROM waste_stats_hourly
+        WHERE bucket_start >= %s
+        GROUP BY bucket_start, bin_id
+    """
+    return db.execute_query(query, (since,), fetch_all=True)
 
 
 # ── Leaderboard Operations ──────────────────────────────────────
 
-def get_leaderboard(db: DatabaseHelper, limit: int = 10) -> List[Dict]:
-    """Get top users by points."""
+def get_leaderboard_users(db: DatabaseHelper) -> List[Dict]:
+    """Get every ranked user, used to (re)build the in-process leaderboard."""
     query = """
         SELECT user_id, full_name, username, current_points, 
                total_recycled_items, carbon_saved_g, role
         FROM users
         WHERE role = 'user'
-        ORDER BY current_points DESC
-        LIMIT %s
     """
-    return db.execute_query(query, (limit,), fetch_all=True)
+    return db.execute_query(query, fetch_all=True)
+
+
+def ensure_leaderboard(db: DatabaseHelper) -> None:
+    """Load the leaderboard index if it is empty, due for a resync or changed elsewhere."""
+    if db.leaderboard.needs_load():
+        stamp = db.leaderboard.stamp()
+        db.leaderboard.load(get_leaderboard_users(db), stamp)
+
+
+def get_leaderboard(db: DatabaseHelper, limit: int = 10) -> List[Dict]:
+    """Get top users by points (served from the in-process index)."""
+    ensure_leaderboard(db)
+    return db.leaderboard.top(limit)
+
+
+def get_user_rank(db: DatabaseHelper, user_id: int) -> Optional[Dict]:
+    """Get a user's leaderboard position, or None if they are not ranked."""
+    ensure_leaderboard(db)
+    return db.leaderboard.rank(user_id)
+
+
+def verify_leaderboard(db: DatabaseHelper, repair: bool = False) -> Dict[str, Any]:
+    """Check the in-process leaderboard against MySQL, optionally reloading it."""
+    ensure_leaderboard(db)
+    stamp = db.leaderboard.stamp()
+    rows = get_leaderboard_users(db)
+    report = db.leaderboard.verify(rows)
+    if repair and not report["consistent"]:
+        db.leaderboard.load(rows, stamp)
+        report["repaired"] = True
+    return report
 
 
 # ── Smart Bin Operations ────────────────────────────────────────
@@ -208,20 +1260,16 @@ def get_all_bins(db: DatabaseHelper) -> List[Dict]:
 
 
 def get_bin_by_id(db: DatabaseHelper, bin_id: int) -> Optional[Dict]:
-    """Get specific bin details."""
+    """Get specific bin details (served from the record cache when warm)."""
+    bin_info = db.bin_cache.get(bin_id)
+    if bin_info is not None:
+        return bin_info
+    
     query = "SELECT * FROM smart_bins WHERE bin_id = %s"
-    return db.execute_query(query, (bin_id,), fetch_one=True)
-
-
-def update_bin_fill_level(db: DatabaseHelper, bin_id: int, increment: int) -> bool:
-    """Increment bin fill level."""
-    query = """
-        UPDATE smart_bins 
-        SET current_fill_level = current_fill_level + %s
-        WHERE bin_id = %s
-    """
-    db.execute_query(query, (increment, bin_id), commit=True)
-    return True
+    bin_info = db.execute_query(query, (bin_id,), fetch_one=True)
+    if bin_info:
+        db.bin_cache.put(bin_id, bin_info)
+    return bin_info
 
 
 def reset_bin_fill_level(db: DatabaseHelper, bin_id: int) -> bool:
@@ -233,11 +1281,5 @@ def reset_bin_fill_level(db: DatabaseHelper, bin_id: int) -> bool:
         WHERE bin_id = %s
     """
     db.execute_query(query, (bin_id,), commit=True)
-    return True
-
-
-def update_bin_status(db: DatabaseHelper, bin_id: int, status: str) -> bool:
-    """Update bin status (active/full/maintenance)."""
-    query = "UPDATE smart_bins SET status = %s WHERE bin_id = %s"
-    db.execute_query(query, (status, bin_id), commit=True)
+    db.bin_cache.update(bin_id, {"current_fill_level": 0, "status": "active"})
     return True
@@ -0,0 +1,484 @@
+"""
+Disposal Journal Module for BARAQA_BIN Smart Waste Management System
+Write-behind buffer for disposals: each event is appended to a local
+journal and fsynced before the bin is answered, then a flusher applies
+journaled events to MySQL in batches
+"""
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, Any, List, Tuple
+from metrics import fields
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Journals a process may claim: one per concurrently running web worker
+MAX_JOURNALS = 64
+
+
+class DisposalJournal:
+    """
+    Append-only journal of disposal events with a background flusher.
+
+    Durability: ``append`` returns only after the event's line is fsynced.
+    Concurrent appenders share fsyncs (group commit), so a burst of bins
+    costs a few disk flushes instead of one per request.
+
+    Exactly-once apply: every event carries a unique event_id, and
+    ``apply_batch`` must skip events whose event_id is already in MySQL.
+    After a crash every event after the file's checkpoint header is
+    replayed, so points are neither lost nor awarded twice. ``apply_batch``
+    also records the batch's last sequence number; ``start`` reads it back
+    before accepting appends so numbering carries on past it even if the
+    journal directory was lost.
+
+    Each process claims its own journal file (``<name>-<host>-<n>.log``)
+    with an exclusive lock; a restarted worker claims a free file and
+    replays it. The host name keeps journals on different machines from
+    sharing a checkpoint row.
+    """
+
+    def __init__(self, directory: str,
+                 apply_batch: Callable[[str, List[Dict], int], Any],
+                 load_checkpoint: Callable[[str], int],
+                 on_flushed: Optional[Callable[[List[Dict], Any], None]] = None,
+                 on_applied: Optional[Callable[[Any], None]] = None,
+                 name: str = "disposals", flush_interval: float = 0.25,
+                 max_batch: int = 200, compact_bytes: int = 4 * 1024 * 1024,
+                 compact_interval: float = 60.0,
+                 permanent_errors: Tuple[type, ...] = (), backoff_max: float = 30.0,
+                 host: Optional[str] = None):
+        """
+        Args:
+            directory: Where journal files live
+            apply_batch: ``apply_batch(journal_name, events, last_seq)`` writes
+                         the events and the checkpoint in one transaction
+            load_checkpoint: ``load_checkpoint(journal_name)`` returns the last
+                             applied sequence number (0 if none)
+            on_flushed: Called with the events and apply_batch's result after
+                        each committed batch
+            on_applied: Called with apply_batch's result while the batch
+                        leaves the pending events, under the lock
+                        ``pending_totals`` takes (e.g. to write committed
+                        totals through to caches)
+            flush_interval: Longest time an event waits before a flush starts
+            max_batch: Events per flush transaction
+            compact_bytes: Rewrite the journal once it grows past this size
+            compact_interval: Also rewrite it when a flush empties it, at
+                              most this often (bounds what a restart replays)
+            permanent_errors: Exceptions meaning an event can never be applied
+                              (e.g. a foreign-key violation); the batch is then
+                              applied event by event and the failing ones are
+                              moved to ``<journal>.rejected``
+            backoff_max: Cap on the delay between failed flushes
+            host: Host part of the journal name (default: this machine's name)
+        """
+        self.directory = directory
+        self.apply_batch = apply_batch
+        self.load_checkpoint = load_checkpoint
+        self.on_flushed = on_flushed
+        self.on_applied = on_applied
+        self.name = name
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.compact_bytes = compact_bytes
+        self.compact_interval = compact_interval
+        self.permanent_errors = permanent_errors
+        self.backoff_max = backoff_max
+        # Checkpoint rows are keyed by journal name (VARCHAR(100))
+        host = (host or socket.gethostname()).split(".")[0]
+        self.host = re.sub(r"[^A-Za-z0-9_-]", "-", host)[:60] or "localhost"
+
+        self.journal_name = None
+        self.path = None
+        self._file = None
+        self._next_seq = 1
+        self._checkpoint = None     # last applied seq, read from MySQL by start()
+        self._pending = OrderedDict()   # seq -> event, oldest first
+        self._by_event_id = {}          # event_id -> seq for pending events
+        self._user_deltas = {}          # user_id -> [points, items, carbon]
+        self._bin_deltas = {}           # bin_id -> items
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._sync_lock = threading.Lock()
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._compacted_at = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            "appended": 0,
+            "recovered": 0,
+            "flushed": 0,
+            "batches": 0,
+            "fsyncs": 0,
+            "flush_failures": 0,
+            "rejected": 0,
+            "compactions": 0,
+            "flush_ms_total": 0.0,
+            "max_pending": 0,
+        }
+
+    # ── Lifecycle ───────────────────────────────────────────────
+
+    def start(self) -> None:
+        """
+        Claim a journal file, load its unapplied events and MySQL's
+        checkpoint, then start the flusher.
+
+        Raises:
+            Exception: Whatever ``load_checkpoint`` raises; the journal is
+                       released again and must not be appended to
+        """
+        if self._thread:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._claim_file()
+        try:
+            self._recover()
+            self._load_checkpoint()
+        except Exception:
+            self._file.close()
+            self._file = None
+            raise
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flusher, name="disposal-journal", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush what can be flushed within ``timeout``; the rest stays journaled."""
+        if not self._thread:
+            return
+        deadline = time.monotonic() + timeout
+        with self._wakeup:
+            self._wakeup.notify_all()
+        while self._pending and self._thread.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        self._thread = None
+        self._file.close()
+
+    # ── Public API ──────────────────────────────────────────────
+
+    def append(self, event: Dict[str, Any]) -> int:
+        """
+        Durably record a disposal event.
+
+        The event needs event_id, user_id, bin_id, waste_count,
+        points_earned and carbon_saved; any other keys are kept and handed
+        back to ``apply_batch`` and ``on_flushed``.
+
+        Returns:
+            The event's sequence number
+        """
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            # journaled_at is written too, so a replayed event keeps its age
+            record = dict(event, seq=seq, journaled_at=time.time())
+            self._file.write(json.dumps(record, separators=(',', ':'), default=str).encode() + b"\n")
+            self._file.flush()
+            self._written_seq = seq
+            self._add_pending(record)
+            self._stats["appended"] += 1
+            if len(self._pending) >= self.max_batch:
+                self._wakeup.notify()
+        self._sync(seq)
+        return seq
+
+    def pending_totals(self, user_id: int = None, bin_id: int = None,
+                       committed: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+        """
+        Increments journaled but not yet in MySQL, for answering a bin with
+        its user's and its own up-to-date totals.
+
+        If given, ``committed`` is called under the same lock as
+        ``on_applied`` and its result added as "committed", so a batch being
+        flushed is counted either there or in the increments, never in both.
+        """
+        with self._lock:
+            points, items, carbon = self._user_deltas.get(user_id, (0, 0, 0.0))
+            totals = {
+                "points": points,
+                "items": items,
+                "carbon": carbon,
+                "fill": self._bin_deltas.get(bin_id, 0),
+            }
+            if committed is not None:
+                totals["committed"] = committed()
+            return totals
+
+    def set_image_replica(self, event_id: str, replica_url: str) -> bool:
+        """
+        Attach a replicated image URL to an event that is still pending.
+
+        Returns:
+            True if the event was pending (it reaches on_flushed carrying
+            image_replica_url); False if it has already been flushed
+        """
+        with self._lock:
+            seq = self._by_event_id.get(event_id)
+            if seq is None:
+                return False
+            self._pending[seq]["image_replica_url"] = replica_url
+            return True
+
+    def oldest_pending_at(self) -> Optional[float]:
+        """When the oldest event not yet in MySQL was journaled (epoch seconds), or None."""
+        with self._lock:
+            oldest = next(iter(self._pending.values()), None)
+            return oldest["journaled_at"] if oldest else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pending depth, flush counters and timing."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["pending"] = len(self._pending)
+            snapshot["checkpoint"] = self._checkpoint
+            oldest = next(iter(self._pending.values()), None)
+        batches = snapshot["batches"] or 1
+        snapshot.update({
+            "journal": self.journal_name,
+            "oldest_pending_age_s": (round(time.time() - oldest["journaled_at"], 2)
+                                     if oldest else None),
+            "avg_batch_size": round(snapshot["flushed"] / batches, 2),
+            "avg_flush_ms": round(snapshot["flush_ms_total"] / batches, 2),
+        })
+        return snapshot
+
+    # ── Journal file ────────────────────────────────────────────
+
+    @staticmethod
+    def _open_locked(path: str):
+        """Open a journal file for appending, or return None if another process holds it."""
+        handle = open(path, "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                return None
+        return handle
+
+    def _claim_file(self) -> None:
+        for index in range(MAX_JOURNALS):
+            journal_name = f"{self.name}-{self.host}-{index}"
+            path = os.path.join(self.directory, journal_name + ".log")
+            handle = self._open_locked(path)
+            if handle is not None:
+                self.journal_name, self.path, self._file = journal_name, path, handle
+                return
+        raise RuntimeError(f"All {MAX_JOURNALS} disposal journals in {self.directory} are in use")
+
+    def _recover(self) -> None:
+        """Load events after the file's checkpoint header; apply_batch skips any already applied."""
+        self._file.seek(0)
+        floor = 0
+        for line in self._file.read().splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn final line: that append never returned to its caller
+                continue
+            if "checkpoint" in record:
+                floor = max(floor, record["checkpoint"])
+            elif record["seq"] > floor:
+                self._add_pending(record)
+                self._stats["recovered"] += 1
+        self._next_seq = max([floor] + list(self._pending)) + 1
+        self._written_seq = self._synced_seq = self._next_seq - 1
+        if self._pending:
+            logger.info("Replaying disposal journal", extra=fields(
+                journal=self.journal_name, events=len(self._pending)))
+
+    def _sync(self, seq: int) -> None:
+        # Group commit: one fsync covers every line written before it started
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            with self._lock:
+                covered = self._written_seq
+            os.fsync(self._file.fileno())
+            self._synced_seq = covered
+            with self._lock:
+                self._stats["fsyncs"] += 1
+
+    def _compact(self) -> None:
+        """
+        Atomically replace the journal with a checkpoint header plus the
+        pending events. Caller holds both locks, so no append or fsync can
+        interleave with the swap.
+        """
+        temp_path = self.path + ".tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        # Locked before the rename so the journal is never claimable by another process
+        temp = self._open_locked(temp_path)
+        # Replayed events may sit below MySQL's checkpoint; keep them above the header
+        floor = self._checkpoint
+        first = next(iter(self._pending), None)
+        if first is not None:
+            floor = min(floor, first - 1)
+        temp.write(json.dumps({"checkpoint": floor}).encode() + b"\n")
+        for record in self._pending.values():
+            temp.write(json.dumps(record, separators=(',', ':'), default=str).encode() + b"\n")
+        temp.flush()
+        os.fsync(temp.fileno())
+        os.replace(temp_path, self.path)
+        if hasattr(os, "O_DIRECTORY"):
+            directory = os.open(self.directory, os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+        self._file.close()
+        self._file = temp
+        self._synced_seq = self._written_seq
+        self._compacted_at = time.monotonic()
+        self._stats["compactions"] += 1
+
+    def _reject(self, record: Dict[str, Any], error: Exception) -> None:
+        with open(self.path.replace(".log", ".rejected"), "ab") as rejected:
+            rejected.write(json.dumps(dict(record, error=str(error)), default=str).encode() + b"\n")
+            rejected.flush()
+            os.fsync(rejected.fileno())
+        logger.error("Disposal event rejected", extra=fields(
+            event_id=record.get('event_id'), error=error))
+
+    # ── Pending bookkeeping (caller holds the lock) ─────────────
+
+    def _add_pending(self, record: Dict[str, Any]) -> None:
+        record.setdefault("journaled_at", time.time())
+        self._pending[record["seq"]] = record
+        self._by_event_id[record["event_id"]] = record["seq"]
+        self._apply_delta(record, 1)
+        if len(self._pending) > self._stats["max_pending"]:
+            self._stats["max_pending"] = len(self._pending)
+
+    def _remove_pending(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            if self._pending.pop(record["seq"], None) is None:
+                continue
+            self._by_event_id.pop(record["event_id"], None)
+            self._apply_delta(record, -1)
+
+    def _apply_delta(self, record: Dict[str, Any], sign: int) -> None:
+        user = self._user_deltas.setdefault(record["user_id"], [0, 0, 0.0])
+        user[0] += sign * record["points_earned"]
+        user[1] += sign * record["waste_count"]
+        user[2] += sign * record["carbon_saved"]
+        if not user[1]:
+            del self._user_deltas[record["user_id"]]
+        fill = self._bin_deltas.get(record["bin_id"], 0) + sign * record["waste_count"]
+        if fill:
+            self._bin_deltas[record["bin_id"]] = fill
+        else:
+            self._bin_deltas.pop(record["bin_id"], None)
+
+    # ── Flusher ─────────────────────────────────────────────────
+
+    def _flusher(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                batch = self._next_batch()
+                if batch:
+                    self._flush(batch)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                with self._lock:
+                    self._stats["flush_failures"] += 1
+                delay = min(self.backoff_max, self.flush_interval * (2 ** failures))
+                logger.warning("Disposal journal flush failed", extra=fields(
+                    failures=failures, retry_in_s=round(delay, 1), error=e))
+                self._stop.wait(delay)
+
+    def _load_checkpoint(self) -> None:
+        checkpoint = self.load_checkpoint(self.journal_name)
+        with self._lock:
+            self._checkpoint = checkpoint
+            # Sequence numbers must keep rising past anything MySQL has
+            # seen, also when the journal file was lost
+            self._next_seq = max(self._next_seq, checkpoint + 1)
+            self._written_seq = self._synced_seq = self._next_seq - 1
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        with self._wakeup:
+            if not self._pending:
+                self._wakeup.wait(self.flush_interval)
+            oldest = next(iter(self._pending.values()), None)
+            if oldest is None:
+                return []
+            # Let a batch build up unless it is already full or due
+            age = time.time() - oldest["journaled_at"]
+            if len(self._pending) < self.max_batch and age < self.flush_interval and not self._stop.is_set():
+                self._wakeup.wait(self.flush_interval - age)
+            return [dict(r) for r in list(self._pending.values())[:self.max_batch]]
+
+    def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self._commit(batch, batch[-1]["seq"])
+        except self.permanent_errors:
+            # One bad event must not hold the rest back: apply them one by
+            # one. A transient error here propagates and the flusher retries
+            # from the first event still pending.
+            for record in batch:
+                try:
+                    self._commit([record], record["seq"])
+                except self.permanent_errors as e:
+                    self._reject(record, e)
+                    # Advance the checkpoint past it with an empty batch
+                    self._commit([], record["seq"], rejected=[record])
+
+    def _commit(self, batch: List[Dict[str, Any]], last_seq: int,
+                rejected: List[Dict[str, Any]] = ()) -> None:
+        started = time.monotonic()
+        result = self.apply_batch(self.journal_name, batch, last_seq)
+        elapsed_ms = (time.monotonic() - started) * 1000
+
+        with self._sync_lock, self._lock:
+            done = list(batch) + list(rejected)
+            # Pick up replica URLs attached while the batch was in flight
+            replicas = {
+                r["event_id"]: self._pending[r["seq"]]["image_replica_url"] for r in batch
+                if self._pending.get(r["seq"], {}).get("image_replica_url")
+            }
+            self._remove_pending(done)
+            if self.on_applied and batch:
+                try:
+                    self.on_applied(result)
+                except Exception:
+                    logger.exception("Disposal journal on_applied error")
+            self._checkpoint = max(self._checkpoint, last_seq)
+            self._stats["flushed"] += len(batch)
+            self._stats["rejected"] += len(rejected)
+            self._stats["batches"] += 1 if batch else 0
+            self._stats["flush_ms_total"] += elapsed_ms
+            drained_due = (not self._pending and
+                           time.monotonic() - self._compacted_at >= self.compact_interval)
+            if drained_due or self._file.tell() > self.compact_bytes:
+                self._compact()
+
+        for record in batch:
+            if record["event_id"] in replicas:
+                record["image_replica_url"] = replicas[record["event_id"]]
+        if self.on_flushed and batch:
+            try:
+                self.on_flushed(batch, result)
+            except Exception:
+                logger.exception("Disposal journal on_flushed error")
@@ -0,0 +1,147 @@
+"""
+Live Event Stream Module for BARAQA_BIN Smart Waste Management System
+Fans out disposal, bin and leaderboard changes to Server-Sent Events clients
+"""
+import asyncio
+import itertools
+import json
+import queue
+import threading
+from typing import AsyncIterator, Iterator, Optional, Dict, Any
+
+
+class _Subscriber:
+    """One connected WSGI client: its pending messages and whether it fell behind."""
+
+    def __init__(self, queue_size: int):
+        self.messages = queue.Queue(maxsize=queue_size)
+        self.dropped = threading.Event()
+
+    def offer(self, message: str) -> bool:
+        try:
+            self.messages.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def drop(self) -> None:
+        self.dropped.set()
+
+
+class _AsyncSubscriber:
+    """One connected ASGI client, fed from any thread via its event loop."""
+
+    def __init__(self, queue_size: int, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.messages = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def offer(self, message: str) -> bool:
+        # qsize() read off-loop is approximate; it only decides backpressure
+        if self.messages.qsize() >= self.messages.maxsize:
+            return False
+        self.loop.call_soon_threadsafe(self._put, message)
+        return True
+
+    def _put(self, message: str) -> None:
+        try:
+            self.messages.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+
+    def drop(self) -> None:
+        self.dropped = True
+
+
+class EventBroker:
+    """
+    In-process publish/subscribe hub for Server-Sent Events.
+
+    Every subscriber owns a bounded queue. Publishing never blocks a request:
+    a subscriber whose queue is full is dropped, and its browser reconnects
+    through EventSource and re-fetches current state.
+    """
+
+    def __init__(self, subscriber_queue_size: int = 100, keepalive: float = 15.0):
+        self.subscriber_queue_size = subscriber_queue_size
+        self.keepalive = keepalive
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._stats = {"published": 0, "delivered": 0, "dropped_subscribers": 0}
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Send an event to every connected client."""
+        message = self._format(next(self._ids), event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._stats["published"] += 1
+
+        delivered = 0
+        for subscriber in subscribers:
+            if subscriber.offer(message):
+                delivered += 1
+                continue
+            subscriber.drop()
+            with self._lock:
+                self._subscribers.discard(subscriber)
+                self._stats["dropped_subscribers"] += 1
+
+        with self._lock:
+            self._stats["delivered"] += delivered
+
+    def stream(self) -> Iterator[str]:
+        """
+        Generator yielding SSE frames for one client until it disconnects
+        or is dropped. Sends a comment line every ``keepalive`` seconds so
+        idle proxies keep the connection open.
+        """
+        subscriber = _Subscriber(self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+
+        try:
+            yield "retry: 3000\n: connected\n\n"
+            while not subscriber.dropped.is_set():
+                try:
+                    message = subscriber.messages.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield message
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    async def astream(self) -> AsyncIterator[str]:
+        """
+        Async counterpart of ``stream`` for ASGI servers: waiting clients
+        cost a queue on the event loop instead of a blocked thread.
+        """
+        subscriber = _AsyncSubscriber(self.subscriber_queue_size, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscriber)
+
+        try:
+            yield "retry: 3000\n: connected\n\n"
+            while not subscriber.dropped:
+                try:
+                    message = await asyncio.wait_for(subscriber.messages.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield message
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["subscribers"] = len(self._subscribers)
+        return snapshot
+
+    @staticmethod
+    def _format(event_id: int, event: str, data: Optional[Dict[str, Any]]) -> str:
+        payload = json.dumps(data, default=str, separators=(',', ':'))
+        return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,192 @@
+"""
+Fill Forecast Module for BARAQA_BIN Smart Waste Management System
+Estimates every bin's fill rate and time to full at once from the hourly
+stats buckets, and ranks bins into a collection plan
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Dict, Any, List
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Beyond this a bin is reported as not filling up, not as full in 40 years
+MAX_FORECAST_HOURS = 365 * 24
+
+
+def hour_index(moment: datetime) -> int:
+    """Whole hours since 1970-01-01 for a naive local timestamp."""
+    return int((moment - _EPOCH).total_seconds() // 3600)
+
+
+class FillForecaster:
+    """
+    Items per hour for each bin, kept as a (bins x window_hours) NumPy matrix
+    of hourly item counts whose last column is the current hour.
+
+    ``refresh`` slides the window forward and re-reads only the buckets from
+    the last refreshed hour on (the one that was still filling up then), so
+    each refresh costs one bins query and one small range query however long
+    the window is. Fill rate is an exponentially weighted mean over the
+    window, giving recent hours ``half_life_hours`` more say, and time to
+    full is the remaining capacity over that rate, all as array operations
+    over every bin.
+
+    Forecasts are cached for ``refresh_interval`` seconds or until
+    ``invalidate`` is called.
+    """
+
+    def __init__(self, load_bins: Callable[[], List[Dict]],
+                 load_hourly_items: Callable[[datetime], List[Dict]],
+                 window_hours: int = 14 * 24, half_life_hours: float = 72.0,
+                 refresh_interval: float = 60.0):
+        self._load_bins = load_bins
+        self._load_hourly_items = load_hourly_items
+        self.window_hours = window_hours
+        self.half_life_hours = half_life_hours
+        self.refresh_interval = refresh_interval
+
+        self._rows = {}
+        self._items = np.zeros((0, window_hours))
+        self._first_hour = None
+        self._synced_hour = None
+        self._forecast = []
+        self._generated_at = None
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+        self._stats = {"refreshes": 0, "buckets_loaded": 0, "last_refresh_ms": 0.0}
+
+    def plan(self, horizon_hours: float = 24.0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Bins ordered by time to full, each marked ``full`` (collect now),
+        ``due`` (full within ``horizon_hours``) or ``ok``.
+        """
+        with self._lock:
+            if (self._refreshed_at is None
+                    or time.monotonic() - self._refreshed_at >= self.refresh_interval):
+                self._refresh(datetime.now())
+            forecast = self._forecast
+            generated_at = self._generated_at
+
+        bins = []
+        for entry in forecast[:limit]:
+            hours = entry["hours_to_full"]
+            if entry["status"] == "full" or hours == 0:
+                priority = "full"
+            elif hours is not None and hours <= horizon_hours:
+                priority = "due"
+            else:
+                priority = "ok"
+            bins.append(dict(entry, priority=priority))
+        return {
+            "generated_at": generated_at.isoformat(),
+            "horizon_hours": horizon_hours,
+            "collect": sum(1 for entry in bins if entry["priority"] != "ok"),
+            "bins": bins,
+        }
+
+    def invalidate(self) -> None:
+        """Recompute on the next plan, e.g. after a bin is emptied."""
+        with self._lock:
+            self._refreshed_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["bins"] = len(self._rows)
+            snapshot["window_hours"] = self.window_hours
+            snapshot["age_s"] = (round(time.monotonic() - self._refreshed_at, 1)
+                                 if self._refreshed_at is not None else None)
+        return snapshot
+
+    def _refresh(self, now: datetime) -> None:
+        started = time.perf_counter()
+        current = hour_index(now)
+        bins = self._load_bins()
+        for bin_info in bins:
+            if bin_info["bin_id"] not in self._rows:
+                self._rows[bin_info["bin_id"]] = len(self._rows)
+        if self._items.shape[0] < len(self._rows):
+            grown = np.zeros((len(self._rows), self.window_hours))
+            grown[:self._items.shape[0]] = self._items
+            self._items = grown
+        self._advance(current)
+
+        # The last refreshed hour was still open then: replace, don't add
+        since = self._first_hour if self._synced_hour is None else max(self._synced_hour, self._first_hour)
+        buckets = self._load_hourly_items(_EPOCH + timedelta(hours=since))
+        self._items[:, since - self._first_hour:] = 0
+        known = [bucket for bucket in buckets if bucket["bin_id"] in self._rows]
+        if known:
+            rows = np.fromiter((self._rows[bucket["bin_id"]] for bucket in known), np.intp, len(known))
+            columns = np.fromiter((hour_index(bucket["bucket_start"]) - self._first_hour
+                                   for bucket in known), np.intp, len(known))
+            items = np.fromiter((bucket["items"] for bucket in known), np.float64, len(known))
+            np.add.at(self._items, (rows, columns), items)
+        self._synced_hour = current
+
+        self._forecast = self._compute(bins, now)
+        self._generated_at = now
+        self._refreshed_at = time.monotonic()
+        self._stats["refreshes"] += 1
+        self._stats["buckets_loaded"] += len(buckets)
+        self._stats["last_refresh_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _advance(self, current: int) -> None:
+        """Shift the window so its last column is the current hour."""
+        first = current - self.window_hours + 1
+        if self._first_hour is None:
+            self._first_hour = first
+            return
+        shift = first - self._first_hour
+        if shift <= 0:
+            return
+        if shift >= self.window_hours:
+            self._items[:] = 0
+        else:
+            self._items[:, :-shift] = self._items[:, shift:]
+            self._items[:, -shift:] = 0
+        self._first_hour = first
+
+    def _compute(self, bins: List[Dict], now: datetime) -> List[Dict]:
+        if not bins:
+            return []
+        rows = np.array([self._rows[bin_info["bin_id"]] for bin_info in bins], np.intp)
+        fill = np.array([bin_info["current_fill_level"] or 0 for bin_info in bins], np.float64)
+        capacity = np.array([bin_info["max_capacity"] or 0 for bin_info in bins], np.float64)
+        full = np.array([bin_info["status"] == "full" for bin_info in bins])
+
+        ages = np.arange(self.window_hours - 1, -1, -1, dtype=np.float64)
+        weights = 0.5 ** (ages / self.half_life_hours)
+        # Only part of the current hour has happened yet
+        exposure = np.ones(self.window_hours)
+        exposure[-1] = max((now.minute * 60 + now.second) / 3600, 1 / 60)
+        rate = (self._items[rows] @ weights) / (weights @ exposure)
+
+        remaining = np.maximum(capacity - fill, 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            hours = np.where(rate > 0, remaining / rate, np.inf)
+        hours[full | (remaining == 0)] = 0
+        hours[hours > MAX_FORECAST_HOURS] = np.inf
+        fill_percent = np.where(capacity > 0, fill / np.where(capacity > 0, capacity, 1) * 100, 0)
+
+        forecast = []
+        for position in np.argsort(hours, kind="stable"):
+            bin_info = bins[position]
+            finite = bool(np.isfinite(hours[position]))
+            forecast.append({
+                "bin_id": bin_info["bin_id"],
+                "bin_name": bin_info.get("bin_name"),
+                "location": bin_info.get("location"),
+                "status": bin_info["status"],
+                "current_fill_level": bin_info["current_fill_level"],
+                "max_capacity": bin_info["max_capacity"],
+                "fill_percent": round(float(fill_percent[position]), 1),
+                "fill_rate_per_hour": round(float(rate[position]), 3),
+                "hours_to_full": round(float(hours[position]), 1) if finite else None,
+                "predicted_full_at": ((now + timedelta(hours=float(hours[position]))).isoformat()
+                                      if finite else None),
+            })
+        return forecast
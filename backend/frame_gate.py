@@ -0,0 +1,102 @@
+"""
+Frame Gate Module for BARAQA_BIN Smart Waste Management System
+Remembers a small grayscale fingerprint of each bin's recent frames so a
+frame showing the same chute as before is answered without the detector
+"""
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Tuple
+
+import numpy as np
+
+
+class FrameGate:
+    """
+    Per-bin change detection on ``size`` x ``size`` block-mean fingerprints.
+
+    A fingerprint is the frame decoded to grayscale at reduced JPEG scale,
+    averaged down to a ``size`` x ``size`` grid and centred on its mean, so
+    a uniform exposure shift does not count as change. The change between
+    two frames is the mean absolute difference of their fingerprints as a
+    fraction of full scale (0.0 identical, 1.0 black vs white).
+
+    ``check`` compares a frame with the last ``history`` frames the bin sent
+    through detection; below ``threshold`` it is unchanged and the caller
+    can answer "no new item". State is per process.
+    """
+
+    def __init__(self, threshold: float = 0.015, history: int = 4, size: int = 16):
+        self.threshold = threshold
+        self.history = history
+        self.size = size
+        self._recent = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, file_bytes: bytes) -> Optional[np.ndarray]:
+        """
+        Returns:
+            size x size float32 array, or None if the bytes cannot be decoded
+        """
+        # OpenCV is only imported by processes that gate frames
+        from image_preprocess import decode_grayscale
+
+        gray = decode_grayscale(file_bytes, self.size)
+        if gray is None or gray.shape[0] < self.size or gray.shape[1] < self.size:
+            return None
+        size = self.size
+        rows, cols = gray.shape[0] // size, gray.shape[1] // size
+        blocks = gray[:rows * size, :cols * size].reshape(size, rows, size, cols)
+        grid = blocks.mean(axis=(1, 3), dtype=np.float32)
+        return grid - grid.mean()
+
+    def check(self, bin_id: int, file_bytes: bytes) -> Tuple[bool, Optional[np.ndarray], Optional[float]]:
+        """
+        Compare a frame with the bin's recent frames and count the outcome.
+
+        Returns:
+            (unchanged, fingerprint, change); fingerprint and change are None
+            when the frame cannot be decoded, which is never gated
+        """
+        fingerprint = self.fingerprint(file_bytes)
+        change = None
+        if fingerprint is not None:
+            with self._lock:
+                recent = list(self._recent.get(bin_id, ()))
+            if recent:
+                change = min(float(np.abs(fingerprint - previous).mean()) / 255.0
+                             for previous in recent)
+        unchanged = change is not None and change < self.threshold
+
+        with self._lock:
+            counts = self._stats.setdefault(bin_id, {"frames": 0, "skipped": 0})
+            counts["frames"] += 1
+            if unchanged:
+                counts["skipped"] += 1
+        return unchanged, fingerprint, change
+
+    def remember(self, bin_id: int, fingerprint: Optional[np.ndarray]) -> None:
+        """Keep a frame that went through detection as a reference for the bin."""
+        if fingerprint is None:
+            return
+        with self._lock:
+            recent = self._recent.get(bin_id)
+            if recent is None:
+                recent = self._recent[bin_id] = deque(maxlen=self.history)
+            recent.append(fingerprint)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            bins = {
+                str(bin_id): {
+                    "frames": counts["frames"],
+                    "skipped": counts["skipped"],
+                    "skip_rate": round(counts["skipped"] / counts["frames"], 4),
+                }
+                for bin_id, counts in sorted(self._stats.items())
+            }
+        return {
+            "threshold": self.threshold,
+            "history": self.history,
+            "bins": bins,
+        }
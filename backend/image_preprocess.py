@@ -0,0 +1,162 @@
+"""
+Image Preprocessing Module for BARAQA_BIN Smart Waste Management System
+Decodes uploaded JPEGs straight to RGB at the smallest resolution the
+detector can use without upsampling
+"""
+import struct
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+
+# EfficientDet-Lite0 consumes 320x320 frames
+MODEL_INPUT_SIZE = 320
+
+# libjpeg can decode at 1/2, 1/4 and 1/8 scale during IDCT, which is far
+# cheaper than a full decode followed by a resize
+_REDUCED_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+
+_REDUCED_GRAYSCALE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+}
+
+# OpenCV >= 4.10 can emit RGB directly from the decoder
+_RGB_FLAG = getattr(cv2, 'IMREAD_COLOR_RGB', None)
+
+# Start-of-frame markers that carry the image dimensions
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from a JPEG header without decoding it.
+
+    Returns:
+        Dimensions, or None if the data is not a parseable JPEG
+    """
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    pos = 2
+    length = len(data)
+    while pos + 4 <= length:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        segment_length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        if marker in _SOF_MARKERS:
+            if pos + 9 > length:
+                return None
+            height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+            return width, height
+        if marker == 0xDA:
+            # Start of scan reached without a frame header
+            return None
+        pos += 2 + segment_length
+    return None
+
+
+def reduction_factor(width: int, height: int, target: int = MODEL_INPUT_SIZE) -> int:
+    """Largest JPEG scale-down (1, 2, 4 or 8) that keeps both sides >= target."""
+    for factor in (8, 4, 2):
+        if width // factor >= target and height // factor >= target:
+            return factor
+    return 1
+
+
+def decode_for_inference(file_bytes: bytes,
+                         target: int = MODEL_INPUT_SIZE) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Decode image bytes into an RGB array sized for the detector.
+
+    JPEGs larger than the model input are decoded at reduced resolution;
+    other formats fall back to a full decode.
+
+    Returns:
+        (image_rgb, scale) where multiplying coordinates on image_rgb by
+        scale maps them back to the original frame, or None if the bytes
+        cannot be decoded
+    """
+    nparr = np.frombuffer(file_bytes, np.uint8)
+
+    factor = 1
+    dimensions = jpeg_dimensions(file_bytes)
+    if dimensions:
+        factor = reduction_factor(*dimensions, target=target)
+
+    flags = _REDUCED_FLAGS.get(factor, cv2.IMREAD_COLOR)
+    if _RGB_FLAG is not None:
+        image = cv2.imdecode(nparr, flags | _RGB_FLAG)
+        if image is None:
+            return None
+    else:
+        image = cv2.imdecode(nparr, flags)
+        if image is None:
+            return None
+        # In-place swap avoids allocating a second full-size buffer
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+
+    return image, factor
+
+
+def scale_box(box: list, scale: int) -> list:
+    """Map an [x, y, width, height] box from decoded to original coordinates."""
+    if scale == 1:
+        return box
+    return [value * scale for value in box]
+
+
+def decode_grayscale(file_bytes: bytes, target: int) -> Optional[np.ndarray]:
+    """
+    Decode image bytes to grayscale at the largest JPEG reduction that
+    keeps both sides >= ``target``.
+
+    Returns:
+        2-D uint8 array, or None if the bytes cannot be decoded
+    """
+    factor = 1
+    dimensions = jpeg_dimensions(file_bytes)
+    if dimensions:
+        factor = reduction_factor(*dimensions, target=target)
+    return cv2.imdecode(np.frombuffer(file_bytes, np.uint8),
+                        _REDUCED_GRAYSCALE_FLAGS.get(factor, cv2.IMREAD_GRAYSCALE))
+
+
+def make_thumbnail(file_bytes: bytes, size: int = 160, quality: int = 75) -> Optional[bytes]:
+    """
+    Encode a JPEG thumbnail whose longer side is at most ``size`` pixels.
+    Decodes at reduced resolution like decode_for_inference.
+
+    Returns:
+        JPEG bytes, or None if the image cannot be decoded
+    """
+    factor = 1
+    dimensions = jpeg_dimensions(file_bytes)
+    if dimensions:
+        factor = reduction_factor(*dimensions, target=size)
+    image = cv2.imdecode(np.frombuffer(file_bytes, np.uint8),
+                         _REDUCED_FLAGS.get(factor, cv2.IMREAD_COLOR))
+    if image is None:
+        return None
+
+    height, width = image.shape[:2]
+    ratio = size / max(width, height)
+    if ratio < 1:
+        image = cv2.resize(image, (max(1, round(width * ratio)), max(1, round(height * ratio))),
+                           interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes() if ok else None
@@ -0,0 +1,139 @@
+"""
+Image Store Module for BARAQA_BIN Smart Waste Management System
+Keeps every detected frame on local disk, addressed by its content digest
+and sharded into subdirectories, with thumbnails generated once on demand
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Optional, Dict, Any
+
+from metrics import fields
+
+logger = logging.getLogger(__name__)
+
+# image_digest() output: 128-bit BLAKE2b in hex
+_DIGEST = re.compile(r"^[0-9a-f]{32}$")
+
+IMAGE_URL_PREFIX = "/api/images/"
+
+
+def image_digest(image_bytes: bytes) -> str:
+    """Content address of an uploaded image (hex BLAKE2b, 128-bit)."""
+    return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+
+def is_digest(value: str) -> bool:
+    return bool(_DIGEST.match(value))
+
+
+def image_url(digest: str) -> str:
+    """URL stored in waste_logs.image_url for a locally stored frame."""
+    return IMAGE_URL_PREFIX + digest
+
+
+class ImageStore:
+    """
+    Content-addressed JPEG files under ``root``.
+
+    A frame with digest ``3fa9...`` lives at ``root/3f/a9/3fa9....jpg`` and
+    its thumbnail next to it as ``3fa9....thumb.jpg``. Files are written to a
+    temporary name and renamed into place, so readers never see a partial
+    image and concurrent writers of the same frame are harmless.
+    """
+
+    def __init__(self, root: str, thumbnail_size: int = 160, thumbnail_quality: int = 75):
+        self.root = root
+        self.thumbnail_size = thumbnail_size
+        self.thumbnail_quality = thumbnail_quality
+        self._lock = threading.Lock()
+        self._stats = {
+            "stored": 0,
+            "already_stored": 0,
+            "bytes_written": 0,
+            "thumbnails_generated": 0,
+        }
+
+    def path(self, digest: str, thumbnail: bool = False) -> str:
+        if not is_digest(digest):
+            raise ValueError(f"Not an image digest: {digest!r}")
+        suffix = ".thumb.jpg" if thumbnail else ".jpg"
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + suffix)
+
+    def put(self, digest: str, image_bytes: bytes) -> str:
+        """
+        Store a frame under its digest (a no-op if it is already stored).
+
+        Returns:
+            The frame's image URL
+        """
+        path = self.path(digest)
+        if os.path.exists(path):
+            self._count("already_stored")
+        else:
+            self._write(path, image_bytes)
+            with self._lock:
+                self._stats["stored"] += 1
+                self._stats["bytes_written"] += len(image_bytes)
+        return image_url(digest)
+
+    def full_path(self, digest: str) -> Optional[str]:
+        """Path of a stored frame, or None if it is not in the store."""
+        path = self.path(digest)
+        return path if os.path.exists(path) else None
+
+    def thumbnail_path(self, digest: str) -> Optional[str]:
+        """
+        Path of a frame's thumbnail, generating it on first request.
+
+        Returns:
+            None if the frame is not stored or cannot be decoded
+        """
+        path = self.path(digest, thumbnail=True)
+        if os.path.exists(path):
+            return path
+        source = self.full_path(digest)
+        if source is None:
+            return None
+
+        # OpenCV is only imported by processes that make thumbnails
+        from image_preprocess import make_thumbnail
+
+        with open(source, "rb") as handle:
+            thumbnail = make_thumbnail(handle.read(), self.thumbnail_size, self.thumbnail_quality)
+        if thumbnail is None:
+            logger.warning("Cannot decode stored image", extra=fields(digest=digest))
+            return None
+        self._write(path, thumbnail)
+        self._count("thumbnails_generated")
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            os.fchmod(fd, 0o644)   # mkstemp creates 0600
+            # Unbuffered writes straight from the request's buffer, no copies.
+            # Not fsynced: the journal, not the image, is the durable record.
+            with os.fdopen(fd, "wb", buffering=0) as handle:
+                view = memoryview(data)
+                while view:
+                    view = view[handle.write(view):]
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
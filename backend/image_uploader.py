@@ -0,0 +1,192 @@
+"""
+Background Image Upload Module for BARAQA_BIN Smart Waste Management System
+Moves freeimage.host uploads off the request path using a bounded queue,
+a small worker pool and retry with exponential backoff
+"""
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Callable, Optional, Dict, Any
+from metrics import fields
+
+logger = logging.getLogger(__name__)
+
+
+class RetryableUploadError(Exception):
+    """Upload failed in a way that may succeed on a later attempt."""
+
+
+def upload_image(image_bytes: bytes, api_key: str, upload_url: str,
+                 timeout: float = 10.0) -> Optional[str]:
+    """
+    Upload binary image data to a freeimage.host compatible API.
+
+    Returns:
+        Hosted image URL, or None if the host rejected the image
+
+    Raises:
+        RetryableUploadError: on network errors, timeouts, 429 or 5xx replies
+    """
+    # Imported here: only processes that actually upload pay for requests
+    import requests
+
+    payload = {
+        'key': api_key,
+        'action': 'upload',
+        'format': 'json'
+    }
+    files = {'source': ('capture.jpg', image_bytes, 'image/jpeg')}
+
+    try:
+        response = requests.post(upload_url, data=payload, files=files, timeout=timeout)
+    except requests.RequestException as e:
+        raise RetryableUploadError(str(e)) from e
+
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RetryableUploadError(f"HTTP {response.status_code}")
+
+    if response.status_code == 200:
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if data.get('status_code') == 200:
+            return data['image']['url']
+    logger.warning("Upload rejected", extra=fields(http_status=response.status_code,
+                                                    body=response.text[:200]))
+    return None
+
+
+class ImageUploader:
+    """
+    Bounded upload queue served by a pool of worker threads.
+
+    Each job is retried with exponential backoff and jitter; when it finishes
+    ``on_complete(ref, url)`` is called with the hosted URL, or None if every
+    attempt failed. ``observer(outcome, seconds)``, if given, receives the
+    duration of every attempt ('uploaded', 'rejected' or 'retryable').
+    """
+
+    def __init__(self, api_key: str, upload_url: str,
+                 on_complete: Callable[[Any, Optional[str]], None],
+                 workers: int = 2, max_queue: int = 100, max_attempts: int = 4,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 timeout: float = 10.0,
+                 observer: Optional[Callable[[str, float], None]] = None):
+        self.api_key = api_key
+        self.upload_url = upload_url
+        self.on_complete = on_complete
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.observer = observer
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "uploaded": 0,
+            "failed": 0,
+            "retries": 0,
+        }
+
+    def start(self) -> None:
+        """Start the worker threads (idempotent)."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"image-uploader-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Let queued jobs drain for up to ``timeout`` seconds, then stop the workers."""
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def submit(self, image_bytes: bytes, ref: Any) -> bool:
+        """
+        Queue an image for upload without blocking.
+
+        Returns:
+            False if the queue is full and the job was not accepted
+        """
+        try:
+            self._queue.put_nowait((image_bytes, ref))
+        except queue.Full:
+            self._count("rejected")
+            return False
+        self._count("submitted")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth and upload outcome counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["queue_depth"] = self._queue.qsize()
+        snapshot["workers"] = len(self._threads)
+        return snapshot
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _observe(self, outcome: str, started: float) -> None:
+        if self.observer:
+            self.observer(outcome, time.perf_counter() - started)
+
+    def _upload_with_retry(self, image_bytes: bytes) -> Optional[str]:
+        for attempt in range(self.max_attempts):
+            started = time.perf_counter()
+            try:
+                url = upload_image(image_bytes, self.api_key, self.upload_url, self.timeout)
+                self._observe("uploaded" if url else "rejected", started)
+                return url
+            except RetryableUploadError as e:
+                self._observe("retryable", started)
+                logger.warning("Upload attempt failed", extra=fields(
+                    attempt=attempt + 1, max_attempts=self.max_attempts, error=e))
+                if attempt + 1 >= self.max_attempts:
+                    break
+                self._count("retries")
+                # Wakes early on shutdown so remaining attempts run without delay
+                self._stop.wait(self._backoff(attempt))
+        return None
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            try:
+                image_bytes, ref = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                url = self._upload_with_retry(image_bytes)
+            except Exception:
+                # An unexpected error is a failed upload, not a lost callback
+                logger.exception("Upload worker error", extra=fields(ref=ref))
+                url = None
+            try:
+                self._count("uploaded" if url else "failed")
+                self.on_complete(ref, url)
+            except Exception:
+                logger.exception("Upload on_complete error", extra=fields(ref=ref))
+            finally:
+                self._queue.task_done()
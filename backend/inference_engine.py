@@ -0,0 +1,608 @@
+"""
+Inference Engine Module for BARAQA_BIN Smart Waste Management System
+Runs detection on a pool of detector instances, either in worker threads
+(micro-batched) or in worker processes fed through shared memory
+
+NumPy and MediaPipe are imported on first use, and detectors are built on
+their first frame (or an explicit warm_up), so processes that never run
+detection never load the model.
+"""
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Callable, Optional, Dict, Any, List, Tuple
+from metrics import fields
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Largest frame decode_for_inference produces for an ESP32-CAM capture
+# (SVGA is not reduced), as uint8 RGB
+DEFAULT_SLOT_BYTES = 800 * 600 * 3
+
+# Side of the blank frame used to warm up detectors (EfficientDet-Lite0 input)
+WARMUP_FRAME_SIZE = 320
+
+# (label, score, x, y, width, height) in the coordinates of the frame passed in
+Detection = Tuple[str, float, int, int, int, int]
+
+
+def _warmup_frame() -> "np.ndarray":
+    import numpy as np
+    return np.zeros((WARMUP_FRAME_SIZE, WARMUP_FRAME_SIZE, 3), dtype=np.uint8)
+
+
+class InferenceOverloadedError(Exception):
+    """Raised when the inference queue is full and a frame cannot be accepted."""
+
+
+class CompactDetector:
+    """
+    MediaPipe ObjectDetector that takes RGB arrays and returns plain tuples,
+    so results are cheap to pickle between processes.
+    """
+
+    def __init__(self, model_path: str, score_threshold: float = 0.5):
+        from mediapipe.tasks import python
+        from mediapipe.tasks.python import vision
+
+        base_options = python.BaseOptions(model_asset_path=model_path)
+        options = vision.ObjectDetectorOptions(
+            base_options=base_options,
+            score_threshold=score_threshold
+        )
+        self.detector = vision.ObjectDetector.create_from_options(options)
+
+    def detect(self, image_rgb: "np.ndarray") -> Tuple[Detection, ...]:
+        import mediapipe as mp
+
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
+        result = self.detector.detect(mp_image)
+        detections = []
+        for detection in result.detections:
+            category = detection.categories[0]
+            bbox = detection.bounding_box
+            detections.append((category.category_name, float(category.score),
+                               bbox.origin_x, bbox.origin_y, bbox.width, bbox.height))
+        return tuple(detections)
+
+
+class InferenceEngine:
+    """
+    Pool of worker threads, each owning its own detector instance.
+
+    Frames wait in one queue. While another detector is idle, a worker
+    takes one frame at a time, so a frame is never held back from a free
+    detector. Once every other detector is busy, a worker that picks up a
+    frame also takes the frames queued behind it and waits up to
+    ``batch_window_ms`` for more (at most ``max_batch_size``), then runs
+    the batch back to back, resolving each caller's future as its result
+    is ready. Batch sizes and window waits are reported by stats() for
+    tuning throughput against tail latency.
+    """
+
+    def __init__(self, detector_factory: Callable[[], Any], workers: int = 2,
+                 max_batch_size: int = 8, batch_window_ms: float = 5.0,
+                 max_queue: int = 64):
+        """
+        Args:
+            detector_factory: Zero-argument callable returning a new detector
+                              exposing ``detect(image)``
+            workers: Number of worker threads / detector instances
+            max_batch_size: Upper bound on frames collected into one batch
+            batch_window_ms: How long a worker waits to fill a batch
+            max_queue: Frames allowed to wait before submissions are rejected
+        """
+        self.detector_factory = detector_factory
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000.0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._threads = []
+        self._idle = 0   # workers waiting for a frame
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._batch_sizes = [0] * (max_batch_size + 1)
+        self._stats = {
+            "frames": 0,
+            "batches": 0,
+            "rejected": 0,
+            "errors": 0,
+            "queue_wait_ms_total": 0.0,
+            "batch_wait_ms_total": 0.0,
+            "inference_ms_total": 0.0,
+            "max_queue_depth": 0,
+        }
+
+    def start(self) -> None:
+        """Create one detector per worker and start the workers (idempotent)."""
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                # Built here so a broken model path fails before any frame is queued
+                detector = self.detector_factory()
+                thread = threading.Thread(target=self._worker, args=(detector,),
+                                          name=f"inference-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def warm_up(self, timeout: Optional[float] = 60.0) -> None:
+        """Start the engine and run one blank frame per detector."""
+        self.start()
+        futures = [self.submit(_warmup_frame()) for _ in range(self.workers)]
+        for future in futures:
+            future.result(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the workers; frames still queued are failed."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        while True:
+            try:
+                _, future, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("Inference engine stopped"))
+
+    def submit(self, image) -> Future:
+        """
+        Queue a frame for detection, starting the engine on first use.
+
+        Returns:
+            Future resolved with the detector's result
+
+        Raises:
+            InferenceOverloadedError: if the queue is full
+        """
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((image, future, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise InferenceOverloadedError("Inference queue full")
+
+        depth = self._queue.qsize()
+        with self._lock:
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+        return future
+
+    def detect(self, image, timeout: Optional[float] = 30.0):
+        """Blocking detection: submit the frame and wait for its result."""
+        return self.submit(image).result(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, batch-size histogram and timing totals."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            histogram = {size: count for size, count in enumerate(self._batch_sizes) if count}
+        batches = snapshot["batches"] or 1
+        frames = snapshot["frames"] or 1
+        snapshot.update({
+            "queue_depth": self._queue.qsize(),
+            "workers": len(self._threads),
+            "batch_size_histogram": histogram,
+            "avg_batch_size": round(snapshot["frames"] / batches, 2),
+            "avg_batch_wait_ms": round(snapshot["batch_wait_ms_total"] / batches, 2),
+            "avg_queue_wait_ms": round(snapshot["queue_wait_ms_total"] / frames, 2),
+            "avg_inference_ms": round(snapshot["inference_ms_total"] / frames, 2),
+        })
+        return snapshot
+
+    def _collect_batch(self) -> Tuple[List[tuple], float]:
+        """
+        The next frame, plus the frames behind it if every other worker is
+        busy (none of them could start those sooner).
+
+        Returns:
+            (batch, seconds spent waiting in the batch window)
+        """
+        with self._lock:
+            self._idle += 1
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return [], 0.0
+        finally:
+            with self._lock:
+                self._idle -= 1
+
+        window_started = None
+        while len(batch) < self.max_batch_size:
+            with self._lock:
+                if self._idle:
+                    break
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            if window_started is None:
+                window_started = now
+            remaining = window_started + self.batch_window - now
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        waited = time.monotonic() - window_started if window_started is not None else 0.0
+        return batch, waited
+
+    def _worker(self, detector) -> None:
+        while not self._stop.is_set():
+            batch, waited = self._collect_batch()
+            if not batch:
+                continue
+
+            queue_wait = inference = 0.0
+            errors = 0
+            for image, future, enqueued in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                started = time.monotonic()
+                queue_wait += started - enqueued
+                try:
+                    future.set_result(detector.detect(image))
+                except Exception as e:
+                    errors += 1
+                    future.set_exception(e)
+                inference += time.monotonic() - started
+
+            with self._lock:
+                self._stats["frames"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["errors"] += errors
+                self._stats["queue_wait_ms_total"] += queue_wait * 1000
+                self._stats["batch_wait_ms_total"] += waited * 1000
+                self._stats["inference_ms_total"] += inference * 1000
+                self._batch_sizes[len(batch)] += 1
+
+
+def _process_worker(detector_factory: Callable[[], Any], shm_name: str, slot_bytes: int,
+                    tasks, results) -> None:
+    """Entry point of one inference process: detect frames until a None task arrives."""
+    import numpy as np
+
+    # Built on the first frame, so an idle worker never loads the model
+    detector = None
+    frames = shared_memory.SharedMemory(name=shm_name)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, slot, shape, pickled = task
+            started = time.monotonic()
+            try:
+                if detector is None:
+                    detector = detector_factory()
+                if pickled is not None:
+                    detections = detector.detect(pickled)
+                else:
+                    image = np.ndarray(shape, dtype=np.uint8, buffer=frames.buf,
+                                       offset=slot * slot_bytes)
+                    try:
+                        detections = detector.detect(image)
+                    finally:
+                        # No view may outlive the mapping when it is closed
+                        del image
+                results.put((task_id, True, detections, (time.monotonic() - started) * 1000))
+            except Exception as e:
+                results.put((task_id, False, f"{type(e).__name__}: {e}", 0.0))
+    finally:
+        frames.close()
+
+
+class ProcessInferenceEngine:
+    """
+    Pool of worker processes, each owning its own detector instance.
+
+    Detection runs outside the web process, so it neither competes with
+    request handling for the GIL nor depends on how many web threads run;
+    throughput scales with the number of cores given to ``processes``.
+
+    Frames are handed over through one shared-memory block split into
+    fixed-size slots: the web process copies the decoded RGB frame into a
+    free slot and sends only (task id, slot, shape) to a worker, which maps
+    the slot as an array without copying. Results come back as tuples of
+    ``Detection``. A frame too large for a slot is pickled instead.
+
+    Each worker has its own task queue and is sent frames while it has the
+    fewest in flight, so the engine knows which frames a worker holds. A
+    worker that dies (e.g. a crash inside the model) has its frames failed
+    and its slots freed, and is started again. A frame without a result
+    after ``task_timeout`` seconds is failed and its slot freed as well.
+
+    Call ``start`` before any other thread exists: workers are then forked,
+    which is cheap and does not re-import the web app. A worker builds its
+    detector on its first frame and imports MediaPipe itself, so the web
+    process never loads the model. Started later (lazily by ``submit``),
+    workers come from a fork server instead, because forking a process that
+    already runs threads can deadlock the child on a lock one of them held.
+    The fork server imports the program's main script again, so start the
+    engine up front when that script is the web app itself.
+    """
+
+    def __init__(self, detector_factory: Callable[[], Any], processes: int = 2,
+                 max_queue: int = 16, slot_bytes: int = DEFAULT_SLOT_BYTES,
+                 task_timeout: float = 30.0):
+        """
+        Args:
+            detector_factory: Picklable zero-argument callable returning a new
+                              detector exposing ``detect(image_rgb)``
+            processes: Number of worker processes / detector instances
+            max_queue: Frames allowed queued or in flight, one shared-memory
+                       slot each, before submissions are rejected
+            slot_bytes: Size of each shared-memory frame slot
+            task_timeout: Seconds after which a frame still in flight is
+                          failed; its worker is assumed stuck on it
+        """
+        self.detector_factory = detector_factory
+        self.processes = processes
+        self.max_queue = max_queue
+        self.slot_bytes = slot_bytes
+        self.task_timeout = task_timeout
+
+        # fork only while single-threaded (see _start_worker); queues come
+        # from the fork server context so either kind of worker can share them
+        methods = multiprocessing.get_all_start_methods()
+        self._fork_context = multiprocessing.get_context("fork") if "fork" in methods else None
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._start_methods = {}    # worker name -> start method it was created with
+        self._frames = None
+        self._tasks = []        # one task queue per worker
+        self._results = None
+        self._workers = []
+        self._loads = []        # frames in flight per worker
+        self._collector = None
+        self._stop = threading.Event()
+        self._stopping = False  # workers exiting on purpose are not replaced
+        self._free_slots = queue.Queue()
+        self._pending = {}      # task_id -> (future, slot, submitted_at, worker index)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stats = {
+            "frames": 0,
+            "rejected": 0,
+            "errors": 0,
+            "pickled_frames": 0,
+            "round_trip_ms_total": 0.0,
+            "inference_ms_total": 0.0,
+            "max_in_flight": 0,
+            "expired": 0,
+            "respawns": 0,
+        }
+
+    def start(self) -> None:
+        """Allocate the frame slots and start the worker processes (idempotent)."""
+        with self._start_lock:
+            if self._workers:
+                return
+            self._stop.clear()
+            self._stopping = False
+            self._frames = shared_memory.SharedMemory(create=True, size=self.max_queue * self.slot_bytes)
+            self._tasks = [self._context.Queue() for _ in range(self.processes)]
+            self._results = self._context.Queue()
+            self._loads = [0] * self.processes
+            for slot in range(self.max_queue):
+                self._free_slots.put(slot)
+
+            workers = [self._start_worker(i) for i in range(self.processes)]
+            # Published last: submit() treats a non-empty list as "started"
+            self._workers = workers
+
+            self._collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+            self._collector.start()
+
+    def _start_worker(self, index: int):
+        name = f"inference-{index}"
+        context = self._fork_context
+        if context is None or threading.active_count() > 1:
+            # The main module is imported again in the fork server (or, on
+            # spawn-only platforms, in each worker)
+            context = self._context
+        process = context.Process(
+            target=_process_worker,
+            args=(self.detector_factory, self._frames.name, self.slot_bytes,
+                  self._tasks[index], self._results),
+            name=name, daemon=True)
+        process.start()
+        self._start_methods[name] = context.get_start_method()
+        return process
+
+    def warm_up(self, timeout: Optional[float] = 60.0) -> None:
+        """
+        Start the worker processes and push one blank frame per process
+        through the pool, so the first real frame does not wait for a
+        worker to import MediaPipe and load the model.
+        """
+        self.start()
+        futures = [self.submit(_warmup_frame()) for _ in range(self.processes)]
+        for future in futures:
+            future.result(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the workers, fail frames still in flight and free the shared memory."""
+        if not self._workers:
+            return
+        self._stopping = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._workers:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._workers = []
+        self._stop.set()
+        self._collector.join(timeout)
+        self._fail_pending("Inference engine stopped")
+
+        self._frames.close()
+        self._frames.unlink()
+        self._frames = None
+        self._free_slots = queue.Queue()
+        self._start_methods = {}
+
+    def submit(self, image: "np.ndarray") -> Future:
+        """
+        Queue a uint8 RGB frame for detection.
+
+        Returns:
+            Future resolved with a tuple of ``Detection``
+
+        Raises:
+            InferenceOverloadedError: if every frame slot is in use
+        """
+        # Starting allocates the slots, so it must come before taking one
+        self.start()
+        try:
+            slot = self._free_slots.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise InferenceOverloadedError("Inference queue full")
+
+        import numpy as np
+
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        pickled = None
+        if image.nbytes <= self.slot_bytes:
+            start = slot * self.slot_bytes
+            target = np.ndarray(image.shape, dtype=np.uint8, buffer=self._frames.buf, offset=start)
+            target[...] = image
+            del target
+        else:
+            pickled = image
+
+        future = Future()
+        task_id = next(self._ids)
+        with self._lock:
+            worker = min(range(len(self._loads)), key=self._loads.__getitem__)
+            self._loads[worker] += 1
+            self._pending[task_id] = (future, slot, time.monotonic(), worker)
+            if pickled is not None:
+                self._stats["pickled_frames"] += 1
+            if len(self._pending) > self._stats["max_in_flight"]:
+                self._stats["max_in_flight"] = len(self._pending)
+            # Under the lock so a respawn cannot swap the queue in between
+            self._tasks[worker].put((task_id, slot, image.shape, pickled))
+        return future
+
+    def detect(self, image: "np.ndarray", timeout: Optional[float] = 30.0) -> Tuple[Detection, ...]:
+        """Blocking detection: submit the frame and wait for its result."""
+        return self.submit(image).result(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of slots in use, worker liveness and timing totals."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            in_flight = len(self._pending)
+        frames = snapshot["frames"] or 1
+        snapshot.update({
+            "in_flight": in_flight,
+            "slots": self.max_queue,
+            "slot_bytes": self.slot_bytes,
+            "processes": self.processes,
+            "workers_alive": sum(1 for process in self._workers if process.is_alive()),
+            "start_methods": sorted(set(self._start_methods.values())),
+            "avg_round_trip_ms": round(snapshot["round_trip_ms_total"] / frames, 2),
+            "avg_inference_ms": round(snapshot["inference_ms_total"] / frames, 2),
+        })
+        return snapshot
+
+    def _collect(self) -> None:
+        checked = time.monotonic()
+        while not self._stop.is_set():
+            if time.monotonic() - checked >= 0.5:
+                self._check_workers()
+                self._expire_pending()
+                checked = time.monotonic()
+            try:
+                task_id, ok, payload, inference_ms = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            with self._lock:
+                entry = self._pending.pop(task_id, None)
+                if entry is None:
+                    # Already expired or failed with its worker
+                    continue
+                future, slot, submitted, worker = entry
+                self._loads[worker] -= 1
+                self._stats["frames"] += 1
+                self._stats["round_trip_ms_total"] += (time.monotonic() - submitted) * 1000
+                self._stats["inference_ms_total"] += inference_ms
+                if not ok:
+                    self._stats["errors"] += 1
+            self._free_slots.put(slot)
+
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _check_workers(self) -> None:
+        """Fail the frames of workers that died and start replacements."""
+        for index, process in enumerate(self._workers):
+            if process.is_alive() or self._stopping:
+                continue
+            with self._lock:
+                # New frames go to the replacement's queue from here on
+                abandoned = self._tasks[index]
+                self._tasks[index] = self._context.Queue()
+                lost = [task_id for task_id, entry in self._pending.items() if entry[3] == index]
+                self._stats["respawns"] += 1
+            abandoned.cancel_join_thread()
+            abandoned.close()
+            self._release(lost, RuntimeError(f"Inference process exited with code {process.exitcode}"))
+            logger.warning("Inference process died, starting a new one", extra=fields(
+                worker=process.name, exitcode=process.exitcode, frames_failed=len(lost)))
+            self._workers[index] = self._start_worker(index)
+
+    def _expire_pending(self) -> None:
+        deadline = time.monotonic() - self.task_timeout
+        with self._lock:
+            expired = [task_id for task_id, entry in self._pending.items() if entry[2] < deadline]
+            self._stats["expired"] += len(expired)
+        if expired:
+            self._release(expired, TimeoutError(f"No inference result within {self.task_timeout}s"))
+
+    def _release(self, task_ids: List[int], error: Exception) -> None:
+        """Fail the given frames and free their slots."""
+        released = []
+        with self._lock:
+            for task_id in task_ids:
+                entry = self._pending.pop(task_id, None)
+                if entry is not None:
+                    self._loads[entry[3]] -= 1
+                    released.append(entry)
+        for future, slot, _, _ in released:
+            self._free_slots.put(slot)
+            future.set_exception(error)
+
+    def _fail_pending(self, reason: str) -> None:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._loads = [0] * len(self._loads)
+        for future, slot, _, _ in pending:
+            self._free_slots.put(slot)
+            future.set_exception(RuntimeError(reason))
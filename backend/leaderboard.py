@@ -0,0 +1,232 @@
+"""
+Leaderboard Index Module for BARAQA_BIN Smart Waste Management System
+In-process ranking of users by points, updated as points are awarded
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Optional, List, Dict, Any
+
+from metrics import fields
+
+logger = logging.getLogger(__name__)
+
+
+# Columns served by /api/leaderboard, matching get_leaderboard's SELECT
+LEADERBOARD_FIELDS = ("user_id", "full_name", "username", "current_points",
+                      "total_recycled_items", "carbon_saved_g", "role")
+
+
+def _same(a: Any, b: Any) -> bool:
+    # carbon_saved_g is a single-precision FLOAT column
+    if isinstance(a, float) or isinstance(b, float):
+        return a is not None and b is not None and abs(a - b) < 0.01
+    return a == b
+
+
+class LeaderboardIndex:
+    """
+    Users ranked by current_points, highest first, ties broken by user_id.
+
+    Rank lookups are a binary search over a sorted key list. A points change
+    moves one key (binary search plus a list memmove), so awarding points
+    never re-sorts the whole board.
+
+    Web worker processes on one host share a stamp file: each change here
+    touches it, and an index that sees the stamp move without having made
+    the change asks to be reloaded, so workers agree within
+    ``min_reload_interval`` instead of a whole resync interval.
+    """
+
+    def __init__(self, resync_interval: float = 300.0, stamp_path: Optional[str] = None,
+                 min_reload_interval: float = 1.0):
+        """
+        Args:
+            resync_interval: Seconds after which the index should be reloaded
+                             from MySQL to pick up writes from other hosts
+            stamp_path: File touched on every change and checked before
+                        reads (None: rely on the resync interval alone)
+            min_reload_interval: Least seconds between reloads caused by
+                                 another process's changes
+        """
+        self.resync_interval = resync_interval
+        self.stamp_path = stamp_path
+        self.min_reload_interval = min_reload_interval
+        self._keys = []      # sorted (-current_points, user_id)
+        self._users = {}     # user_id -> row dict
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._stamp_seen = None     # stamp as of the last load or our own last change
+        self._foreign_change = False
+        self._stats = {"loads": 0, "updates": 0, "top_queries": 0, "rank_queries": 0,
+                       "foreign_changes": 0}
+
+    @staticmethod
+    def _key(row: Dict) -> tuple:
+        return (-row["current_points"], row["user_id"])
+
+    def stamp(self) -> Optional[int]:
+        """Modification time of the stamp file (ns), or None if there is none."""
+        if self.stamp_path is None:
+            return None
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def needs_load(self) -> bool:
+        """
+        True before the first load, once the resync interval has passed, and
+        when another process has changed the board (at most once per
+        min_reload_interval).
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                return True
+            age = time.monotonic() - self._loaded_at
+            if age > self.resync_interval:
+                return True
+            if age < self.min_reload_interval:
+                return False
+            if not self._foreign_change and self.stamp() != self._stamp_seen:
+                self._foreign_change = True
+                self._stats["foreign_changes"] += 1
+            return self._foreign_change
+
+    def load(self, rows: List[Dict], stamp: Optional[int] = None) -> None:
+        """
+        Replace the index contents with rows from the users table.
+
+        Args:
+            stamp: stamp() read before the rows were queried; changes after
+                   it trigger another reload
+        """
+        users = {row["user_id"]: {f: row.get(f) for f in LEADERBOARD_FIELDS} for row in rows}
+        keys = sorted(self._key(row) for row in users.values())
+        with self._lock:
+            self._users = users
+            self._keys = keys
+            self._loaded_at = time.monotonic()
+            self._stamp_seen = stamp
+            self._foreign_change = False
+            self._stats["loads"] += 1
+
+    def upsert(self, row: Dict) -> None:
+        """Insert a user or replace their row, repositioning them by points."""
+        with self._lock:
+            self._remove_key(row["user_id"])
+            entry = {f: row.get(f) for f in LEADERBOARD_FIELDS}
+            self._users[row["user_id"]] = entry
+            bisect.insort(self._keys, self._key(entry))
+            self._stats["updates"] += 1
+            self._touch()
+
+    def apply_totals(self, user_id: int, **totals) -> None:
+        """Set a ranked user's new totals (e.g. read back after a disposal)."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return
+            self._remove_key(user_id)
+            entry.update(totals)
+            bisect.insort(self._keys, self._key(entry))
+            self._stats["updates"] += 1
+            self._touch()
+
+    def add(self, user_id: int, points: int, items: int, carbon: float) -> None:
+        """Apply increments to a ranked user's totals."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return
+            self.apply_totals(
+                user_id,
+                current_points=entry["current_points"] + points,
+                total_recycled_items=entry["total_recycled_items"] + items,
+                carbon_saved_g=entry["carbon_saved_g"] + carbon,
+            )
+
+    def top(self, limit: int = 10) -> List[Dict]:
+        """Top users by points, in the same shape as get_leaderboard rows."""
+        with self._lock:
+            self._stats["top_queries"] += 1
+            return [dict(self._users[user_id]) for _, user_id in self._keys[:max(0, limit)]]
+
+    def rank(self, user_id: int) -> Optional[Dict]:
+        """
+        A user's 1-based position and row.
+
+        Returns:
+            Dict with rank, total and the user's leaderboard fields,
+            or None if the user is not ranked
+        """
+        with self._lock:
+            self._stats["rank_queries"] += 1
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            position = bisect.bisect_left(self._keys, self._key(entry))
+            result = dict(entry)
+            result.update({"rank": position + 1, "total": len(self._keys)})
+            return result
+
+    def verify(self, rows: List[Dict]) -> Dict[str, Any]:
+        """
+        Compare the index with authoritative rows from MySQL.
+
+        Returns:
+            Dict with consistent flag and lists of missing, extra and
+            mismatched user_ids
+        """
+        expected = {row["user_id"]: row for row in rows}
+        with self._lock:
+            missing = sorted(set(expected) - set(self._users))
+            extra = sorted(set(self._users) - set(expected))
+            mismatched = sorted(
+                user_id for user_id in set(expected) & set(self._users)
+                if any(not _same(expected[user_id].get(f), self._users[user_id].get(f))
+                       for f in LEADERBOARD_FIELDS)
+            )
+            ordered = all(self._keys[i] < self._keys[i + 1] for i in range(len(self._keys) - 1))
+        return {
+            "consistent": not (missing or extra or mismatched) and ordered,
+            "ordered": ordered,
+            "missing": missing,
+            "extra": extra,
+            "mismatched": mismatched,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["users"] = len(self._users)
+            snapshot["age_seconds"] = (round(time.monotonic() - self._loaded_at, 1)
+                                       if self._loaded_at is not None else None)
+        return snapshot
+
+    def _touch(self) -> None:
+        # Caller holds the lock
+        if self.stamp_path is None:
+            return
+        try:
+            if self.stamp() != self._stamp_seen:
+                # Another process changed the board since we last looked
+                self._foreign_change = True
+            with open(self.stamp_path, "a"):
+                pass
+            os.utime(self.stamp_path)
+            self._stamp_seen = self.stamp()
+        except OSError as e:
+            logger.warning("Leaderboard stamp not updated", extra=fields(error=e))
+
+    def _remove_key(self, user_id: int) -> None:
+        # Caller holds the lock
+        entry = self._users.get(user_id)
+        if entry is None:
+            return
+        key = self._key(entry)
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
@@ -0,0 +1,321 @@
+"""
+Log Archive Module for BARAQA_BIN Smart Waste Management System
+Keeps closed months of waste logs as compressed columnar NumPy files on
+local disk, so the MySQL table only holds recent months
+"""
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterable, Iterator
+
+import numpy as np
+
+from metrics import fields
+
+logger = logging.getLogger(__name__)
+
+_MONTH_FILE = re.compile(r"^waste_logs-(\d{4})-(\d{2})\.npz$")
+
+# Integer columns and their stored dtypes; strings are stored as UTF-8 bytes
+_INT_COLUMNS = {
+    "log_id": np.int64,
+    "user_id": np.int32,
+    "bin_id": np.int32,
+    "waste_count": np.int32,
+    "points_earned": np.int32,
+}
+_STRING_COLUMNS = ("image_url", "image_replica_url", "event_id")
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def next_month(start: datetime) -> datetime:
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def months_back(start: datetime, count: int) -> datetime:
+    """First day of the month ``count`` months before ``start``'s."""
+    index = start.year * 12 + start.month - 1 - count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _encode(values: List[Optional[str]]) -> np.ndarray:
+    return np.array([(value or "").encode() for value in values], dtype=bytes)
+
+
+def _decode(value: bytes) -> Optional[str]:
+    return value.decode() if value else None
+
+
+class ArchivedMonth:
+    """
+    One month of logs as columns, sorted by (user_id, detected_at, log_id)
+    so a user's rows are one contiguous, time-ordered slice.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.user_ids = columns["user_id"]
+        self.times = columns["detected_at"]
+        self.log_ids = columns["log_id"]
+        # Whole-month order for admin reports: detected_at, then log_id
+        self.time_order = np.lexsort((self.log_ids, self.times))
+        self.ordered_times = self.times[self.time_order]
+        self.ordered_log_ids = self.log_ids[self.time_order]
+
+    def __len__(self) -> int:
+        return len(self.log_ids)
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[List[Dict[str, Any]]]) -> Optional["ArchivedMonth"]:
+        """
+        Columns built one batch of row dicts at a time, so only one batch is
+        held as Python objects. None if there are no rows.
+        """
+        parts = [cls._columns(rows) for rows in batches if rows]
+        if not parts:
+            return None
+        return cls._sorted({name: np.concatenate([part[name] for part in parts]) for name in parts[0]})
+
+    @staticmethod
+    def _columns(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        columns = {name: np.array([row[name] for row in rows], dtype=dtype)
+                   for name, dtype in _INT_COLUMNS.items()}
+        columns["detected_at"] = np.array([row["detected_at"] for row in rows], dtype="datetime64[s]")
+        columns["waste_type"] = _encode([row["waste_type"] for row in rows])
+        for name in _STRING_COLUMNS:
+            columns[name] = _encode([row.get(name) for row in rows])
+        return columns
+
+    @classmethod
+    def load(cls, path: str) -> "ArchivedMonth":
+        with np.load(path, allow_pickle=False) as data:
+            columns = {name: data[name] for name in data.files if name != "waste_type_values"}
+            # waste_type is stored as codes into a small vocabulary
+            columns["waste_type"] = data["waste_type_values"][columns.pop("waste_type_codes")]
+        # Months archived before a column existed
+        for name in _STRING_COLUMNS:
+            columns.setdefault(name, np.full(len(columns["log_id"]), b"", dtype=bytes))
+        return cls(columns)
+
+    def merged(self, other: "ArchivedMonth") -> "ArchivedMonth":
+        """Both months' rows; a log in both keeps ``other``'s copy."""
+        columns = {name: np.concatenate([self.columns[name], other.columns[name]])
+                   for name in self.columns}
+        _, last = np.unique(columns["log_id"][::-1], return_index=True)
+        keep = len(columns["log_id"]) - 1 - last
+        return self._sorted({name: values[keep] for name, values in columns.items()})
+
+    def save(self, path: str) -> None:
+        """Write compressed, then rename into place."""
+        columns = dict(self.columns)
+        values, codes = np.unique(columns.pop("waste_type"), return_inverse=True)
+        columns["waste_type_values"] = values
+        columns["waste_type_codes"] = codes.astype(np.uint8 if len(values) < 256 else np.uint16)
+
+        directory = os.path.dirname(path)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                np.savez_compressed(handle, **columns)
+                handle.flush()
+                # Durable before the caller deletes the rows from MySQL
+                os.fsync(handle.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def rows(self, positions, with_bin: bool = False) -> List[Dict[str, Any]]:
+        """History-shaped dicts for the given positions, in that order."""
+        columns = self.columns
+        rows = [{
+            "log_id": int(columns["log_id"][i]),
+            "user_id": int(columns["user_id"][i]),
+            "waste_type": columns["waste_type"][i].decode(),
+            "waste_count": int(columns["waste_count"][i]),
+            "points_earned": int(columns["points_earned"][i]),
+            "image_url": _decode(columns["image_url"][i]),
+            "timestamp": columns["detected_at"][i].item(),
+        } for i in positions]
+        if with_bin:
+            for row, i in zip(rows, positions):
+                row["bin_id"] = int(columns["bin_id"][i])
+        return rows
+
+    @staticmethod
+    def cursor_end(times: np.ndarray, log_ids: np.ndarray, before: Optional[tuple]) -> int:
+        """
+        In arrays sorted by (detected_at, log_id), the number of leading
+        rows strictly below the (detected_at, log_id) cursor.
+        """
+        if before is None:
+            return len(times)
+        cursor_time = np.datetime64(before[0], "s")
+        lo, hi = np.searchsorted(times, [cursor_time, cursor_time + 1])
+        return int(lo + np.searchsorted(log_ids[lo:hi], before[1]))
+
+    @classmethod
+    def _sorted(cls, columns: Dict[str, np.ndarray]) -> "ArchivedMonth":
+        order = np.lexsort((columns["log_id"], columns["detected_at"], columns["user_id"]))
+        return cls({name: values[order] for name, values in columns.items()})
+
+
+class LogArchive:
+    """
+    Month files ``waste_logs-YYYY-MM.npz`` under ``directory``.
+
+    Months are written once when they are rolled out of MySQL (re-archiving
+    a month merges into its file) and read back for history pages and admin
+    reports; the most recently read ``cache_months`` stay decoded in memory.
+    """
+
+    def __init__(self, directory: str, cache_months: int = 4):
+        self.directory = directory
+        self.cache_months = cache_months
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"months_written": 0, "rows_written": 0, "loads": 0}
+
+    def months(self) -> List[datetime]:
+        """Archived months, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            match = _MONTH_FILE.match(name)
+            if match:
+                found.append(datetime(int(match.group(1)), int(match.group(2)), 1))
+        return sorted(found)
+
+    def hot_since(self) -> Optional[datetime]:
+        """Start of the first month not archived, or None if nothing is."""
+        months = self.months()
+        return next_month(months[-1]) if months else None
+
+    def path(self, month: datetime) -> str:
+        return os.path.join(self.directory, f"waste_logs-{month:%Y-%m}.npz")
+
+    def write_month(self, month: datetime, batches: Iterable[List[Dict[str, Any]]]) -> np.ndarray:
+        """
+        Archive batches of one month's rows (fields as in waste_logs),
+        merging with any rows archived for it before.
+
+        Returns:
+            log_ids of the rows written, once the file is durable
+        """
+        added = ArchivedMonth.from_batches(batches)
+        if added is None:
+            return np.zeros(0, dtype=np.int64)
+        os.makedirs(self.directory, exist_ok=True)
+        existing = self._month(month)
+        archived = existing.merged(added) if existing is not None else added
+        archived.save(self.path(month))
+        with self._lock:
+            self._loaded.pop(month, None)
+            self._stats["months_written"] += 1
+            self._stats["rows_written"] += len(added)
+        logger.info("Archived waste logs", extra=fields(
+            month=f"{month:%Y-%m}", rows=len(added), total=len(archived)))
+        return added.log_ids
+
+    def find_events(self, month: datetime, event_ids: List[str]) -> Dict[str, int]:
+        """log_id of each of the given event_ids archived in ``month``."""
+        archived = self._month(month)
+        if archived is None or not event_ids:
+            return {}
+        stored = archived.columns["event_id"]
+        found = np.flatnonzero(np.isin(stored, _encode(event_ids)))
+        return {stored[i].decode(): int(archived.log_ids[i]) for i in found}
+
+    def user_history(self, user_id: int, limit: int, before: Optional[tuple] = None) -> List[Dict]:
+        """A user's archived logs, newest first, like get_user_history."""
+        rows = []
+        for month, archived in self._newest_first(before):
+            lo, hi = np.searchsorted(archived.user_ids, [user_id, user_id + 1])
+            end = lo + archived.cursor_end(archived.times[lo:hi], archived.log_ids[lo:hi], before)
+            rows += archived.rows(range(end - 1, max(lo, end - (limit - len(rows))) - 1, -1))
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def recent_logs(self, limit: int, before: Optional[tuple] = None) -> List[Dict]:
+        """Archived logs of all users, newest first, like get_recent_logs (without names)."""
+        rows = []
+        for month, archived in self._newest_first(before):
+            end = archived.cursor_end(archived.ordered_times, archived.ordered_log_ids, before)
+            positions = archived.time_order[max(0, end - (limit - len(rows))):end]
+            rows += archived.rows(positions[::-1])
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def export(self, since: datetime, until: datetime, bin_id: Optional[int] = None,
+               user_ids: Optional[List[int]] = None, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Archived logs with since <= detected_at < until, oldest first, in
+        batches of history-shaped dicts that also carry bin_id. Only one
+        month is decoded at a time.
+        """
+        for month in self.months():
+            if next_month(month) <= since or month >= until:
+                continue
+            archived = self._month(month)
+            if archived is None:
+                continue
+            start, end = np.searchsorted(archived.ordered_times,
+                                         [np.datetime64(since, "s"), np.datetime64(until, "s")])
+            positions = archived.time_order[start:end]
+            if bin_id is not None:
+                positions = positions[archived.columns["bin_id"][positions] == bin_id]
+            if user_ids is not None:
+                positions = positions[np.isin(archived.user_ids[positions], user_ids)]
+            for offset in range(0, len(positions), batch_size):
+                yield archived.rows(positions[offset:offset + batch_size], with_bin=True)
+
+    def stats(self) -> Dict[str, Any]:
+        months = self.months()
+        sizes = [os.path.getsize(self.path(month)) for month in months]
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["cached_months"] = len(self._loaded)
+        snapshot["months"] = [f"{month:%Y-%m}" for month in months]
+        snapshot["bytes"] = sum(sizes)
+        snapshot["hot_since"] = self.hot_since().isoformat() if months else None
+        return snapshot
+
+    def _newest_first(self, before: Optional[tuple]) -> Iterator:
+        for month in reversed(self.months()):
+            if before is not None and month > before[0]:
+                continue   # every row in it is newer than the cursor
+            archived = self._month(month)
+            if archived is not None:
+                yield month, archived
+
+    def _month(self, month: datetime) -> Optional[ArchivedMonth]:
+        path = self.path(month)
+        try:
+            # Another worker process may have re-archived the month
+            modified = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._loaded.get(month)
+            if cached is not None and cached[0] == modified:
+                self._loaded.move_to_end(month)
+                return cached[1]
+        archived = ArchivedMonth.load(path)
+        with self._lock:
+            self._loaded[month] = (modified, archived)
+            self._loaded.move_to_end(month)
+            self._stats["loads"] += 1
+            while len(self._loaded) > self.cache_months:
+                self._loaded.popitem(last=False)
+        return archived
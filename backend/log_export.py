@@ -0,0 +1,76 @@
+"""
+Log Export Module for BARAQA_BIN Smart Waste Management System
+Encodes batches of waste log rows as NDJSON or CSV text chunks for
+streaming responses
+"""
+import csv
+import io
+import json
+import logging
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ("log_id", "detected_at", "user_id", "user_name", "department", "bin_id",
+                  "waste_type", "waste_count", "points_earned", "image_url")
+
+
+def _values(row: Dict) -> list:
+    return [row["detected_at"].isoformat() if column == "detected_at" else row[column]
+            for column in EXPORT_COLUMNS]
+
+
+def ndjson_chunks(batches: Iterator[List[Dict]]) -> Iterator[str]:
+    """One JSON object per line, one chunk per batch."""
+    for rows in batches:
+        yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, _values(row))), ensure_ascii=False) + "\n"
+                      for row in rows)
+
+
+def csv_chunks(batches: Iterator[List[Dict]]) -> Iterator[str]:
+    """A header line at once, then one chunk of records per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_values(row) for row in rows)
+        yield buffer.getvalue()
+
+
+def _ndjson_error(message: str) -> str:
+    return json.dumps({"error": message}) + "\n"
+
+
+def _csv_error(message: str) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(["#error", message])
+    return buffer.getvalue()
+
+
+def with_error_marker(chunks: Iterator[str], export_format: str) -> Iterator[str]:
+    """
+    Pass an encoder's chunks through. If producing one fails, log the error
+    and end the stream with an error record (``{"error": ...}`` in NDJSON,
+    a ``#error`` row in CSV), since the 200 status has already been sent
+    and a client could otherwise take the truncated file for a complete one.
+    """
+    try:
+        yield from chunks
+    except Exception:
+        logger.exception("Log export failed")
+        yield _ERROR_RECORDS[export_format]("Export failed; the file is incomplete")
+
+
+_ERROR_RECORDS = {
+    "ndjson": _ndjson_error,
+    "csv": _csv_error,
+}
+
+# format -> (encoder, mimetype, file extension)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "ndjson": (ndjson_chunks, "application/x-ndjson", "ndjson"),
+    "csv": (csv_chunks, "text/csv", "csv"),
+}
@@ -0,0 +1,222 @@
+"""
+Metrics Module for BARAQA_BIN Smart Waste Management System
+In-process counters, histograms and gauges rendered in the Prometheus
+text exposition format, plus a logfmt formatter for structured logs
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional, Dict, Any, Tuple
+
+
+# Seconds; spans a cached lookup (~50us) to a cold model load
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_value(value: str) -> str:
+    # Backslash first, so the escapes added after it are not doubled
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_label_text(self.labels, label_values)} {_number(value)}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, optionally split by labels.
+
+    ``observe`` is a binary search and three additions under a lock, cheap
+    enough to call for every stage of every request.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for label_values, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = _label_text(self.labels, label_values, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            labels = _label_text(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_number(values[-2])}"
+            yield f"{self.name}_count{labels} {values[-1]}"
+
+
+class Gauge:
+    """Value read from a callback at scrape time (queue depths, pool sizes)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], Optional[float]]):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def samples(self) -> Iterable[str]:
+        try:
+            value = self.read()
+        except Exception:
+            return
+        if value is not None:
+            yield f"{self.name} {_number(value)}"
+
+
+class MetricsRegistry:
+    """Named metrics rendered together for a /metrics scrape."""
+
+    def __init__(self, prefix: str = "baraqa_"):
+        self.prefix = prefix
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help_text, labels, buckets))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], Optional[float]]) -> Gauge:
+        return self._register(Gauge(self.prefix + name, help_text, read))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Per-request stage timings: each stage is observed in a histogram as it
+    finishes and kept in ``stages_ms`` for the request's summary log line.
+    """
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.stages_ms = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.histogram.observe(seconds, name)
+        self.stages_ms[name] = round(self.stages_ms.get(name, 0.0) + seconds * 1000, 2)
+
+
+# ── Structured logging ──────────────────────────────────────────
+
+class LogfmtFormatter(logging.Formatter):
+    """
+    One ``key=value`` line per record. Fields passed as
+    ``logger.info("event", extra={"fields": {...}})`` are appended in order.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [
+            f"ts={self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}",
+            f"level={record.levelname.lower()}",
+            f"logger={record.name}",
+            f"msg={self._value(record.getMessage())}",
+        ]
+        for key, value in getattr(record, "fields", {}).items():
+            parts.append(f"{key}={self._value(value)}")
+        if record.exc_info:
+            parts.append(f"exc={self._value(self.formatException(record.exc_info))}")
+        return " ".join(parts)
+
+    @staticmethod
+    def _value(value: Any) -> str:
+        text = str(value)
+        if text and not any(c in text for c in ' ="\n'):
+            return text
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """Send all backend loggers to stderr as logfmt (idempotent)."""
+    root = logging.getLogger()
+    if any(isinstance(h.formatter, LogfmtFormatter) for h in root.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(LogfmtFormatter())
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def fields(**values: Any) -> Dict[str, Dict[str, Any]]:
+    """``extra=`` argument carrying structured fields for LogfmtFormatter."""
+    return {"fields": values}
@@ -0,0 +1,79 @@
+"""
+Response Cache Module for BARAQA_BIN Smart Waste Management System
+Keeps serialized dashboard responses until the data behind them changes,
+with ETags so polling clients can revalidate instead of re-downloading
+"""
+import hashlib
+import threading
+from typing import Optional, Dict, Any, Tuple
+
+from ttl_cache import TTLCache
+
+
+class CachedResponse:
+    """A serialized response body and its validators."""
+
+    __slots__ = ("body", "mimetype", "etag", "versions")
+
+    def __init__(self, body: bytes, mimetype: str, versions: Tuple[int, ...]):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.versions = versions
+
+
+class ResponseCache:
+    """
+    Responses keyed by request path and query, each depending on one or
+    more data tags ("users", "bins", "logs").
+
+    ``invalidate(tag)`` bumps the tag's version; entries built against an
+    older version are treated as misses. Callers take ``versions(tags)``
+    before computing a response and store it with ``put``, so a write that
+    lands mid-computation still invalidates the result. Entries also expire
+    after ``ttl`` seconds, bounding staleness from writes made by other
+    worker processes.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+        self._entries = TTLCache(max_entries, ttl)
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._invalidations = 0
+
+    def versions(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def get(self, key: Any, tags: Tuple[str, ...]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.versions != self.versions(tags):
+            return None
+        return entry
+
+    def put(self, key: Any, tags: Tuple[str, ...], versions: Tuple[int, ...],
+            body: bytes, mimetype: str) -> CachedResponse:
+        """
+        Cache a response computed against ``versions``.
+
+        Returns:
+            The entry (also returned when it is already stale, so the caller
+            can still send its validators)
+        """
+        entry = CachedResponse(body, mimetype, versions)
+        if versions == self.versions(tags):
+            self._entries.put(key, entry)
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+            self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._entries.stats()
+        with self._lock:
+            snapshot["invalidations"] = self._invalidations
+            snapshot["versions"] = dict(self._versions)
+        return snapshot
@@ -0,0 +1,115 @@
+"""
+Bin Telemetry Tests for BARAQA_BIN Smart Waste Management System
+Heartbeat validation and the coalescing buffer, with MySQL replaced by an
+apply_batch that records (or fails) each write
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bin_telemetry import TelemetryBuffer, parse_heartbeat  # noqa: E402
+
+
+class ParseHeartbeatTest(unittest.TestCase):
+
+    def test_maps_fields_to_columns(self):
+        self.assertEqual(parse_heartbeat({"bin_id": 3, "battery": 87, "fill_percent": 40.0,
+                                          "uptime_s": 3600, "firmware": "1.2"}),
+                         {"bin_id": 3, "battery_status": 87, "sensor_fill_percent": 40,
+                          "uptime_s": 3600})
+
+    def test_partial_heartbeat(self):
+        self.assertEqual(parse_heartbeat({"bin_id": 3, "battery": 0, "uptime_s": None}),
+                         {"bin_id": 3, "battery_status": 0})
+
+    def test_rejects_malformed(self):
+        records = [
+            [],
+            "bin 3",
+            {"battery": 50},
+            {"bin_id": 0, "battery": 50},
+            {"bin_id": "3", "battery": 50},
+            {"bin_id": True, "battery": 50},
+            {"bin_id": 3},
+            {"bin_id": 3, "battery": 101},
+            {"bin_id": 3, "fill_percent": -1},
+            {"bin_id": 3, "battery": 50.5},
+            {"bin_id": 3, "battery": "50"},
+            {"bin_id": 3, "battery": False},
+            {"bin_id": 3, "uptime_s": 2 ** 32},
+        ]
+        for record in records:
+            with self.subTest(record=record):
+                with self.assertRaises(ValueError):
+                    parse_heartbeat(record)
+
+
+class TelemetryBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = []
+        self.flushed = []
+        self.fail = False
+
+    def apply_batch(self, readings):
+        if self.fail:
+            raise ConnectionError("MySQL is down")
+        self.batches.append([dict(reading) for reading in readings])
+
+    def buffer(self, **kwargs):
+        return TelemetryBuffer(self.apply_batch, on_flushed=self.flushed.append, **kwargs)
+
+    def test_readings_from_one_bin_coalesce(self):
+        buffer = self.buffer()
+        buffer.submit([{"bin_id": 1, "battery_status": 90, "uptime_s": 10}])
+        buffer.submit([{"bin_id": 2, "battery_status": 50},
+                       {"bin_id": 1, "battery_status": 89}])
+        buffer._flush()
+
+        self.assertEqual(len(self.batches), 1)
+        first, second = self.batches[0]
+        self.assertEqual((first["bin_id"], first["battery_status"], first["uptime_s"]), (1, 89, 10))
+        self.assertIn("last_seen_at", first)
+        self.assertEqual(second["bin_id"], 2)
+        stats = buffer.stats()
+        self.assertEqual((stats["received"], stats["coalesced"], stats["pending"]), (3, 1, 0))
+
+    def test_flush_splits_into_max_batch(self):
+        buffer = self.buffer(max_batch=2)
+        buffer.submit([{"bin_id": bin_id, "uptime_s": 1} for bin_id in range(1, 6)])
+        buffer._flush()
+        self.assertEqual([[r["bin_id"] for r in batch] for batch in self.batches],
+                         [[1, 2], [3, 4], [5]])
+        self.assertEqual(len(self.flushed), 3)
+        self.assertEqual(buffer.stats()["avg_batch_size"], 1.7)
+
+    def test_bins_past_max_pending_are_dropped(self):
+        buffer = self.buffer(max_pending=2)
+        self.assertEqual(buffer.submit([{"bin_id": 1, "uptime_s": 1}, {"bin_id": 2, "uptime_s": 1},
+                                        {"bin_id": 3, "uptime_s": 1}, {"bin_id": 1, "uptime_s": 2}]),
+                         (3, 1))
+        self.assertEqual(buffer.stats()["dropped"], 1)
+
+    def test_failed_flush_keeps_newer_readings(self):
+        buffer = self.buffer()
+        buffer.submit([{"bin_id": 1, "battery_status": 90, "uptime_s": 10}])
+        self.fail = True
+        with self.assertRaises(ConnectionError):
+            buffer._flush()
+        # Arrived while the write was failing
+        buffer.submit([{"bin_id": 1, "battery_status": 80}])
+
+        self.fail = False
+        buffer._flush()
+        (reading,) = self.batches[0]
+        self.assertEqual((reading["battery_status"], reading["uptime_s"]), (80, 10))
+        self.assertEqual(self.flushed, self.batches)
+
+
+if __name__ == "__main__":
+    unittest.main()
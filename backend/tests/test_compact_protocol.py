@@ -0,0 +1,96 @@
+"""
+Compact Protocol Tests for BARAQA_BIN Smart Waste Management System
+Byte layout of /api/detect/compact replies and round trips through the
+firmware-side decoder
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact_protocol import (  # noqa: E402
+    encode_reply, decode_reply, MAX_VOICE_BYTES,
+    STATUS_OK, STATUS_NO_DETECTION, STATUS_UNKNOWN_USER, STATUS_BAD_REQUEST, STATUS_BUSY,
+    STATUS_ERROR
+)
+
+
+class EncodeReplyTest(unittest.TestCase):
+
+    def test_success_layout(self):
+        reply = encode_reply({"status": "success", "points_earned": 20,
+                              "user": {"total_points": 70000},
+                              "voice_command": "Thanks"}, 200)
+        self.assertEqual(reply, b"\x01\x00\x00\x06\x00\x14\x00\x01\x11\x70Thanks")
+
+    def test_error_layout(self):
+        reply = encode_reply({"status": "error", "message": "Database error occurred"}, 500)
+        self.assertEqual(reply, b"\x01\x05\x00\x00\x00\x00\x00\x00\x00\x00")
+
+    def test_status_codes(self):
+        cases = [
+            ({"status": "success"}, 200, STATUS_OK),
+            ({"status": "no_detection"}, 200, STATUS_NO_DETECTION),
+            ({"status": "error"}, 403, STATUS_UNKNOWN_USER),
+            ({"status": "error"}, 400, STATUS_BAD_REQUEST),
+            ({"status": "error"}, 503, STATUS_BUSY),
+            ({"status": "error"}, 500, STATUS_ERROR),
+            ({"status": "error"}, 404, STATUS_ERROR),
+        ]
+        for response, http_status, status in cases:
+            with self.subTest(http_status=http_status, response=response):
+                self.assertEqual(decode_reply(encode_reply(response, http_status))["status"], status)
+
+    def test_counters_are_clamped(self):
+        reply = decode_reply(encode_reply({"status": "success", "points_earned": 70000,
+                                           "user": {"total_points": -5}}, 200))
+        self.assertEqual((reply["points_earned"], reply["total_points"]), (0xFFFF, 0))
+
+    def test_long_voice_is_cut_on_a_character_boundary(self):
+        # 2-byte characters: byte 255 would split one
+        reply = decode_reply(encode_reply({"status": "success", "voice_command": "é" * 200}, 200))
+        self.assertEqual(reply["voice_command"], "é" * 127)
+        self.assertLessEqual(len(reply["voice_command"].encode("utf-8")), MAX_VOICE_BYTES)
+
+
+class DecodeReplyTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        response = {"status": "success", "duplicate": True, "points_earned": 30,
+                    "user": {"total_points": 1234}, "voice_command": "Thank you Rahim"}
+        self.assertEqual(decode_reply(encode_reply(response, 200)), {
+            "status": STATUS_OK,
+            "duplicate": True,
+            "points_earned": 30,
+            "total_points": 1234,
+            "voice_command": "Thank you Rahim",
+        })
+
+    def test_error_reply(self):
+        reply = decode_reply(b"\x01\x05\x00\x0b" + b"\x00" * 6 + b"Try again!!")
+        self.assertEqual(reply, {
+            "status": STATUS_ERROR,
+            "duplicate": False,
+            "points_earned": 0,
+            "total_points": 0,
+            "voice_command": "Try again!!",
+        })
+
+    def test_trailing_bytes_are_ignored(self):
+        reply = encode_reply({"status": "success", "voice_command": "ok"}, 200)
+        self.assertEqual(decode_reply(reply + b"\x00\x00")["voice_command"], "ok")
+
+    def test_rejects_malformed(self):
+        reply = encode_reply({"status": "success", "voice_command": "Thanks"}, 200)
+        for data in (b"", reply[:9], reply[:-1], b"\x02" + reply[1:]):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    decode_reply(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,297 @@
+"""
+Disposal Journal Tests for BARAQA_BIN Smart Waste Management System
+Recovery, compaction and checkpoint handling against a temporary journal
+directory, with MySQL replaced by an in-memory apply_batch / load_checkpoint
+
+Usage:
+    python -m pytest tests/
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from disposal_journal import DisposalJournal  # noqa: E402
+
+
+class FakeDatabase:
+    """waste_logs keyed by event_id plus the checkpoint table."""
+
+    def __init__(self):
+        self.applied = {}
+        self.checkpoints = {}
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def apply_batch(self, journal_name, events, last_seq):
+        with self.lock:
+            fresh = [e for e in events if e["event_id"] not in self.applied]
+            for e in fresh:
+                self.applied[e["event_id"]] = e
+            self.checkpoints[journal_name] = max(self.checkpoints.get(journal_name, 0), last_seq)
+            self.batches.append([e["event_id"] for e in fresh])
+        return {"log_ids": {}, "users": {}, "bins": {}}
+
+    def load_checkpoint(self, journal_name):
+        return self.checkpoints.get(journal_name, 0)
+
+
+def disposal(event_id, user_id=1, bin_id=1, items=1):
+    return {
+        "event_id": event_id,
+        "user_id": user_id,
+        "bin_id": bin_id,
+        "waste_count": items,
+        "points_earned": items * 10,
+        "carbon_saved": items * 2.5,
+    }
+
+
+class DisposalJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        self.db = FakeDatabase()
+        self.journals = []
+
+    def tearDown(self):
+        for journal in self.journals:
+            if journal._file is not None and not journal._file.closed:
+                journal._file.close()
+        self._tmp.cleanup()
+
+    def journal(self, start=False, **kwargs):
+        """A journal that only flushes when a test calls _flush."""
+        journal = DisposalJournal(
+            self.directory,
+            apply_batch=kwargs.pop("apply_batch", self.db.apply_batch),
+            load_checkpoint=kwargs.pop("load_checkpoint", self.db.load_checkpoint),
+            host=kwargs.pop("host", "bin-host"),
+            **kwargs)
+        self.journals.append(journal)
+        os.makedirs(self.directory, exist_ok=True)
+        journal._claim_file()
+        journal._recover()
+        journal._load_checkpoint()
+        return journal
+
+    def crash(self, journal):
+        """Drop the process's state; only the file survives."""
+        journal._file.close()
+
+    def lines(self, journal):
+        with open(journal.path, "rb") as handle:
+            return [json.loads(line) for line in handle.read().splitlines()]
+
+    # ── Naming ──────────────────────────────────────────────────
+
+    def test_journal_name_includes_host(self):
+        journal = self.journal(host="collector.example.org")
+        self.assertEqual(journal.journal_name, "disposals-collector-0")
+        self.assertTrue(journal.path.endswith("disposals-collector-0.log"))
+
+    def test_hosts_get_separate_checkpoints(self):
+        first = self.journal(host="a")
+        second = self.journal(host="b")
+        self.assertNotEqual(first.journal_name, second.journal_name)
+
+    def test_second_journal_on_host_claims_next_file(self):
+        first = self.journal()
+        second = self.journal()
+        self.assertEqual(first.journal_name, "disposals-bin-host-0")
+        self.assertEqual(second.journal_name, "disposals-bin-host-1")
+
+    # ── Recovery ────────────────────────────────────────────────
+
+    def test_recover_replays_unflushed_events(self):
+        journal = self.journal()
+        journal.append(disposal("a", items=2))
+        journal.append(disposal("b", items=3))
+        self.crash(journal)
+
+        recovered = self.journal()
+        self.assertEqual(recovered.path, journal.path)
+        self.assertEqual([r["event_id"] for r in recovered._pending.values()], ["a", "b"])
+        self.assertEqual(recovered.stats()["recovered"], 2)
+        self.assertEqual(recovered.pending_totals(user_id=1, bin_id=1),
+                         {"points": 50, "items": 5, "carbon": 12.5, "fill": 5})
+        self.assertEqual(recovered._next_seq, 3)
+
+        recovered._flush(recovered._next_batch())
+        self.assertEqual(sorted(self.db.applied), ["a", "b"])
+        self.assertFalse(recovered._pending)
+
+    def test_recover_skips_torn_final_line(self):
+        journal = self.journal()
+        journal.append(disposal("a"))
+        journal._file.write(b'{"event_id":"b","se')
+        journal._file.flush()
+        self.crash(journal)
+
+        recovered = self.journal()
+        self.assertEqual([r["event_id"] for r in recovered._pending.values()], ["a"])
+
+    def test_recover_starts_after_checkpoint_header(self):
+        journal = self.journal(compact_interval=0.0)
+        journal.append(disposal("a"))
+        journal._flush(journal._next_batch())
+        journal.append(disposal("b"))
+        self.crash(journal)
+
+        recovered = self.journal()
+        self.assertEqual([r["event_id"] for r in recovered._pending.values()], ["b"])
+        self.assertEqual(recovered._next_seq, 3)
+
+    def test_replica_attached_while_pending_reaches_on_flushed(self):
+        flushed = []
+        journal = self.journal(on_flushed=lambda batch, result: flushed.extend(batch))
+        for event_id in "abc":
+            journal.append(disposal(event_id))
+        self.assertTrue(journal.set_image_replica("a", "https://host/a.jpg"))
+        batch = journal._next_batch()
+        # Upload finished while the batch was being written
+        self.assertTrue(journal.set_image_replica("b", "https://host/b.jpg"))
+        journal._flush(batch)
+
+        self.assertFalse(journal.set_image_replica("c", "https://host/c.jpg"))
+        self.assertEqual({r["event_id"]: r.get("image_replica_url") for r in flushed},
+                         {"a": "https://host/a.jpg", "b": "https://host/b.jpg", "c": None})
+
+    def test_committing_batch_is_counted_once(self):
+        cache = {"current_points": 100}
+        seen = []
+
+        def apply_batch(journal_name, events, last_seq):
+            # A reply projected between MySQL's commit and the pending removal
+            seen.append(journal.pending_totals(1, 1, committed=lambda: dict(cache)))
+            return {"points": cache["current_points"] + sum(e["points_earned"] for e in events)}
+
+        def on_applied(result):
+            cache["current_points"] = result["points"]
+
+        journal = self.journal(apply_batch=apply_batch, on_applied=on_applied)
+        journal.append(disposal("a", items=2))
+        journal._flush(journal._next_batch())
+        seen.append(journal.pending_totals(1, 1, committed=lambda: dict(cache)))
+
+        self.assertEqual([totals["committed"]["current_points"] + totals["points"]
+                          for totals in seen], [120, 120])
+        self.assertEqual(seen[-1]["points"], 0)
+
+    # ── Checkpoint ──────────────────────────────────────────────
+
+    def test_sequence_continues_past_checkpoint_when_directory_is_lost(self):
+        journal = self.journal()
+        for event_id in "abc":
+            journal.append(disposal(event_id))
+        journal._flush(journal._next_batch())
+        self.crash(journal)
+        self._tmp.cleanup()
+
+        fresh = self.journal()
+        self.assertEqual(fresh.journal_name, journal.journal_name)
+        self.assertEqual(fresh._checkpoint, 3)
+        self.assertEqual(fresh.append(disposal("d")), 4)
+
+        fresh._flush(fresh._next_batch())
+        self.assertIn("d", self.db.applied)
+
+    def test_replayed_events_below_checkpoint_are_applied_once(self):
+        journal = self.journal()
+        journal.append(disposal("a"))
+        journal.append(disposal("b"))
+        batch = journal._next_batch()
+        # Committed in MySQL, but the process died before the journal caught up
+        self.db.apply_batch(journal.journal_name, batch, batch[-1]["seq"])
+        self.crash(journal)
+
+        recovered = self.journal()
+        self.assertEqual(recovered._checkpoint, 2)
+        self.assertEqual(len(recovered._pending), 2)
+        recovered._flush(recovered._next_batch())
+        self.assertEqual(self.db.batches[-1], [])
+        self.assertEqual(len(self.db.applied), 2)
+        self.assertEqual(recovered._checkpoint, 2)
+        self.assertFalse(recovered._pending)
+
+    def test_start_fails_without_checkpoint(self):
+        def unavailable(journal_name):
+            raise ConnectionError("MySQL is down")
+
+        journal = DisposalJournal(self.directory, apply_batch=self.db.apply_batch,
+                                  load_checkpoint=unavailable, host="bin-host")
+        with self.assertRaises(ConnectionError):
+            journal.start()
+        self.assertIsNone(journal._thread)
+        # The file is released for the next attempt
+        retry = self.journal()
+        self.assertEqual(retry.journal_name, "disposals-bin-host-0")
+
+    # ── Compaction ──────────────────────────────────────────────
+
+    def test_compact_keeps_header_and_pending_events(self):
+        journal = self.journal(max_batch=1)
+        journal.append(disposal("a"))
+        journal.append(disposal("b"))
+        journal._flush(journal._next_batch())
+
+        with journal._sync_lock, journal._lock:
+            journal._compact()
+        self.assertEqual([{"checkpoint": 1}, {"event_id": "b"}],
+                         [line if "checkpoint" in line else {"event_id": line["event_id"]}
+                          for line in self.lines(journal)])
+        self.assertFalse(os.path.exists(journal.path + ".tmp"))
+
+        # Appends after the swap go to the new file
+        journal.append(disposal("c"))
+        self.crash(journal)
+        recovered = self.journal()
+        self.assertEqual([r["event_id"] for r in recovered._pending.values()], ["b", "c"])
+
+    def test_drained_journal_compacts_at_most_once_per_interval(self):
+        journal = self.journal(compact_interval=60.0)
+        journal.append(disposal("a"))
+        journal._flush(journal._next_batch())
+        self.assertEqual(journal.stats()["compactions"], 0)
+        self.assertEqual(len(self.lines(journal)), 1)
+
+        journal._compacted_at -= 60.0
+        journal.append(disposal("b"))
+        journal._flush(journal._next_batch())
+        self.assertEqual(journal.stats()["compactions"], 1)
+        self.assertEqual(self.lines(journal), [{"checkpoint": 2}])
+
+    def test_large_journal_compacts_with_events_pending(self):
+        journal = self.journal(max_batch=1, compact_bytes=0)
+        journal.append(disposal("a"))
+        journal.append(disposal("b"))
+        journal._flush(journal._next_batch())
+        self.assertEqual(journal.stats()["compactions"], 1)
+        self.assertEqual([line.get("event_id", line.get("checkpoint")) for line in self.lines(journal)],
+                         [1, "b"])
+
+    def test_compact_header_stays_below_replayed_events(self):
+        journal = self.journal(max_batch=1)
+        for event_id in "abc":
+            journal.append(disposal(event_id))
+        self.db.checkpoints[journal.journal_name] = 3
+        self.crash(journal)
+
+        recovered = self.journal(max_batch=1)
+        recovered._flush(recovered._next_batch())
+        with recovered._sync_lock, recovered._lock:
+            recovered._compact()
+        self.assertEqual(self.lines(recovered)[0], {"checkpoint": 1})
+        self.crash(recovered)
+
+        again = self.journal()
+        self.assertEqual([r["event_id"] for r in again._pending.values()], ["b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Fill Forecast Tests for BARAQA_BIN Smart Waste Management System
+Fill rates, time to full and collection priorities from hourly buckets,
+and the incremental window refresh, with MySQL replaced by in-memory rows
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fill_forecast import FillForecaster, MAX_FORECAST_HOURS  # noqa: E402
+
+NOW = datetime(2026, 3, 4, 12, 30)   # half-way through the current hour
+HOUR = NOW.replace(minute=0)
+
+
+def smart_bin(bin_id, fill, capacity=100, status="active"):
+    return {"bin_id": bin_id, "bin_name": f"Bin {bin_id}", "location": "Campus",
+            "current_fill_level": fill, "max_capacity": capacity, "status": status}
+
+
+class FakeStats:
+    """smart_bins rows and hourly stats buckets."""
+
+    def __init__(self, bins):
+        self.bins = bins
+        self.buckets = {}
+        self.since = []
+
+    def add(self, bin_id, hours_ago, items):
+        key = (bin_id, HOUR - timedelta(hours=hours_ago))
+        self.buckets[key] = self.buckets.get(key, 0) + items
+
+    def load_bins(self):
+        return [dict(b) for b in self.bins]
+
+    def load_hourly_items(self, since):
+        self.since.append(since)
+        return [{"bin_id": bin_id, "bucket_start": start, "items": items}
+                for (bin_id, start), items in sorted(self.buckets.items()) if start >= since]
+
+
+class FillForecasterTest(unittest.TestCase):
+
+    def forecaster(self, bins, **kwargs):
+        self.stats = FakeStats(bins)
+        kwargs.setdefault("window_hours", 4)
+        # An effectively flat weighting keeps the expected rates plain means
+        kwargs.setdefault("half_life_hours", 1e9)
+        return FillForecaster(self.stats.load_bins, self.stats.load_hourly_items, **kwargs)
+
+    def by_bin(self, forecaster, **kwargs):
+        return {entry["bin_id"]: entry for entry in forecaster.plan(**kwargs)["bins"]}
+
+    def test_rate_counts_part_of_the_current_hour(self):
+        forecaster = self.forecaster([smart_bin(1, fill=60)])
+        for hours_ago in (1, 2, 3):
+            self.stats.add(1, hours_ago, 2)
+        self.stats.add(1, 0, 1)
+        forecaster._refresh(NOW)
+
+        entry = self.by_bin(forecaster)[1]
+        # 7 items over 3.5 hours
+        self.assertEqual(entry["fill_rate_per_hour"], 2.0)
+        self.assertEqual(entry["hours_to_full"], 20.0)
+        self.assertEqual(entry["predicted_full_at"], (NOW + timedelta(hours=20)).isoformat())
+        self.assertEqual(entry["fill_percent"], 60.0)
+
+    def test_recent_hours_weigh_more(self):
+        forecaster = self.forecaster([smart_bin(1, fill=0), smart_bin(2, fill=0)],
+                                     half_life_hours=1.0)
+        self.stats.add(1, 3, 8)
+        self.stats.add(2, 1, 8)
+        forecaster._refresh(NOW)
+        rates = {bin_id: entry["fill_rate_per_hour"]
+                 for bin_id, entry in self.by_bin(forecaster).items()}
+        self.assertGreater(rates[2], rates[1])
+
+    def test_priorities_and_order(self):
+        forecaster = self.forecaster([
+            smart_bin(1, fill=10),                   # never used: not filling
+            smart_bin(2, fill=90),                   # 10 left at 1/hour
+            smart_bin(3, fill=40, status="full"),    # reported full by the bin
+            smart_bin(4, fill=100),                  # at capacity
+            smart_bin(5, fill=0),                    # 100 left at 1/hour
+        ])
+        for bin_id in (2, 5):
+            for hours_ago in (1, 2, 3):
+                self.stats.add(bin_id, hours_ago, 1)
+        forecaster._refresh(NOW.replace(minute=59, second=59))
+
+        plan = forecaster.plan(horizon_hours=24)
+        self.assertEqual([(e["bin_id"], e["priority"]) for e in plan["bins"]],
+                         [(3, "full"), (4, "full"), (2, "due"), (5, "ok"), (1, "ok")])
+        self.assertEqual(plan["collect"], 3)
+        self.assertIsNone(plan["bins"][-1]["hours_to_full"])
+        self.assertEqual([e["bin_id"] for e in forecaster.plan(limit=2)["bins"]], [3, 4])
+
+    def test_very_slow_bin_is_not_filling(self):
+        forecaster = self.forecaster([smart_bin(1, fill=0, capacity=10 ** 6)])
+        self.stats.add(1, 1, 1)
+        forecaster._refresh(NOW)
+        self.assertGreater(10 ** 6 / self.by_bin(forecaster)[1]["fill_rate_per_hour"],
+                           MAX_FORECAST_HOURS)
+        self.assertIsNone(self.by_bin(forecaster)[1]["hours_to_full"])
+
+    def test_refresh_rereads_only_from_the_open_hour(self):
+        forecaster = self.forecaster([smart_bin(1, fill=0)])
+        self.stats.add(1, 1, 2)
+        self.stats.add(1, 0, 1)
+        forecaster._refresh(NOW)
+        self.assertEqual(self.stats.since, [HOUR - timedelta(hours=3)])
+
+        # The open hour got more items, then a new hour started
+        self.stats.add(1, 0, 2)
+        self.stats.buckets[(1, HOUR + timedelta(hours=1))] = 1
+        forecaster._refresh(NOW + timedelta(hours=1))
+        self.assertEqual(self.stats.since[-1], HOUR)
+        self.assertEqual(forecaster._items[0].tolist(), [0, 2, 3, 1])
+        self.assertEqual(forecaster.stats()["refreshes"], 2)
+
+    def test_window_drops_old_hours_and_picks_up_new_bins(self):
+        forecaster = self.forecaster([smart_bin(1, fill=0)])
+        self.stats.add(1, 3, 5)
+        self.stats.add(9, 1, 5)   # a bin the forecaster has not seen
+        forecaster._refresh(NOW)
+        self.assertEqual(forecaster._items.sum(), 5)
+
+        self.stats.bins.append(smart_bin(2, fill=0))
+        self.stats.buckets[(2, HOUR + timedelta(hours=2))] = 4
+        forecaster._refresh(NOW + timedelta(hours=2))
+        self.assertEqual(forecaster._items.tolist(), [[0, 0, 0, 0], [0, 0, 0, 4]])
+        self.assertEqual(set(self.by_bin(forecaster)), {1, 2})
+
+    def test_invalidate_forces_a_refresh(self):
+        forecaster = self.forecaster([smart_bin(1, fill=0)], refresh_interval=3600)
+        forecaster._refresh(NOW)
+        forecaster.plan()
+        self.assertEqual(forecaster.stats()["refreshes"], 1)
+        forecaster.invalidate()
+        forecaster.plan()
+        self.assertEqual(forecaster.stats()["refreshes"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
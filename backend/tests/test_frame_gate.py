@@ -0,0 +1,91 @@
+"""
+Frame Gate Tests for BARAQA_BIN Smart Waste Management System
+Which frames the change gate answers without the detector, on small
+synthetic JPEGs of an empty chute and the same chute with an item in it
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import unittest
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_gate import FrameGate  # noqa: E402
+
+
+def jpeg(item=False, brightness=0, noise_seed=None):
+    """A 160x120 chute: horizontal gradient, optionally a bright box in the middle."""
+    image = np.tile(np.linspace(40, 200, 160, dtype=np.float32), (120, 1))
+    if item:
+        image[30:90, 50:110] = 250
+    if noise_seed is not None:
+        image += np.random.default_rng(noise_seed).normal(0, 2, image.shape)
+    image = np.clip(image + brightness, 0, 255).astype(np.uint8)
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+class FrameGateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gate = FrameGate(threshold=0.015, history=2)
+
+    def detect(self, bin_id, frame):
+        """check() then remember() as process_disposal does for frames it detects on."""
+        unchanged, fingerprint, change = self.gate.check(bin_id, frame)
+        if not unchanged:
+            self.gate.remember(bin_id, fingerprint)
+        return unchanged, change
+
+    def test_first_frame_is_never_gated(self):
+        self.assertEqual(self.detect(1, jpeg()), (False, None))
+
+    def test_same_scene_is_gated(self):
+        self.detect(1, jpeg())
+        unchanged, change = self.detect(1, jpeg(noise_seed=1))
+        self.assertTrue(unchanged)
+        self.assertLess(change, 0.015)
+
+    def test_exposure_shift_is_gated(self):
+        self.detect(1, jpeg())
+        self.assertTrue(self.detect(1, jpeg(brightness=25))[0])
+
+    def test_new_item_passes(self):
+        self.detect(1, jpeg())
+        unchanged, change = self.detect(1, jpeg(item=True))
+        self.assertFalse(unchanged)
+        self.assertGreater(change, 0.015)
+
+    def test_bins_are_compared_separately(self):
+        self.detect(1, jpeg())
+        self.assertFalse(self.detect(2, jpeg())[0])
+
+    def test_only_recent_frames_are_references(self):
+        empty, item = jpeg(), jpeg(item=True)
+        self.detect(1, empty)
+        self.detect(1, item)
+        self.assertTrue(self.detect(1, empty)[0])
+
+        self.gate.remember(1, self.gate.fingerprint(item))
+        self.gate.remember(1, self.gate.fingerprint(item))
+        # The empty chute has dropped out of the last two
+        self.assertFalse(self.detect(1, empty)[0])
+
+    def test_undecodable_frame_is_never_gated(self):
+        self.detect(1, jpeg())
+        self.assertEqual(self.gate.check(1, b"not a jpeg"), (False, None, None))
+
+    def test_stats_count_skips_per_bin(self):
+        for frame in (jpeg(), jpeg(), jpeg(item=True), jpeg(item=True)):
+            self.detect(3, frame)
+        self.assertEqual(self.gate.stats()["bins"], {
+            "3": {"frames": 4, "skipped": 2, "skip_rate": 0.5},
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
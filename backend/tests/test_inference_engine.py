@@ -0,0 +1,102 @@
+"""
+Inference Engine Tests for BARAQA_BIN Smart Waste Management System
+Micro-batching in the thread engine, with MediaPipe replaced by a detector
+that records which frames it ran together
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_engine import InferenceEngine, InferenceOverloadedError  # noqa: E402
+
+
+class SlowDetector:
+    """Returns each frame back after ``delay`` seconds."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+
+    def detect(self, image):
+        time.sleep(self.delay)
+        if image == "bad":
+            raise ValueError("corrupt frame")
+        return (("bottle", 0.9, 0, 0, 1, 1), image)
+
+
+class InferenceEngineTest(unittest.TestCase):
+
+    def engine(self, **kwargs):
+        engine = InferenceEngine(kwargs.pop("factory", SlowDetector), **kwargs)
+        self.addCleanup(engine.stop)
+        engine.start()
+        return engine
+
+    def test_results_reach_their_callers(self):
+        engine = self.engine(workers=2)
+        futures = [engine.submit(i) for i in range(6)]
+        self.assertEqual([f.result(5)[1] for f in futures], list(range(6)))
+
+    def test_busy_detector_batches_queued_frames(self):
+        engine = self.engine(workers=1, max_batch_size=4, batch_window_ms=20.0)
+        futures = [engine.submit(i) for i in range(5)]
+        for future in futures:
+            future.result(5)
+
+        stats = engine.stats()
+        self.assertEqual(stats["frames"], 5)
+        self.assertLess(stats["batches"], 5)
+        self.assertLessEqual(max(stats["batch_size_histogram"]), 4)
+        self.assertGreater(stats["avg_batch_size"], 1)
+
+    def test_idle_detector_is_never_held_back(self):
+        engine = self.engine(workers=4, max_batch_size=8, batch_window_ms=200.0)
+        # Let every worker reach the queue first
+        time.sleep(0.1)
+        started = time.monotonic()
+        futures = [engine.submit(i) for i in range(3)]
+        for future in futures:
+            future.result(5)
+
+        # Three frames on three detectors: no batch, no window wait
+        self.assertLess(time.monotonic() - started, 0.15)
+        stats = engine.stats()
+        self.assertEqual(stats["batch_size_histogram"], {1: 3})
+        self.assertEqual(stats["batch_wait_ms_total"], 0.0)
+
+    def test_error_fails_only_its_frame(self):
+        engine = self.engine(workers=1, max_batch_size=4)
+        futures = [engine.submit(image) for image in (1, "bad", 3)]
+        self.assertEqual(futures[0].result(5)[1], 1)
+        with self.assertRaises(ValueError):
+            futures[1].result(5)
+        self.assertEqual(futures[2].result(5)[1], 3)
+        self.assertEqual(engine.stats()["errors"], 1)
+
+    def test_full_queue_rejects(self):
+        release = threading.Event()
+
+        class BlockedDetector:
+            def detect(self, image):
+                release.wait(5)
+                return ()
+
+        engine = self.engine(factory=BlockedDetector, workers=1, max_batch_size=1, max_queue=2)
+        self.addCleanup(release.set)
+        engine.submit(0)
+        time.sleep(0.05)   # taken by the worker
+        engine.submit(1)
+        engine.submit(2)
+        with self.assertRaises(InferenceOverloadedError):
+            engine.submit(3)
+        self.assertEqual(engine.stats()["rejected"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Leaderboard Index Tests for BARAQA_BIN Smart Waste Management System
+Ranking, incremental updates and the stamp file web workers share to
+reload after each other's changes
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import LeaderboardIndex  # noqa: E402
+
+
+def user(user_id, points):
+    return {
+        "user_id": user_id,
+        "full_name": f"User {user_id}",
+        "username": f"user{user_id}",
+        "current_points": points,
+        "total_recycled_items": points // 10,
+        "carbon_saved_g": points * 5.0,
+        "role": "user",
+    }
+
+
+class LeaderboardIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.stamp_path = os.path.join(self._tmp.name, "leaderboard.stamp")
+        self.rows = [user(1, 50), user(2, 80), user(3, 50), user(4, 10)]
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def index(self, **kwargs):
+        index = LeaderboardIndex(**kwargs)
+        index.load(self.rows, index.stamp())
+        return index
+
+    def test_top_orders_by_points_then_user_id(self):
+        index = self.index()
+        self.assertEqual([row["user_id"] for row in index.top(3)], [2, 1, 3])
+        self.assertEqual(index.top(0), [])
+
+    def test_rank(self):
+        index = self.index()
+        self.assertEqual((index.rank(3)["rank"], index.rank(3)["total"]), (3, 4))
+        self.assertIsNone(index.rank(99))
+
+    def test_add_moves_one_user(self):
+        index = self.index()
+        index.add(4, 100, 10, 50.0)
+        self.assertEqual([row["user_id"] for row in index.top(2)], [4, 2])
+        self.assertEqual(index.rank(4)["current_points"], 110)
+        self.assertTrue(index.verify([dict(row) for row in index.top(10)])["consistent"])
+
+    def test_verify_reports_drift(self):
+        index = self.index()
+        rows = [user(1, 50), user(2, 90), user(5, 0)]
+        report = index.verify(rows)
+        self.assertFalse(report["consistent"])
+        self.assertEqual((report["missing"], report["extra"], report["mismatched"]),
+                         ([5], [3, 4], [2]))
+
+    def test_loaded_index_does_not_reload_without_changes(self):
+        index = self.index(stamp_path=self.stamp_path, min_reload_interval=0.0)
+        self.assertFalse(index.needs_load())
+        self.assertTrue(LeaderboardIndex().needs_load())
+
+    def test_own_changes_do_not_trigger_reload(self):
+        index = self.index(stamp_path=self.stamp_path, min_reload_interval=0.0)
+        index.add(1, 10, 1, 5.0)
+        index.upsert(user(9, 0))
+        self.assertFalse(index.needs_load())
+
+    def test_other_worker_change_triggers_reload(self):
+        first = self.index(stamp_path=self.stamp_path, min_reload_interval=0.0)
+        second = self.index(stamp_path=self.stamp_path, min_reload_interval=0.0)
+        first.add(4, 100, 10, 50.0)
+        self.assertTrue(second.needs_load())
+        self.assertFalse(first.needs_load())
+        self.assertEqual(second.stats()["foreign_changes"], 1)
+
+        second.load(self.rows, second.stamp())
+        self.assertFalse(second.needs_load())
+
+    def test_own_change_after_other_worker_change_still_reloads(self):
+        first = self.index(stamp_path=self.stamp_path, min_reload_interval=0.0)
+        second = self.index(stamp_path=self.stamp_path, min_reload_interval=0.0)
+        first.add(4, 100, 10, 50.0)
+        second.add(1, 10, 1, 5.0)
+        self.assertTrue(second.needs_load())
+
+    def test_reload_waits_for_min_interval(self):
+        first = self.index(stamp_path=self.stamp_path, min_reload_interval=0.0)
+        second = self.index(stamp_path=self.stamp_path, min_reload_interval=60.0)
+        first.add(4, 100, 10, 50.0)
+        self.assertFalse(second.needs_load())
+
+
+if __name__ == "__main__":
+    unittest.main()
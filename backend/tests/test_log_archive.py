@@ -0,0 +1,158 @@
+"""
+Log Archive Tests for BARAQA_BIN Smart Waste Management System
+Keyset cursor math, history paging across months and re-archiving against
+a temporary archive directory
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_archive import ArchivedMonth, LogArchive  # noqa: E402
+
+
+def log(log_id, detected_at, user_id=1, bin_id=1, event_id=None):
+    return {
+        "log_id": log_id,
+        "user_id": user_id,
+        "bin_id": bin_id,
+        "waste_type": "plastic_bottle",
+        "waste_count": 1,
+        "points_earned": 10,
+        "image_url": None,
+        "detected_at": detected_at,
+        "event_id": event_id,
+    }
+
+
+def cursor(row):
+    return row["timestamp"], row["log_id"]
+
+
+class CursorEndTest(unittest.TestCase):
+    """Rows sorted by (detected_at, log_id); two share a second."""
+
+    def setUp(self):
+        self.times = np.array(["2026-01-01T10:00:00", "2026-01-01T11:00:00",
+                               "2026-01-01T11:00:00", "2026-01-01T12:00:00"], dtype="datetime64[s]")
+        self.log_ids = np.array([4, 2, 7, 5], dtype=np.int64)
+
+    def end(self, before):
+        return ArchivedMonth.cursor_end(self.times, self.log_ids, before)
+
+    def test_no_cursor_includes_every_row(self):
+        self.assertEqual(self.end(None), 4)
+
+    def test_cursor_between_seconds(self):
+        self.assertEqual(self.end((datetime(2026, 1, 1, 11, 30), 1)), 3)
+
+    def test_tie_on_detected_at_is_broken_by_log_id(self):
+        at = datetime(2026, 1, 1, 11)
+        self.assertEqual(self.end((at, 2)), 1)
+        self.assertEqual(self.end((at, 5)), 2)
+        self.assertEqual(self.end((at, 7)), 2)
+        self.assertEqual(self.end((at, 8)), 3)
+
+    def test_cursor_before_every_row(self):
+        self.assertEqual(self.end((datetime(2026, 1, 1, 9), 99)), 0)
+        self.assertEqual(self.end((datetime(2026, 1, 1, 10), 4)), 0)
+
+    def test_cursor_after_every_row(self):
+        self.assertEqual(self.end((datetime(2026, 1, 1, 12), 6)), 4)
+        self.assertEqual(self.end((datetime(2026, 2, 1), 0)), 4)
+
+    def test_empty_slice(self):
+        empty = np.zeros(0, dtype="datetime64[s]")
+        self.assertEqual(ArchivedMonth.cursor_end(empty, np.zeros(0, np.int64),
+                                                  (datetime(2026, 1, 1), 1)), 0)
+
+
+class LogArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.archive = LogArchive(self._tmp.name)
+        self.january = datetime(2026, 1, 1)
+        self.february = datetime(2026, 2, 1)
+        # User 1 has three logs a month, user 2 interleaves in January
+        self.archive.write_month(self.january, [[
+            log(1, datetime(2026, 1, 5, 9)),
+            log(2, datetime(2026, 1, 5, 9), user_id=2),
+            log(3, datetime(2026, 1, 5, 9)),
+        ], [
+            log(4, datetime(2026, 1, 20, 8), user_id=2, event_id="e4"),
+            log(5, datetime(2026, 1, 20, 8), event_id="e5"),
+        ]])
+        self.archive.write_month(self.february, [[
+            log(6, datetime(2026, 2, 1, 0)),
+            log(8, datetime(2026, 2, 14, 12)),
+            log(7, datetime(2026, 2, 14, 12)),
+        ]])
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def pages(self, fetch, limit):
+        """Every page until a short one, following the last row's cursor."""
+        pages, before = [], None
+        while True:
+            page = fetch(limit, before)
+            pages.append([row["log_id"] for row in page])
+            if len(page) < limit:
+                return pages
+            before = cursor(page[-1])
+
+    def test_user_history_pages_across_months(self):
+        pages = self.pages(lambda limit, before: self.archive.user_history(1, limit, before), 2)
+        self.assertEqual(pages, [[8, 7], [6, 5], [3, 1], []])
+
+    def test_recent_logs_pages_across_months(self):
+        pages = self.pages(self.archive.recent_logs, 3)
+        self.assertEqual(pages, [[8, 7, 6], [5, 4, 3], [2, 1]])
+
+    def test_cursor_month_skips_newer_months(self):
+        rows = self.archive.user_history(1, 10, (datetime(2026, 1, 5, 9), 3))
+        self.assertEqual([row["log_id"] for row in rows], [1])
+
+    def test_write_month_returns_log_ids(self):
+        log_ids = self.archive.write_month(datetime(2026, 3, 1), [[log(9, datetime(2026, 3, 2))], []])
+        self.assertEqual(log_ids.tolist(), [9])
+        self.assertEqual(self.archive.write_month(datetime(2026, 4, 1), iter([])).tolist(), [])
+        self.assertEqual(self.archive.hot_since(), datetime(2026, 4, 1))
+
+    def test_rearchive_merges_late_rows(self):
+        # A late flush landed in January after it was archived, and a rerun
+        # after an interrupted delete sees log 5 again
+        self.archive.write_month(self.january, [[
+            log(5, datetime(2026, 1, 20, 8), event_id="e5"),
+            log(10, datetime(2026, 1, 10, 7), event_id="e10"),
+        ]])
+        rows = self.archive.user_history(1, 10, (datetime(2026, 2, 1), 0))
+        self.assertEqual([row["log_id"] for row in rows], [5, 10, 3, 1])
+
+    def test_find_events(self):
+        self.assertEqual(self.archive.find_events(self.january, ["e5", "e4", "missing"]),
+                         {"e5": 5, "e4": 4})
+        self.assertEqual(self.archive.find_events(self.january, []), {})
+        self.assertEqual(self.archive.find_events(datetime(2025, 12, 1), ["e5"]), {})
+
+    def test_export_filters_range(self):
+        batches = list(self.archive.export(datetime(2026, 1, 20), datetime(2026, 2, 14),
+                                           batch_size=2))
+        self.assertEqual([[row["log_id"] for row in rows] for rows in batches], [[4, 5], [6]])
+
+    def test_from_batches_without_rows(self):
+        self.assertIsNone(ArchivedMonth.from_batches([]))
+        self.assertIsNone(ArchivedMonth.from_batches([[], []]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Log Export Tests for BARAQA_BIN Smart Waste Management System
+NDJSON and CSV encoding of streamed waste log batches, and the error
+record that ends a stream whose source fails part-way
+
+Usage:
+    python -m pytest tests/
+"""
+import csv
+import io
+import json
+import os
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_export import EXPORT_COLUMNS, EXPORT_FORMATS, with_error_marker  # noqa: E402
+
+
+def log(log_id, user_name="Rahim Uddin", department="CSE"):
+    return {
+        "log_id": log_id,
+        "detected_at": datetime(2026, 3, 4, 5, 6, log_id),
+        "user_id": 1,
+        "user_name": user_name,
+        "department": department,
+        "bin_id": 2,
+        "waste_type": "plastic_bottle",
+        "waste_count": 1,
+        "points_earned": 10,
+        "image_url": None,
+        "event_id": "not exported",
+    }
+
+
+def failing_batches():
+    yield [log(1)]
+    raise ConnectionError("Lost connection to MySQL server during query")
+
+
+def export(export_format, batches):
+    encode = EXPORT_FORMATS[export_format][0]
+    return list(with_error_marker(encode(batches), export_format))
+
+
+class NdjsonExportTest(unittest.TestCase):
+
+    def test_one_object_per_row_and_chunk_per_batch(self):
+        chunks = export("ndjson", iter([[log(1), log(2)], [], [log(3, user_name="Nusrat \"Nus\"")]]))
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([row["log_id"] for row in rows], [1, 2, 3])
+        self.assertEqual(list(rows[0]), list(EXPORT_COLUMNS))
+        self.assertEqual(rows[0]["detected_at"], "2026-03-04T05:06:01")
+        self.assertEqual(rows[2]["user_name"], 'Nusrat "Nus"')
+
+    def test_non_ascii_is_kept(self):
+        (chunk,) = export("ndjson", iter([[log(1, user_name="রহিম")]]))
+        self.assertIn("রহিম", chunk)
+
+    def test_failure_ends_with_error_record(self):
+        with self.assertLogs("log_export", "ERROR"):
+            chunks = export("ndjson", failing_batches())
+        self.assertEqual(json.loads(chunks[0])["log_id"], 1)
+        self.assertEqual(json.loads(chunks[-1]), {"error": "Export failed; the file is incomplete"})
+
+
+class CsvExportTest(unittest.TestCase):
+
+    def rows(self, chunks):
+        return list(csv.reader(io.StringIO("".join(chunks))))
+
+    def test_header_comes_before_any_row(self):
+        chunks = export("csv", iter([[log(1)]]))
+        self.assertEqual(chunks[0], ",".join(EXPORT_COLUMNS) + "\r\n")
+        self.assertEqual(export("csv", iter([])), [chunks[0]])
+
+    def test_values_are_quoted(self):
+        rows = self.rows(export("csv", iter([[log(1, department="EEE, Evening")], [log(2)]])))
+        self.assertEqual(rows[0], list(EXPORT_COLUMNS))
+        self.assertEqual(rows[1], ["1", "2026-03-04T05:06:01", "1", "Rahim Uddin", "EEE, Evening",
+                                   "2", "plastic_bottle", "1", "10", ""])
+        self.assertEqual(len(rows), 3)
+
+    def test_failure_ends_with_error_row(self):
+        with self.assertLogs("log_export", "ERROR"):
+            rows = self.rows(export("csv", failing_batches()))
+        self.assertEqual(rows[1][0], "1")
+        self.assertEqual(rows[-1], ["#error", "Export failed; the file is incomplete"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Log Pagination Tests for BARAQA_BIN Smart Waste Management System
+Keyset cursor parsing/formatting, the keyset page queries and the
+index-only check on their EXPLAIN plans, with MySQL replaced by canned rows
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_helper import (  # noqa: E402
+    format_log_cursor, parse_log_cursor, explain_log_queries,
+    _user_history_query, _recent_logs_query
+)
+
+
+class FakeDatabase:
+    """Answers every EXPLAIN with the same plan rows."""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.queries = []
+
+    def execute_query(self, query, params=None, fetch_all=False, **kwargs):
+        self.queries.append((query, params))
+        return [dict(row) for row in self.plan]
+
+
+class LogCursorTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        row = {"timestamp": datetime(2026, 3, 4, 5, 6, 7), "log_id": 42}
+        cursor = format_log_cursor(row)
+        self.assertEqual(cursor, "2026-03-04 05:06:07,42")
+        self.assertEqual(parse_log_cursor(cursor), (row["timestamp"], 42))
+
+    def test_parse_tolerates_spaces(self):
+        self.assertEqual(parse_log_cursor(" 2026-03-04 05:06:07 ,7"),
+                         (datetime(2026, 3, 4, 5, 6, 7), 7))
+
+    def test_parse_rejects_malformed(self):
+        for cursor in ("", "42", "2026-03-04 05:06:07", "2026-03-04,1",
+                       "2026-03-04 05:06:07,x", "yesterday,5"):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    parse_log_cursor(cursor)
+
+
+class KeysetQueryTest(unittest.TestCase):
+
+    def test_first_page_has_no_keyset(self):
+        query, params = _user_history_query(3, 10)
+        self.assertNotIn("detected_at <", query)
+        self.assertEqual(params, (3, 10))
+
+    def test_follow_up_page_starts_after_cursor(self):
+        cursor = (datetime(2026, 3, 4, 5, 6, 7), 42)
+        query, params = _user_history_query(3, 10, cursor)
+        self.assertIn("(detected_at < %s OR (detected_at = %s AND log_id < %s))", query)
+        self.assertEqual(params, (3, cursor[0], cursor[0], 42, 10))
+
+        query, params = _recent_logs_query(20, cursor)
+        self.assertIn("ORDER BY wl.detected_at DESC, wl.log_id DESC", query)
+        self.assertEqual(params, (cursor[0], cursor[0], 42, 20))
+
+
+class ExplainLogQueriesTest(unittest.TestCase):
+
+    def explain(self, extra, access_type="range", join=None):
+        plan = [{"table": "wl", "type": access_type, "key": "idx_waste_logs_time",
+                 "rows": 20, "Extra": extra}]
+        if join is not None:
+            plan.append({"table": "u", "type": "eq_ref", "key": "PRIMARY", "rows": 1, "Extra": join})
+        db = FakeDatabase(plan)
+        return db, explain_log_queries(db, user_id=3)
+
+    def test_index_only_backward_scan_is_ok(self):
+        db, report = self.explain("Using where; Backward index scan; Using index")
+        self.assertEqual(set(report), {"user_history", "user_history_page",
+                                       "recent_logs", "recent_logs_page"})
+        self.assertTrue(all(plan["ok"] and plan["index_only"] for plan in report.values()))
+        self.assertTrue(all(query.startswith("EXPLAIN ") for query, _ in db.queries))
+
+    def test_row_lookups_are_not_index_only(self):
+        _, report = self.explain("Using index condition; Backward index scan")
+        self.assertFalse(any(plan["index_only"] or plan["ok"] for plan in report.values()))
+
+    def test_filesort_on_join_row_fails(self):
+        _, report = self.explain("Using index", join="Using temporary; Using filesort")
+        self.assertFalse(any(plan["ok"] for plan in report.values()))
+
+    def test_full_scan_fails(self):
+        _, report = self.explain("Using index", access_type="ALL")
+        self.assertFalse(any(plan["ok"] for plan in report.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Metrics Tests for BARAQA_BIN Smart Waste Management System
+Prometheus text rendering of counters, histograms and gauges, including
+label value escaping
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry, StageTimer  # noqa: E402
+
+
+class RenderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry(prefix="test_")
+
+    def samples(self):
+        return [line for line in self.registry.render().splitlines() if not line.startswith("#")]
+
+    def test_counter_by_label(self):
+        counter = self.registry.counter("frames_total", "Frames", ("result",))
+        counter.inc(1, "passed")
+        counter.inc(2, "skipped")
+        counter.inc(1, "passed")
+        self.assertEqual(self.samples(), ['test_frames_total{result="passed"} 2',
+                                          'test_frames_total{result="skipped"} 2'])
+        self.assertIn("# TYPE test_frames_total counter", self.registry.render())
+
+    def test_label_values_are_escaped(self):
+        counter = self.registry.counter("errors_total", "Errors", ("error",))
+        counter.inc(1, 'bad "frame"\\n\nline two')
+        self.assertEqual(self.samples(),
+                         ['test_errors_total{error="bad \\"frame\\"\\\\n\\nline two"} 1'])
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("stage_seconds", "Stages", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, "detect")
+        self.assertEqual(self.samples(), [
+            'test_stage_seconds_bucket{stage="detect",le="0.1"} 1',
+            'test_stage_seconds_bucket{stage="detect",le="1.0"} 3',
+            'test_stage_seconds_bucket{stage="detect",le="+Inf"} 4',
+            'test_stage_seconds_sum{stage="detect"} 4.05',
+            'test_stage_seconds_count{stage="detect"} 4',
+        ])
+
+    def test_gauge_skips_unreadable_values(self):
+        self.registry.gauge("queue_depth", "Depth", lambda: 3)
+        self.registry.gauge("pool_size", "Size", lambda: None)
+        self.registry.gauge("broken", "Broken", lambda: 1 / 0)
+        self.assertEqual(self.samples(), ["test_queue_depth 3"])
+
+
+class StageTimerTest(unittest.TestCase):
+
+    def test_stages_accumulate(self):
+        histogram = MetricsRegistry().histogram("stage_seconds", "Stages", ("stage",))
+        timer = StageTimer(histogram)
+        timer.record("decode", 0.002)
+        timer.record("decode", 0.003)
+        with timer.stage("detect"):
+            pass
+        self.assertEqual(timer.stages_ms["decode"], 5.0)
+        self.assertEqual(set(timer.stages_ms), {"decode", "detect"})
+        self.assertIn('baraqa_stage_seconds_count{stage="decode"} 2', list(histogram.samples()))
+
+
+if __name__ == "__main__":
+    unittest.main()
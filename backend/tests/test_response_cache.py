@@ -0,0 +1,97 @@
+"""
+Response Cache Tests for BARAQA_BIN Smart Waste Management System
+Tag invalidation, stale puts and the ETag / 304 revalidation that polling
+dashboards rely on
+
+Usage:
+    python -m pytest tests/
+"""
+import os
+import sys
+import time
+import unittest
+
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request, Response
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_cache import ResponseCache  # noqa: E402
+
+KEY = ("/api/leaderboard", b"limit=10")
+TAGS = ("users",)
+
+
+def conditional(entry, if_none_match=None):
+    """The response cached_response in app.py sends for ``entry``, and the body sent."""
+    headers = {"If-None-Match": if_none_match} if if_none_match else {}
+    environ = EnvironBuilder(path=KEY[0], headers=headers).get_environ()
+    response = Response(entry.body, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    response = response.make_conditional(Request(environ))
+    return response, b"".join(response.get_app_iter(environ))
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(ttl=30.0)
+
+    def put(self, body=b'{"leaderboard": []}', versions=None):
+        versions = self.cache.versions(TAGS) if versions is None else versions
+        return self.cache.put(KEY, TAGS, versions, body, "application/json")
+
+    def test_hit_until_tag_is_invalidated(self):
+        entry = self.put()
+        self.assertIs(self.cache.get(KEY, TAGS), entry)
+
+        self.cache.invalidate("bins")
+        self.assertIs(self.cache.get(KEY, TAGS), entry)
+        self.cache.invalidate("users", "logs")
+        self.assertIsNone(self.cache.get(KEY, TAGS))
+        self.assertEqual(self.cache.stats()["versions"], {"bins": 1, "users": 1, "logs": 1})
+
+    def test_write_during_computation_is_not_cached(self):
+        versions = self.cache.versions(TAGS)
+        self.cache.invalidate("users")
+        entry = self.put(versions=versions)
+        # Still usable for this one response, but never served again
+        self.assertTrue(entry.etag)
+        self.assertIsNone(self.cache.get(KEY, TAGS))
+
+    def test_entries_expire(self):
+        cache = ResponseCache(ttl=0.01)
+        cache.put(KEY, TAGS, cache.versions(TAGS), b"{}", "application/json")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(KEY, TAGS))
+
+    def test_etag_follows_body(self):
+        first = self.put(b'{"points": 10}')
+        self.assertEqual(self.put(b'{"points": 10}').etag, first.etag)
+        self.assertNotEqual(self.put(b'{"points": 20}').etag, first.etag)
+
+
+class RevalidationTest(unittest.TestCase):
+
+    def setUp(self):
+        cache = ResponseCache()
+        self.entry = cache.put(KEY, TAGS, cache.versions(TAGS), b'{"bins": []}', "application/json")
+
+    def test_first_request_gets_body_and_etag(self):
+        response, body = conditional(self.entry)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, b'{"bins": []}')
+        self.assertEqual(response.headers["ETag"], f'"{self.entry.etag}"')
+
+    def test_matching_etag_gets_304_without_body(self):
+        response, body = conditional(self.entry, f'"{self.entry.etag}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(body, b"")
+
+    def test_changed_body_gets_200(self):
+        response, body = conditional(self.entry, '"0123456789abcdef01234567"')
+        self.assertEqual((response.status_code, body), (200, b'{"bins": []}'))
+
+
+if __name__ == "__main__":
+    unittest.main()
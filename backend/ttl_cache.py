@@ -0,0 +1,112 @@
+"""
+TTL Cache Module for BARAQA_BIN Smart Waste Management System
+Thread-safe LRU cache whose entries expire a fixed time after being
+stored, shared by the detection, dedup, record and response caches
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, Any
+
+
+class TTLCache:
+    """
+    Bounded LRU cache; each entry also expires ``ttl`` seconds after it
+    was stored.
+
+    Entries may carry a tag (e.g. a user_id) so writes that only know the
+    tag can still update or drop them. With ``copy`` set (e.g. ``dict``),
+    values are copied on the way in and out so callers cannot mutate
+    cached rows.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0,
+                 copy: Optional[Callable[[Any], Any]] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._copy = copy
+        self._entries = OrderedDict()   # key -> (value, expires_at, tag)
+        self._tags = {}                 # tag -> key
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+                       "invalidations": 0, "updates": 0}
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[1] <= time.monotonic():
+                self._drop(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return self._copy(entry[0]) if self._copy else entry[0]
+
+    def put(self, key: Any, value: Any, tag: Any = None) -> None:
+        """Store a value, evicting least recently used entries beyond capacity."""
+        if self._copy:
+            value = self._copy(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tag)
+            if tag is not None:
+                self._tags[tag] = key
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def update(self, key: Any, fields: Dict) -> None:
+        """Write-through: merge new fields into a cached dict value, if present."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[0].update(fields)
+                self._stats["updates"] += 1
+
+    def update_tag(self, tag: Any, fields: Dict) -> None:
+        """Write-through by tag instead of key."""
+        with self._lock:
+            key = self._tags.get(tag)
+        if key is not None:
+            self.update(key, fields)
+
+    def invalidate(self, key: Any) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+                self._stats["invalidations"] += 1
+
+    def invalidate_tag(self, tag: Any) -> None:
+        with self._lock:
+            key = self._tags.get(tag)
+            if key is not None and key in self._entries:
+                self._drop(key)
+                self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of hit/miss counters and occupancy."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["entries"] = len(self._entries)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 3) if lookups else 0.0
+        snapshot["max_entries"] = self.max_entries
+        snapshot["ttl_seconds"] = self.ttl
+        return snapshot
+
+    def _drop(self, key: Any) -> None:
+        # Caller holds the lock
+        _, _, tag = self._entries.pop(key)
+        if tag is not None and self._tags.get(tag) == key:
+            del self._tags[tag]
@@ -1,6 +1,13 @@
-import { createContext, useCallback, useContext, useEffect, useState } from 'react'
+import { createContext, useCallback, useContext, useEffect, useRef, useState } from 'react'
 import type { ReactNode } from 'react'
-import { getAllBins, getLeaderboard, getUserHistory, getUserStats } from '../services/api'
+import {
+  getAllBins,
+  getLeaderboard,
+  getUserHistory,
+  getUserStats,
+  resolveImageUrl,
+  subscribeToEvents,
+} from '../services/api'
 import type { SmartBin, User, WasteLog } from '../types'
 
 interface DataContextValue {
@@ -130,7 +137,7 @@ export function DataProvider({ children }: { children: ReactNode }) {
           wasteType: log.waste_type,
           wasteCount: log.waste_count,
           pointsEarned: log.points_earned,
-          imageUrl: log.image_url || undefined,
+          imageUrl: resolveImageUrl(log.image_url),
           timestamp: log.timestamp,
         }))
         setLogs(historyData)
@@ -178,16 +185,66 @@ export function DataProvider({ children }: { children: ReactNode }) {
     refreshData()
   }, [refreshData])
 
-  // Auto-refresh every 30 seconds when user is logged in
+  // Live updates pushed by the backend instead of polling
+  const refreshRef = useRef(refreshData)
   useEffect(() => {
-    if (!currentUser) return
+    refreshRef.current = refreshData
+  }, [refreshData])
+  const currentUserId = currentUser?.id
+
+  useEffect(() => {
+    if (!currentUserId) return
+
+    let connectedOnce = false
 
-    const interval = setInterval(() => {
-      refreshData()
-    }, 30000) // 30 seconds
+    const unsubscribe = subscribeToEvents({
+      // Catch up on anything missed while the stream was down
+      onOpen: () => {
+        if (connectedOnce) refreshRef.current()
+        connectedOnce = true
+      },
+      onBin: (event) => {
+        setBins((prev) =>
+          prev.map((bin) =>
+            bin.id === event.bin_id.toString()
+              ? {
+                  ...bin,
+                  maxCapacity: event.max_capacity,
+                  currentFillLevel: Math.round((event.current_fill_level / event.max_capacity) * 100),
+                  status: event.status as 'active' | 'full' | 'maintenance',
+                }
+              : bin
+          )
+        )
+      },
+      onLeaderboard: (event) => {
+        setLeaderboard((prev) => {
+          const updated = {
+            id: event.user_id.toString(),
+            fullName: event.full_name,
+            username: event.username,
+            rfidUid: '',
+            role: event.role as 'admin' | 'user',
+            currentPoints: event.current_points,
+            totalRecycled: event.total_recycled_items,
+            carbonSavedG: event.carbon_saved_g,
+            department: '',
+          }
+          const others = prev.filter((user) => user.id !== updated.id)
+          if (event.rank > 10) return others
+          return [...others, updated]
+            .sort((a, b) => b.currentPoints - a.currentPoints || parseInt(a.id) - parseInt(b.id))
+            .slice(0, 10)
+        })
+      },
+      onDisposal: (event) => {
+        // Own disposals change stats and history; fetch those fresh
+        if (event.user_id.toString() === currentUserId) refreshRef.current()
+      },
+    })
 
-    return () => clearInterval(interval)
-  }, [currentUser, refreshData])
+    return unsubscribe
+  }, [currentUserId])
 
   const value: DataContextValue = {
     currentUser,
@@ -1,5 +1,6 @@
 import { Calendar, ExternalLink, Image as  Package } from 'lucide-react'
 import { useData } from '../context/DataContext'
+import { thumbnailUrl } from '../services/api'
 
 export function History() {
   const { logs, isAdmin } = useData()
@@ -27,7 +28,7 @@ export function History() {
                 {log.imageUrl ? (
                   <div className="w-24 h-24 rounded-xl bg-emerald-50 border border-emerald-100 overflow-hidden">
                     <img
-                      src={log.imageUrl}
+                      src={thumbnailUrl(log.imageUrl)}
                       alt={log.wasteType}
                       className="w-full h-full object-cover"
                       onError={(e) => {
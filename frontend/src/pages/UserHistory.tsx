@@ -1,7 +1,7 @@
 import { ArrowLeft, Calendar, ExternalLink, Image as Package } from 'lucide-react'
 import { useEffect, useState } from 'react'
 import { useNavigate, useParams } from 'react-router-dom'
-import { getUserHistory, getUserStats } from '../services/api'
+import { getUserHistory, getUserStats, resolveImageUrl, thumbnailUrl } from '../services/api'
 import type { WasteLog } from '../types'
 
 export function UserHistory() {
@@ -35,7 +35,7 @@ export function UserHistory() {
             wasteType: log.waste_type,
             wasteCount: log.waste_count,
             pointsEarned: log.points_earned,
-            imageUrl: log.image_url || undefined,
+            imageUrl: resolveImageUrl(log.image_url),
             timestamp: log.timestamp,
           }))
           setLogs(historyData)
@@ -99,7 +99,7 @@ export function UserHistory() {
                 {log.imageUrl ? (
                   <div className="w-24 h-24 rounded-xl bg-emerald-50 border border-emerald-100 overflow-hidden">
                     <img
-                      src={log.imageUrl}
+                      src={thumbnailUrl(log.imageUrl)}
                       alt={log.wasteType}
                       className="w-full h-full object-cover"
                       onError={(e) => {
@@ -174,6 +174,71 @@ export async function getAdminRecentLogs(limit: number = 20) {
   }>(`/api/admin/recent-logs?limit=${limit}`)
 }
 
+// ═════════════════════════════════════════════════════════════════
+// Live Updates (Server-Sent Events)
+// ═════════════════════════════════════════════════════════════════
+
+export interface LiveBinEvent {
+  bin_id: number
+  current_fill_level: number
+  max_capacity: number
+  status: string
+}
+
+export interface LiveDisposalEvent {
+  log_id: number
+  user_id: number
+  user_name: string
+  bin_id: number
+  waste_type: string
+  waste_count: number
+  points_earned: number
+  image_url?: string
+  timestamp: string
+}
+
+export interface LiveLeaderboardEvent {
+  user_id: number
+  full_name: string
+  username: string
+  current_points: number
+  total_recycled_items: number
+  carbon_saved_g: number
+  role: string
+  rank: number
+  total: number
+}
+
+export interface LiveEventHandlers {
+  onOpen?: () => void
+  onDisposal?: (event: LiveDisposalEvent) => void
+  onBin?: (event: LiveBinEvent) => void
+  onLeaderboard?: (event: LiveLeaderboardEvent) => void
+}
+
+export function subscribeToEvents(handlers: LiveEventHandlers): () => void {
+  const source = new EventSource(`${API_BASE_URL}/api/events`)
+
+  const listen = <T>(name: string, handler?: (event: T) => void) => {
+    if (!handler) return
+    source.addEventListener(name, (message) => {
+      try {
+        handler(JSON.parse((message as MessageEvent).data) as T)
+      } catch (err) {
+        console.error(`Bad ${name} event:`, err)
+      }
+    })
+  }
+
+  // Fires on the first connection and after every automatic reconnect
+  if (handlers.onOpen) source.onopen = handlers.onOpen
+  listen('disposal', handlers.onDisposal)
+  listen('bin', handlers.onBin)
+  listen('leaderboard', handlers.onLeaderboard)
+
+  return () => source.close()
+}
+
 // ═════════════════════════════════════════════════════════════════
 // Utility Functions
 // ═════════════════════════════════════════════════════════════════
@@ -182,4 +247,21 @@ export function getApiBaseUrl(): string {
   return API_BASE_URL
 }
 
+// Placeholders left in image_url by older uploads
+const IMAGE_PLACEHOLDERS = new Set(['upload_pending', 'upload_failed'])
+
+/**
+ * Turn a log's image_url into something <img> can load: frames in the
+ * backend's local store are stored as "/api/images/<hash>" paths
+ */
+export function resolveImageUrl(imageUrl?: string | null): string | undefined {
+  if (!imageUrl || IMAGE_PLACEHOLDERS.has(imageUrl)) return undefined
+  return imageUrl.startsWith('/') ? `${API_BASE_URL}${imageUrl}` : imageUrl
+}
+
+/** Small preview of a resolved image URL; only local frames have thumbnails */
+export function thumbnailUrl(imageUrl: string): string {
+  return imageUrl.startsWith(`${API_BASE_URL}/api/images/`) ? `${imageUrl}?size=thumb` : imageUrl
+}
+
 export { ApiError }